@@ -23,22 +23,25 @@ class ShotgunPanelApp(Application):
     (PANEL, DIALOG, NEW_DIALOG) = range(3)
 
     documentation_url = "https://support.shotgunsoftware.com/hc/en-us/articles/219033098-Shotgun-Panel"
+
+    # delay in milliseconds after app init before the schema is preloaded
+    SCHEMA_PRELOAD_DELAY = 2000
     
     def init_app(self):
         """
         Called as the application is being initialized
         """
         # We won't be able to do anything if there's no UI. The import
-        # of our app module below required some Qt components, and will likely
+        # of our app module required some Qt components, and will likely
         # blow up.
         if not self.engine.has_ui:
             return
 
-        # first, we use the special import_module command to access the app module
-        # that resides inside the python folder in the app. This is where the actual UI
-        # and business logic of the app is kept. By using the import_module command,
-        # toolkit's code reload mechanism will work properly.
-        app_payload = self.import_module("app")
+        # the app module that resides inside the python folder in the app
+        # holds the actual UI and business logic of the app. It is fairly
+        # heavy to import, so rather than importing it at engine startup,
+        # this is deferred until the panel is first displayed.
+        self._app_payload = None
 
         # now register a panel, this is to tell the engine about the our panel ui 
         # that the engine can automatically create the panel - this happens for
@@ -52,6 +55,16 @@ class ShotgunPanelApp(Application):
         # Keep track of the singleton panel widget. This is used on context
         # changes to automatically navigate to the new context.
         self._current_panel = None
+
+        # start loading the schema in the background once the engine
+        # has finished starting up, so that it is available by the
+        # time the panel is first displayed
+        self._schema_preloader = None
+        from sgtk.platform.qt import QtCore
+        self._schema_preload_timer = QtCore.QTimer()
+        self._schema_preload_timer.setSingleShot(True)
+        self._schema_preload_timer.timeout.connect(self._start_schema_preload)
+        self._schema_preload_timer.start(self.SCHEMA_PRELOAD_DELAY)
         
         # also register a menu entry on the shotgun menu so that users
         # can launch the panel
@@ -89,6 +102,10 @@ class ShotgunPanelApp(Application):
         :param old_context: The context prior to the context change.
         :param new_context: The new context after the context change.
         """
+        # the schema is project specific, so reload it for the new context
+        if self.engine.has_ui and self._schema_preloader:
+            self._schema_preloader.start()
+
         # TODO: It's likely that we'll be implementing a "pinned" behavior
         # for the panel widget in the future. In that case, we'll need to
         # check here to see if the panel has been pinned by the user, and
@@ -151,6 +168,10 @@ class ShotgunPanelApp(Application):
         Called as part engine shutdown
         """
         self.log_debug("Destroying app...")
+        if self.engine.has_ui:
+            self._schema_preload_timer.stop()
+            if self._schema_preloader:
+                self._schema_preloader.stop()
 
     def create_panel(self):
         """
@@ -160,11 +181,11 @@ class ShotgunPanelApp(Application):
         
         :returns: The widget associated with the panel.
         """
-        app_payload = self.import_module("app")
+        dialog_class = self._get_app_payload().get_dialog_class()
         
         # start the UI
         try:
-            widget = self.engine.show_panel(self._unique_panel_id, "Shotgun", self, app_payload.AppDialog)
+            widget = self.engine.show_panel(self._unique_panel_id, "Shotgun", self, dialog_class)
         except AttributeError, e:
             # just to gracefully handle older engines and older cores
             self.log_warning("Could not execute show_panel method - please upgrade "
@@ -185,11 +206,39 @@ class ShotgunPanelApp(Application):
         
         :returns: The widget associated with the dialog. 
         """
-        app_payload = self.import_module("app")
-        widget = self.engine.show_dialog("Shotgun", self, app_payload.AppDialog)
+        dialog_class = self._get_app_payload().get_dialog_class()
+        widget = self.engine.show_dialog("Shotgun", self, dialog_class)
         self._current_dialog = widget
         return widget
 
+    def _get_app_payload(self):
+        """
+        Returns the app module, importing it on first use.
+
+        We use the special import_module command to access the app module
+        that resides inside the python folder in the app. By using the
+        import_module command, toolkit's code reload mechanism will work properly.
+
+        :returns: The app module
+        """
+        if self._app_payload is None:
+            self.log_debug("Importing app payload...")
+            self._app_payload = self.import_module("app")
+        return self._app_payload
+
+    def _start_schema_preload(self):
+        """
+        Starts loading the schema in the background.
+        """
+        try:
+            if self._schema_preloader is None:
+                self._schema_preloader = self._get_app_payload().SchemaPreloader()
+            self._schema_preloader.start()
+        except Exception, e:
+            # the preload is an optimization only - the panel
+            # will load the schema itself when it is opened
+            self.log_warning("Could not preload the Shotgun schema: %s" % e)
+
     def _on_dialog_close(self, dialog):
         """
         Callback called by the panel dialog whenever
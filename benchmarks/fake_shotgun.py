@@ -0,0 +1,751 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Local stand-in for a Shotgun site, used to benchmark the panel
+without any site access.
+
+:class:`SyntheticDataset` generates a reproducible project, with
+sequences, shots, assets, tasks, versions, publishes and notes, from
+a preset size and a random seed. :class:`FakeShotgun` implements the
+subset of the Shotgun API used by the panel and the frameworks it
+depends on (find, find_one, summarize, create, update, batch and the
+schema methods) on top of such a dataset, with a configurable latency
+per call and per returned row.
+"""
+
+import copy
+import random
+import datetime
+import threading
+import time
+
+# preset project sizes, expressed as number of items per parent
+PROJECT_SIZES = {
+    "small": {
+        "users": 10,
+        "sequences": 2,
+        "shots_per_sequence": 10,
+        "assets": 20,
+        "tasks_per_entity": 3,
+        "versions_per_entity": 5,
+        "publishes_per_entity": 5,
+        "notes_per_entity": 5,
+        "replies_per_note": 1,
+    },
+    "medium": {
+        "users": 50,
+        "sequences": 10,
+        "shots_per_sequence": 20,
+        "assets": 200,
+        "tasks_per_entity": 5,
+        "versions_per_entity": 20,
+        "publishes_per_entity": 30,
+        "notes_per_entity": 20,
+        "replies_per_note": 2,
+    },
+    "large": {
+        "users": 200,
+        "sequences": 40,
+        "shots_per_sequence": 50,
+        "assets": 1000,
+        "tasks_per_entity": 8,
+        "versions_per_entity": 50,
+        "publishes_per_entity": 100,
+        "notes_per_entity": 50,
+        "replies_per_note": 3,
+    },
+}
+
+# shotgun data types for the fields present in the dataset
+FIELD_TYPES = {
+    "_all": {
+        "id": "number",
+        "type": "text",
+        "code": "text",
+        "name": "text",
+        "description": "text",
+        "project": "entity",
+        "created_at": "date_time",
+        "created_by": "entity",
+        "updated_at": "date_time",
+        "updated_by": "entity",
+        "sg_status_list": "status_list",
+        "image": "image",
+        "tags": "multi_entity",
+        "tag_list": "tag_list",
+    },
+    "Project": {"tank_name": "text", "sg_status": "list", "sg_description": "text",
+                "users": "multi_entity", "archived": "checkbox"},
+    "HumanUser": {"login": "text", "email": "text", "firstname": "text",
+                  "lastname": "text", "department": "entity", "groups": "multi_entity"},
+    "Group": {"users": "multi_entity"},
+    "Step": {"short_name": "text", "entity_type": "text"},
+    "PublishedFileType": {},
+    "Status": {"bg_color": "color"},
+    "Sequence": {"shots": "multi_entity", "assets": "multi_entity"},
+    "Shot": {"sg_sequence": "entity", "assets": "multi_entity", "sg_cut_in": "number",
+             "sg_cut_out": "number", "sg_cut_duration": "number"},
+    "Asset": {"sg_asset_type": "list", "shots": "multi_entity"},
+    "Task": {"content": "text", "entity": "entity", "step": "entity",
+             "task_assignees": "multi_entity", "start_date": "date", "due_date": "date"},
+    "Version": {"entity": "entity", "sg_task": "entity", "user": "entity",
+                "sg_uploaded_movie": "url", "sg_path_to_movie": "text",
+                "sg_path_to_frames": "text", "sg_first_frame": "number",
+                "sg_last_frame": "number", "frame_count": "number",
+                "playlists": "multi_entity", "published_files": "multi_entity"},
+    "PublishedFile": {"entity": "entity", "task": "entity", "version": "entity",
+                      "published_file_type": "entity", "version_number": "number",
+                      "path": "url"},
+    "Note": {"subject": "text", "content": "text", "note_links": "multi_entity",
+             "tasks": "multi_entity", "addressings_to": "multi_entity",
+             "addressings_cc": "multi_entity", "replies": "multi_entity",
+             "read_by_current_user": "text", "client_note": "checkbox"},
+    "Reply": {"content": "text", "entity": "entity", "user": "entity"},
+}
+
+STATUSES = [("wtg", "Waiting to Start", "190,190,190"),
+            ("ip", "In Progress", "41,173,255"),
+            ("rev", "Pending Review", "255,165,0"),
+            ("fin", "Final", "50,205,50"),
+            ("act", "Active", "50,205,50")]
+
+STEPS = ["Model", "Rig", "Anim", "Light", "Comp"]
+
+PUBLISHED_FILE_TYPES = ["Maya Scene", "Nuke Script", "Rendered Image"]
+
+
+class SyntheticDataset(object):
+    """
+    Reproducible Shotgun dataset for a single project.
+
+    Records are stored as plain shotgun dictionaries, keyed by
+    entity type and id. Links are stored as entity dictionaries
+    with type, id and name keys, in the same way that the Shotgun
+    API returns them.
+    """
+
+    def __init__(self, size="small", seed=0, thumbnail_url=None):
+        """
+        Constructor
+
+        :param size: Name of one of the PROJECT_SIZES presets, or a
+                     dictionary with the same keys.
+        :param seed: Seed for the random generator, so that the same
+                     seed always produces the same dataset.
+        :param thumbnail_url: Url to use for all thumbnails, typically
+                              a file:// url to a local image. If None,
+                              records have no thumbnails.
+        """
+        if isinstance(size, dict):
+            self.size = dict(size)
+        else:
+            self.size = dict(PROJECT_SIZES[size])
+
+        self._random = random.Random(seed)
+        self._thumbnail_url = thumbnail_url
+        self._time = datetime.datetime(2016, 1, 1, 9, 0, 0)
+
+        self.records = {}
+        self._next_ids = {}
+        self._generate()
+
+    def _next_time(self):
+        """
+        Returns an increasing timestamp, so that creation order is stable.
+        """
+        self._time += datetime.timedelta(minutes=self._random.randint(1, 90))
+        return self._time
+
+    def _add(self, entity_type, data):
+        """
+        Adds a record to the dataset.
+
+        :param entity_type: Shotgun entity type
+        :param data: Dictionary of field values
+        :returns: Entity link dictionary for the new record
+        """
+        records = self.records.setdefault(entity_type, {})
+        entity_id = self._next_ids.get(entity_type, 1)
+        self._next_ids[entity_type] = entity_id + 1
+
+        record = {"type": entity_type, "id": entity_id}
+        record.update(data)
+        record.setdefault("created_at", self._next_time())
+        record.setdefault("updated_at", record["created_at"])
+        if "image" not in record and entity_type not in ["Status", "Step", "PublishedFileType"]:
+            record["image"] = self._thumbnail_url
+
+        records[entity_id] = record
+        return self.link(record)
+
+    def link(self, record):
+        """
+        Returns an entity link dictionary for a record.
+
+        :param record: Shotgun record
+        :returns: Dictionary with type, id and name keys
+        """
+        name = record.get("code") or record.get("name") or record.get("content")
+        return {"type": record["type"], "id": record["id"], "name": name}
+
+    def _generate(self):
+        """
+        Generates all the records of the dataset.
+        """
+        rnd = self._random
+        size = self.size
+
+        for (code, name, color) in STATUSES:
+            self._add("Status", {"code": code, "name": name, "bg_color": color})
+
+        steps = [self._add("Step", {"code": x, "short_name": x}) for x in STEPS]
+        publish_types = [self._add("PublishedFileType", {"code": x}) for x in PUBLISHED_FILE_TYPES]
+
+        users = []
+        for idx in range(size["users"]):
+            users.append(self._add("HumanUser", {
+                "name": "User %d" % (idx + 1),
+                "login": "user%d" % (idx + 1),
+                "email": "user%d@example.com" % (idx + 1),
+                "firstname": "User",
+                "lastname": str(idx + 1),
+                "sg_status_list": "act",
+            }))
+        self.current_user = users[0]
+
+        groups = [self._add("Group", {"code": "Group %d" % (idx + 1),
+                                      "users": rnd.sample(users, min(len(users), 5))})
+                  for idx in range(3)]
+
+        self.project = self._add("Project", {
+            "name": "Benchmark Project",
+            "code": "Benchmark Project",
+            "tank_name": "bench",
+            "sg_status": "Active",
+            "sg_description": "Synthetic project used for benchmarking.",
+            "users": users,
+            "archived": False,
+        })
+
+        common = {"project": self.project}
+
+        entities = []
+        for seq_idx in range(size["sequences"]):
+            sequence = self._add("Sequence", dict(common,
+                                                  code="SEQ%03d" % (seq_idx + 1),
+                                                  created_by=rnd.choice(users),
+                                                  sg_status_list="ip"))
+            shots = []
+            for shot_idx in range(size["shots_per_sequence"]):
+                shot = self._add("Shot", dict(common,
+                                              code="SEQ%03d_%04d" % (seq_idx + 1, (shot_idx + 1) * 10),
+                                              sg_sequence=sequence,
+                                              created_by=rnd.choice(users),
+                                              sg_status_list=rnd.choice(["wtg", "ip", "fin"]),
+                                              description="Shot %d of sequence %d" % (shot_idx + 1, seq_idx + 1),
+                                              sg_cut_in=1001,
+                                              sg_cut_out=1001 + rnd.randint(20, 200)))
+                shots.append(shot)
+            self.records["Sequence"][sequence["id"]]["shots"] = shots
+            entities.extend(shots)
+
+        for asset_idx in range(size["assets"]):
+            entities.append(self._add("Asset", dict(common,
+                                                    code="asset_%04d" % (asset_idx + 1),
+                                                    sg_asset_type=rnd.choice(["Character", "Prop", "Environment"]),
+                                                    created_by=rnd.choice(users),
+                                                    sg_status_list=rnd.choice(["wtg", "ip", "fin"]))))
+
+        for entity in entities:
+            tasks = []
+            for step in rnd.sample(steps, min(len(steps), size["tasks_per_entity"])):
+                start = self._next_time().date()
+                tasks.append(self._add("Task", dict(common,
+                                                    content=step["name"],
+                                                    entity=entity,
+                                                    step=step,
+                                                    task_assignees=rnd.sample(users, rnd.randint(1, 2)),
+                                                    sg_status_list=rnd.choice(["wtg", "ip", "rev", "fin"]),
+                                                    start_date=start.isoformat(),
+                                                    due_date=(start + datetime.timedelta(days=10)).isoformat(),
+                                                    created_by=rnd.choice(users))))
+
+            versions = []
+            for idx in range(size["versions_per_entity"]):
+                user = rnd.choice(users)
+                task = rnd.choice(tasks) if tasks else None
+                versions.append(self._add("Version", dict(common,
+                                                          code="%s_v%03d" % (entity["name"], idx + 1),
+                                                          entity=entity,
+                                                          sg_task=task,
+                                                          user=user,
+                                                          created_by=user,
+                                                          sg_status_list=rnd.choice(["rev", "ip", "fin"]),
+                                                          description="Version %d" % (idx + 1),
+                                                          sg_path_to_movie="/mnt/movies/%s_v%03d.mov" % (entity["name"], idx + 1),
+                                                          sg_path_to_frames="/mnt/frames/%s_v%03d.%%04d.exr" % (entity["name"], idx + 1),
+                                                          sg_first_frame=1001,
+                                                          sg_last_frame=1100,
+                                                          frame_count=100)))
+
+            version_numbers = {}
+            for idx in range(size["publishes_per_entity"]):
+                task = rnd.choice(tasks) if tasks else None
+                publish_type = rnd.choice(publish_types)
+                name = "%s_%s" % (entity["name"], publish_type["name"].replace(" ", "").lower())
+                version_number = version_numbers.get(name, 0) + 1
+                version_numbers[name] = version_number
+                self._add("PublishedFile", dict(common,
+                                                code="%s.v%03d" % (name, version_number),
+                                                name=name,
+                                                version_number=version_number,
+                                                entity=entity,
+                                                task=task,
+                                                version=rnd.choice(versions) if versions else None,
+                                                published_file_type=publish_type,
+                                                path={"local_path": "/mnt/publish/%s.v%03d" % (name, version_number)},
+                                                created_by=rnd.choice(users),
+                                                description="Publish %d" % (idx + 1)))
+
+            for idx in range(size["notes_per_entity"]):
+                author = rnd.choice(users)
+                links = [entity]
+                if versions:
+                    links.append(rnd.choice(versions))
+                note = self._add("Note", dict(common,
+                                              subject="Note %d on %s" % (idx + 1, entity["name"]),
+                                              content="Some feedback about %s." % entity["name"],
+                                              note_links=links,
+                                              tasks=[rnd.choice(tasks)] if tasks else [],
+                                              addressings_to=rnd.sample(users, 1),
+                                              addressings_cc=[rnd.choice(groups)] if rnd.random() < 0.3 else [],
+                                              created_by=author,
+                                              user=author,
+                                              read_by_current_user=rnd.choice(["read", "unread"]),
+                                              client_note=False))
+                replies = []
+                for reply_idx in range(size["replies_per_note"]):
+                    replies.append(self._add("Reply", dict(common,
+                                                           content="Reply %d" % (reply_idx + 1),
+                                                           entity=note,
+                                                           user=rnd.choice(users),
+                                                           created_by=rnd.choice(users))))
+                self.records["Note"][note["id"]]["replies"] = replies
+
+    def get_schema(self):
+        """
+        Returns the schema for the dataset, in the format
+        returned by the Shotgun API schema_read() method.
+        """
+        schema = {}
+        for entity_type in FIELD_TYPES.keys():
+            if entity_type == "_all":
+                continue
+            fields = dict(FIELD_TYPES["_all"])
+            fields.update(FIELD_TYPES[entity_type])
+            schema[entity_type] = {}
+            for (field_name, data_type) in fields.iteritems():
+                properties = {}
+                if data_type == "status_list":
+                    properties["valid_values"] = {"value": [x[0] for x in STATUSES]}
+                    properties["display_values"] = {"value": dict((x[0], x[1]) for x in STATUSES)}
+                schema[entity_type][field_name] = {
+                    "data_type": {"value": data_type, "editable": False},
+                    "name": {"value": field_name.replace("sg_", "").replace("_", " ").title(),
+                             "editable": True},
+                    "entity_type": {"value": entity_type, "editable": False},
+                    "editable": {"value": field_name not in ["id", "type"], "editable": False},
+                    "properties": properties,
+                }
+        return schema
+
+
+class _FakeServerCaps(object):
+    """
+    Minimal stand-in for the shotgun_api3 ServerCapabilities object.
+    """
+    def __init__(self, host):
+        self.host = host
+        self.version = (7, 0, 0)
+        self.is_dev = False
+        self.server_info = {"version": list(self.version)}
+
+
+class _FakeConfig(object):
+    """
+    Minimal stand-in for the shotgun_api3 connection configuration.
+    """
+    def __init__(self, host):
+        self.server = host
+        self.scheme = "https"
+        self.api_key = None
+        self.script_name = None
+        self.session_token = "fake-session-token"
+        self.proxy_handler = None
+        self.proxy_server = None
+        self.timeout_secs = None
+
+
+class FakeShotgun(object):
+    """
+    In-memory implementation of the parts of the Shotgun API
+    used by the panel, serving a :class:`SyntheticDataset`.
+
+    Every call sleeps for ``latency`` seconds plus ``row_latency``
+    seconds per returned row, in order to approximate a real site.
+    Calls are thread safe and may be made from background threads.
+    """
+
+    def __init__(self, dataset, host="https://bench.shotgunstudio.local", latency=0.05, row_latency=0.0002):
+        """
+        Constructor
+
+        :param dataset: :class:`SyntheticDataset` to serve
+        :param host: Site url to report
+        :param latency: Seconds of latency per call
+        :param row_latency: Additional seconds of latency per returned row
+        """
+        self._dataset = dataset
+        self._lock = threading.RLock()
+        self.latency = latency
+        self.row_latency = row_latency
+
+        self.base_url = host
+        self.config = _FakeConfig(host.split("://")[-1])
+        self.server_caps = _FakeServerCaps(self.config.server)
+        self.server_info = self.server_caps.server_info
+
+        # number of calls made per method, for reporting
+        self.call_counts = {}
+
+    ############################################################################################
+    # internal helpers
+
+    def _simulate_latency(self, method, num_rows=0):
+        """
+        Records a call and sleeps to simulate the round trip to the server.
+        """
+        with self._lock:
+            self.call_counts[method] = self.call_counts.get(method, 0) + 1
+        delay = self.latency + self.row_latency * num_rows
+        if delay > 0:
+            time.sleep(delay)
+
+    def _get_record(self, entity_type, entity_id):
+        """
+        Returns a record or None if it doesn't exist.
+        """
+        return self._dataset.records.get(entity_type, {}).get(entity_id)
+
+    def _get_field_values(self, record, field_path):
+        """
+        Resolves a field, which may be a deep link such as
+        entity.Shot.sg_sequence, on a record.
+
+        :returns: List of values. Multi entity fields and deep
+                  links through them produce one value per entity.
+        """
+        tokens = field_path.split(".")
+        value = record.get(tokens[0])
+
+        if len(tokens) == 1:
+            return value if isinstance(value, list) else [value]
+
+        linked_type = tokens[1]
+        remainder = ".".join(tokens[2:])
+
+        links = value if isinstance(value, list) else [value]
+        values = []
+        for link in links:
+            if not isinstance(link, dict) or link.get("type") != linked_type:
+                continue
+            linked_record = self._get_record(link["type"], link["id"])
+            if linked_record:
+                values.extend(self._get_field_values(linked_record, remainder))
+        return values
+
+    def _get_field_value(self, record, field_path):
+        """
+        Returns the value for a field, as it would be returned by find().
+        """
+        if "." not in field_path:
+            return copy.deepcopy(record.get(field_path))
+
+        values = [x for x in self._get_field_values(record, field_path) if x is not None]
+        return copy.deepcopy(values[0]) if values else None
+
+    def _values_equal(self, value, expected):
+        """
+        Compares a field value with a filter value, comparing
+        entities by type and id only.
+        """
+        if isinstance(value, dict) and isinstance(expected, dict):
+            return value.get("type") == expected.get("type") and value.get("id") == expected.get("id")
+        return value == expected
+
+    def _matches_condition(self, record, condition):
+        """
+        Evaluates a single filter condition against a record.
+        """
+        (field_path, operator, expected) = (condition[0], condition[1], condition[2])
+        values = self._get_field_values(record, field_path)
+
+        if operator in ["is", "is_not"]:
+            if expected is None:
+                matched = all(x is None for x in values) or values == []
+            else:
+                matched = any(self._values_equal(x, expected) for x in values)
+            return matched if operator == "is" else not matched
+
+        if operator in ["in", "not_in"]:
+            candidates = expected if isinstance(expected, list) else [expected]
+            matched = any(self._values_equal(x, y) for x in values for y in candidates)
+            return matched if operator == "in" else not matched
+
+        if operator in ["type_is", "type_is_not"]:
+            matched = any(isinstance(x, dict) and x.get("type") == expected for x in values)
+            return matched if operator == "type_is" else not matched
+
+        if operator in ["contains", "not_contains"]:
+            matched = any(isinstance(x, basestring) and expected.lower() in x.lower() for x in values)
+            return matched if operator == "contains" else not matched
+
+        if operator == "starts_with":
+            return any(isinstance(x, basestring) and x.lower().startswith(expected.lower()) for x in values)
+
+        if operator == "greater_than":
+            return any(x is not None and x > expected for x in values)
+
+        if operator == "less_than":
+            return any(x is not None and x < expected for x in values)
+
+        if operator == "between":
+            return any(x is not None and condition[2] <= x <= condition[3] for x in values)
+
+        raise ValueError("Filter operator '%s' is not supported by the fake Shotgun site." % operator)
+
+    def _matches(self, record, filters, filter_operator="all"):
+        """
+        Evaluates a list of filters against a record.
+        """
+        results = []
+        for condition in filters:
+            if isinstance(condition, dict):
+                operator = condition.get("filter_operator", "all")
+                results.append(self._matches(record, condition["filters"], operator))
+            else:
+                results.append(self._matches_condition(record, condition))
+
+        if filter_operator in ["any", "or"]:
+            return any(results)
+        return all(results)
+
+    def _find_records(self, entity_type, filters, filter_operator=None):
+        """
+        Returns all records of a type matching the given filters.
+        """
+        with self._lock:
+            records = self._dataset.records.get(entity_type, {}).values()
+            return [x for x in records if self._matches(x, filters, filter_operator or "all")]
+
+    def _sort_key(self, value):
+        """
+        Key used when sorting on a field value.
+        """
+        if isinstance(value, dict):
+            return (1, value.get("name"))
+        return (0 if value is None else 1, value)
+
+    ############################################################################################
+    # shotgun api
+
+    def find(self, entity_type, filters, fields=None, order=None, filter_operator=None,
+             limit=0, retired_only=False, page=0, include_archived_projects=True,
+             additional_filter_presets=None):
+        """
+        Finds records, as per the Shotgun API find() method.
+        """
+        records = self._find_records(entity_type, filters, filter_operator)
+
+        for ordering in reversed(order or []):
+            field_name = ordering["field_name"]
+            records.sort(key=lambda x: self._sort_key(self._get_field_value(x, field_name)),
+                         reverse=ordering.get("direction") == "desc")
+
+        if limit:
+            offset = (page - 1) * limit if page else 0
+            records = records[offset:offset + limit]
+
+        fields = set(fields or []) | set(["type", "id"])
+        results = []
+        with self._lock:
+            for record in records:
+                results.append(dict((x, self._get_field_value(record, x)) for x in fields))
+
+        self._simulate_latency("find", len(results))
+        return results
+
+    def find_one(self, entity_type, filters, fields=None, order=None, filter_operator=None,
+                 retired_only=False, include_archived_projects=True, additional_filter_presets=None):
+        """
+        Finds a single record, as per the Shotgun API find_one() method.
+        """
+        results = self.find(entity_type, filters, fields, order, filter_operator, limit=1)
+        return results[0] if results else None
+
+    def summarize(self, entity_type, filters, summary_fields, filter_operator=None,
+                  grouping=None, include_archived_projects=True):
+        """
+        Summarizes records, as per the Shotgun API summarize() method.
+        Supports count and record_count summaries, grouped by exact value.
+        """
+        records = self._find_records(entity_type, filters, filter_operator)
+
+        def _summarize(group_records):
+            summaries = {}
+            for summary in summary_fields:
+                if summary["type"] not in ["count", "record_count"]:
+                    raise ValueError("Summary type '%s' is not supported by the "
+                                     "fake Shotgun site." % summary["type"])
+                summaries[summary["field"]] = len(group_records)
+            return summaries
+
+        result = {"summaries": _summarize(records), "groups": []}
+
+        if grouping:
+            field_name = grouping[0]["field"]
+            groups = {}
+            for record in records:
+                value = self._get_field_value(record, field_name)
+                key = (value["type"], value["id"]) if isinstance(value, dict) else value
+                groups.setdefault(key, (value, []))[1].append(record)
+            for (value, group_records) in groups.values():
+                display = value.get("name") if isinstance(value, dict) else value
+                result["groups"].append({"group_name": display,
+                                         "group_value": value,
+                                         "summaries": _summarize(group_records)})
+
+        self._simulate_latency("summarize")
+        return result
+
+    def create(self, entity_type, data, return_fields=None):
+        """
+        Creates a record, as per the Shotgun API create() method.
+        """
+        with self._lock:
+            link = self._dataset._add(entity_type, copy.deepcopy(data))
+            record = self._get_record(entity_type, link["id"])
+            result = dict((x, copy.deepcopy(record.get(x))) for x in (return_fields or []))
+            result.update(copy.deepcopy(data))
+            result["type"] = entity_type
+            result["id"] = link["id"]
+
+        self._simulate_latency("create")
+        return result
+
+    def update(self, entity_type, entity_id, data, multi_entity_update_modes=None):
+        """
+        Updates a record, as per the Shotgun API update() method.
+        """
+        update_modes = multi_entity_update_modes or {}
+
+        with self._lock:
+            record = self._get_record(entity_type, entity_id)
+            if record is None:
+                raise ValueError("%s %s does not exist." % (entity_type, entity_id))
+
+            for (field_name, value) in data.iteritems():
+                mode = update_modes.get(field_name, "set")
+                current = record.get(field_name) or []
+                if mode == "add":
+                    keys = set((x["type"], x["id"]) for x in current)
+                    value = current + [x for x in value if (x["type"], x["id"]) not in keys]
+                elif mode == "remove":
+                    keys = set((x["type"], x["id"]) for x in value)
+                    value = [x for x in current if (x["type"], x["id"]) not in keys]
+                record[field_name] = copy.deepcopy(value)
+
+            record["updated_at"] = datetime.datetime.now()
+            result = {"type": entity_type, "id": entity_id}
+            result.update(dict((x, copy.deepcopy(record.get(x))) for x in data.keys()))
+
+        self._simulate_latency("update")
+        return result
+
+    def delete(self, entity_type, entity_id):
+        """
+        Deletes a record, as per the Shotgun API delete() method.
+        """
+        with self._lock:
+            deleted = self._dataset.records.get(entity_type, {}).pop(entity_id, None) is not None
+
+        self._simulate_latency("delete")
+        return deleted
+
+    def batch(self, requests):
+        """
+        Carries out a list of create, update and delete requests,
+        as per the Shotgun API batch() method.
+        """
+        results = []
+        for request in requests:
+            request_type = request["request_type"]
+            if request_type == "create":
+                results.append(self.create(request["entity_type"],
+                                           request["data"],
+                                           request.get("return_fields")))
+            elif request_type == "update":
+                results.append(self.update(request["entity_type"],
+                                           request["entity_id"],
+                                           request["data"],
+                                           request.get("multi_entity_update_modes")))
+            elif request_type == "delete":
+                results.append(self.delete(request["entity_type"], request["entity_id"]))
+            else:
+                raise ValueError("Batch request type '%s' is not supported." % request_type)
+        return results
+
+    def schema_read(self, project_entity=None):
+        """
+        Returns the schema for all entity types.
+        """
+        self._simulate_latency("schema_read")
+        return self._dataset.get_schema()
+
+    def schema_field_read(self, entity_type, field_name=None, project_entity=None):
+        """
+        Returns the schema for the fields of an entity type.
+        """
+        schema = self._dataset.get_schema().get(entity_type, {})
+        if field_name:
+            schema = {field_name: schema[field_name]} if field_name in schema else {}
+        self._simulate_latency("schema_field_read")
+        return schema
+
+    def schema_entity_read(self, project_entity=None):
+        """
+        Returns the display names of all entity types.
+        """
+        self._simulate_latency("schema_entity_read")
+        return dict((x, {"name": {"value": x, "editable": False}, "visible": {"value": True}})
+                    for x in self._dataset.get_schema().keys())
+
+    def info(self):
+        """
+        Returns server information.
+        """
+        return self.server_info
+
+    def close(self):
+        """
+        Closes the connection. Nothing to do here.
+        """
+        pass
@@ -0,0 +1,542 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+End-to-end navigation benchmark for the Shotgun Panel.
+
+Runs the panel inside a tk-shell engine, under an offscreen Qt platform,
+against the local Shotgun stand-in in fake_shotgun.py, so that it runs on
+a plain Linux box without any site access. For a reproducible synthetic
+project, the benchmark navigates to a number of shots and measures:
+
+- details_header: time until the details header shows the new entity
+- first_rows.<tab>: time until a tab shows its first rows
+- all_complete: time until all background work for a navigation,
+  including thumbnail downloads, has completed
+- history_back / history_forward: time until the details header updates
+  after pressing the Back and Forward buttons
+- peak_rss: peak resident memory of the process
+
+Afterwards, it checks that a listing is correct after navigating to the
+current user, whose listings come from the inbox index, and straight back
+before the listing has loaded, and fails if it isn't.
+
+Alternatively, a session recorded on a real site with traffic.py can be
+replayed using --replay. The recorded Shotgun responses are then served
+with their recorded latencies, scaled by --latency-scale, the recorded
+outputs of the site's shotgun_fields and actions hooks are used instead
+of the local hooks, and the recorded navigation is performed instead of
+visiting random shots,
+measuring details_header, history_back/history_forward and all_complete
+for each step.
+
+All caches are written to a temporary directory, so every run starts cold.
+The offscreen platform requires Qt5 based bindings; with PySide 1 the
+benchmark needs to run under a virtual display such as xvfb-run.
+Local checkouts of tk-core, tk-shell, tk-framework-shotgunutils and
+tk-framework-qtwidgets are needed. Usage:
+
+    python navigation.py --tk-core PATH --tk-shell PATH \\
+        --shotgunutils PATH --qtwidgets PATH [--size small] [--seed 0] \\
+        [--latency 0.05] [--row-latency 0.0002] [--navigations 5] [--json FILE]
+
+    python navigation.py --tk-core PATH --tk-shell PATH \\
+        --shotgunutils PATH --qtwidgets PATH --replay FILE [--latency-scale 1.0]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import resource
+import tempfile
+import optparse
+
+import traffic
+import fake_shotgun
+
+BENCHMARK_ROOT = os.path.dirname(os.path.abspath(__file__))
+APP_ROOT = os.path.dirname(BENCHMARK_ROOT)
+
+APP_INSTANCE_NAME = "tk-multi-shotgunpanel"
+
+# maximum time to wait for anything to happen, in seconds
+TIMEOUT = 120
+
+
+class _FakeUserImpl(object):
+    """
+    Stand-in for a toolkit user implementation,
+    handing out connections to the fake Shotgun site.
+    """
+
+    def __init__(self, sg, login):
+        self._sg = sg
+        self._login = login
+
+    def get_host(self):
+        return self._sg.base_url
+
+    def get_http_proxy(self):
+        return None
+
+    def get_login(self):
+        return self._login
+
+    def get_session_metadata(self):
+        return None
+
+    def get_session_token(self):
+        return self._sg.config.session_token
+
+    def create_sg_connection(self):
+        return self._sg
+
+    def are_credentials_expired(self):
+        return False
+
+    def refresh_credentials(self):
+        pass
+
+    def to_dict(self):
+        return {"host": self.get_host(), "login": self._login}
+
+    def __str__(self):
+        return self._login
+
+    def __repr__(self):
+        return "<FakeUser %s @ %s>" % (self._login, self.get_host())
+
+
+class TaskTracker(object):
+    """
+    Keeps track of the tasks outstanding in a background task manager,
+    so that we can tell when all work triggered by a navigation is done.
+    """
+
+    def __init__(self, bg_task_manager):
+        """
+        :param bg_task_manager: Task manager instance to track
+        """
+        self._outstanding = {}
+
+        add_task = bg_task_manager.add_task
+        stop_task = bg_task_manager.stop_task
+        stop_task_group = bg_task_manager.stop_task_group
+
+        def _add_task(*args, **kwargs):
+            uid = add_task(*args, **kwargs)
+            self._outstanding[uid] = kwargs.get("group")
+            return uid
+
+        def _stop_task(uid, *args, **kwargs):
+            self._outstanding.pop(uid, None)
+            return stop_task(uid, *args, **kwargs)
+
+        def _stop_task_group(group, *args, **kwargs):
+            for (uid, task_group) in self._outstanding.items():
+                if task_group == group:
+                    del self._outstanding[uid]
+            return stop_task_group(group, *args, **kwargs)
+
+        bg_task_manager.add_task = _add_task
+        bg_task_manager.stop_task = _stop_task
+        bg_task_manager.stop_task_group = _stop_task_group
+        bg_task_manager.task_completed.connect(self._on_task_done)
+        bg_task_manager.task_failed.connect(self._on_task_done)
+
+    def _on_task_done(self, uid, *args):
+        self._outstanding.pop(uid, None)
+
+    @property
+    def idle(self):
+        """
+        True if no tasks are outstanding
+        """
+        return len(self._outstanding) == 0
+
+
+class NavigationBenchmark(object):
+    """
+    Drives an AppDialog instance and records timings.
+    """
+
+    ENTITY_TABS = ["ENTITY_TAB_NOTES",
+                   "ENTITY_TAB_VERSIONS",
+                   "ENTITY_TAB_PUBLISHES",
+                   "ENTITY_TAB_TASKS",
+                   "ENTITY_TAB_INFO"]
+
+    def __init__(self, dialog, qt_app):
+        """
+        :param dialog: AppDialog instance
+        :param qt_app: QApplication instance
+        """
+        self._dialog = dialog
+        self._qt_app = qt_app
+        self._tracker = TaskTracker(dialog._task_manager)
+        self.timings = {}
+
+    def record(self, name, value):
+        """
+        Records a timing, in seconds. None indicates a timeout.
+        """
+        self.timings.setdefault(name, []).append(value)
+
+    def _wait_for(self, predicate, start_time):
+        """
+        Processes events until the predicate is true.
+
+        :returns: Seconds elapsed since start_time, or None on timeout
+        """
+        while time.time() - start_time < TIMEOUT:
+            self._qt_app.processEvents()
+            if predicate():
+                return time.time() - start_time
+            time.sleep(0.002)
+        return None
+
+    def _header_shows(self, entity_type, entity_id):
+        """
+        Returns a predicate checking that the details header shows an entity.
+        """
+        def _predicate():
+            sg_data = self._dialog._details_model.get_sg_data() or {}
+            return sg_data.get("type") == entity_type and sg_data.get("id") == entity_id
+        return _predicate
+
+    def _tab_has_rows(self, tab_index):
+        """
+        Returns a predicate checking that an entity tab has rows.
+        """
+        def _predicate():
+            if tab_index == self._dialog.ENTITY_TAB_INFO:
+                widget = self._dialog.ui.entity_info_widget
+                return widget.ui.all_fields_view.model().rowCount() > 0
+            tab_dict = self._dialog._detail_tabs[(self._dialog.ENTITY_PAGE_IDX, tab_index)]
+            return tab_dict["model"] is not None and tab_dict["model"].rowCount() > 0
+        return _predicate
+
+    def settle(self, entity):
+        """
+        Waits for the panel to display its initial location.
+
+        :param entity: Entity dictionary for the initial location
+        """
+        self._wait_for(self._header_shows(entity["type"], entity["id"]), time.time())
+
+    def navigate(self, entity):
+        """
+        Navigates to an entity and measures timings.
+
+        :param entity: Entity dictionary with type and id keys
+        """
+        start_time = time.time()
+        self._dialog.navigate_to_entity(entity["type"], entity["id"])
+        self.record("details_header",
+                     self._wait_for(self._header_shows(entity["type"], entity["id"]), start_time))
+
+        tab_widget = self._dialog.ui.entity_tab_widget
+        for tab_name in self.ENTITY_TABS:
+            tab_index = getattr(self._dialog, tab_name)
+            tab_start_time = time.time()
+            if tab_widget.currentIndex() == tab_index:
+                self._dialog._load_entity_tab_data(tab_index)
+            else:
+                tab_widget.setCurrentIndex(tab_index)
+            name = "first_rows.%s" % tab_name.replace("ENTITY_TAB_", "").lower()
+            self.record(name, self._wait_for(self._tab_has_rows(tab_index), tab_start_time))
+
+        self.record("all_complete", self._wait_for(lambda: self._tracker.idle, start_time))
+
+    def history(self, entities):
+        """
+        Steps back through the history and forward again,
+        measuring the time until the header updates.
+
+        :param entities: Entities visited, in order
+        """
+        for entity in reversed(entities[:-1]):
+            start_time = time.time()
+            self._dialog.ui.navigation_prev.click()
+            self.record("history_back",
+                         self._wait_for(self._header_shows(entity["type"], entity["id"]), start_time))
+
+        for entity in entities[1:]:
+            start_time = time.time()
+            self._dialog.ui.navigation_next.click()
+            self.record("history_forward",
+                         self._wait_for(self._header_shows(entity["type"], entity["id"]), start_time))
+
+    def replay(self, events):
+        """
+        Performs recorded navigation events and measures timings.
+
+        :param events: Navigation events from a :class:`traffic.Recording`
+        """
+        tab_widgets = {self._dialog.ENTITY_PAGE_IDX: self._dialog.ui.entity_tab_widget,
+                       self._dialog.VERSION_PAGE_IDX: self._dialog.ui.version_tab_widget,
+                       self._dialog.PUBLISH_PAGE_IDX: self._dialog.ui.publish_tab_widget}
+
+        for event in events:
+            start_time = time.time()
+
+            if event["event"] == "navigate":
+                self._dialog.navigate_to_entity(event["entity_type"], event["entity_id"])
+                self.record("details_header",
+                             self._wait_for(self._header_shows(event["entity_type"], event["entity_id"]),
+                                            start_time))
+
+            elif event["event"] in ("back", "forward"):
+                if event["event"] == "back":
+                    self._dialog.ui.navigation_prev.click()
+                else:
+                    self._dialog.ui.navigation_next.click()
+                location = self._dialog._current_location
+                self.record("history_%s" % event["event"],
+                             self._wait_for(self._header_shows(location.entity_type, location.entity_id),
+                                            start_time))
+
+            elif event["event"] == "tab":
+                current_tab = self._dialog._get_current_tab()
+                if current_tab is None:
+                    continue
+                tab_widgets[current_tab[0]].setCurrentIndex(event["tab_index"])
+
+            self.record("all_complete", self._wait_for(lambda: self._tracker.idle, start_time))
+
+    def check_inbox_round_trip(self, entity, user, sg):
+        """
+        Navigates to an entity, then to the current user, whose notes are
+        listed from the inbox index, and straight back again, before the
+        notes of the entity have loaded. Checks that the notes tab then
+        lists the notes of the entity.
+
+        :param entity: Entity dictionary with type and id keys
+        :param user: Entity dictionary for the current user
+        :param sg: Shotgun connection to look up the expected notes with
+        :raises: RuntimeError if the notes tab lists other notes
+        """
+        self._dialog.ui.entity_tab_widget.setCurrentIndex(self._dialog.ENTITY_TAB_NOTES)
+        self._dialog.navigate_to_entity(entity["type"], entity["id"])
+        self._dialog.navigate_to_entity(user["type"], user["id"])
+        self._dialog.ui.navigation_prev.click()
+
+        start_time = time.time()
+        self._wait_for(self._header_shows(entity["type"], entity["id"]), start_time)
+        self._wait_for(lambda: self._tracker.idle, start_time)
+
+        model = self._dialog._detail_tabs[(self._dialog.ENTITY_PAGE_IDX, self._dialog.ENTITY_TAB_NOTES)]["model"]
+        listed_ids = set()
+        for row in range(model.rowCount()):
+            sg_data = model.item(row).get_sg_data()
+            if sg_data:
+                listed_ids.add(sg_data["id"])
+
+        expected_ids = set(x["id"] for x in sg.find(
+            "Note",
+            model.get_formatter().get_link_filters(self._dialog._current_location),
+            ["id"],
+            order=[{"field_name": "updated_at", "direction": "desc"}],
+            limit=model.SG_RECORD_LIMIT
+        ))
+        if listed_ids != expected_ids:
+            raise RuntimeError("The notes tab for %s %s lists %d notes, expected %d." % (
+                entity["type"], entity["id"], len(listed_ids), len(expected_ids))
+            )
+
+
+def _create_thumbnail(qt_gui, folder):
+    """
+    Writes a thumbnail image to disk.
+
+    :returns: file:// url for the image
+    """
+    path = os.path.join(folder, "thumbnail.png")
+    image = qt_gui.QImage(512, 400, qt_gui.QImage.Format_RGB32)
+    image.fill(0x406080)
+    image.save(path)
+    return "file://%s" % path
+
+
+def run(options):
+    """
+    Runs the benchmark.
+
+    :param options: Parsed command line options
+    :returns: Dictionary with a list of values, in seconds, per timing
+              and a summary of the calls made to the fake site.
+    """
+    temp_folder = tempfile.mkdtemp(prefix="shotgunpanel_bench_")
+
+    # all toolkit caches go into the temp folder so that each run is cold
+    os.environ["SHOTGUN_HOME"] = os.path.join(temp_folder, "shotgun_home")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ["SHOTGUNPANEL_BENCH_APP"] = APP_ROOT
+    os.environ["SHOTGUNPANEL_BENCH_TK_SHELL"] = os.path.abspath(options.tk_shell)
+    os.environ["SHOTGUNPANEL_BENCH_SHOTGUNUTILS"] = os.path.abspath(options.shotgunutils)
+    os.environ["SHOTGUNPANEL_BENCH_QTWIDGETS"] = os.path.abspath(options.qtwidgets)
+
+    sys.path.insert(0, os.path.join(os.path.abspath(options.tk_core), "python"))
+    import sgtk
+    from tank.util.qt_importer import QtImporter
+    from tank.authentication.user import ShotgunUser
+
+    try:
+        qt = QtImporter()
+        qt_app = qt.QtGui.QApplication.instance() or qt.QtGui.QApplication(sys.argv)
+
+        dataset = fake_shotgun.SyntheticDataset(options.size,
+                                                options.seed,
+                                                _create_thumbnail(qt.QtGui, temp_folder))
+        sg = fake_shotgun.FakeShotgun(dataset,
+                                      latency=options.latency,
+                                      row_latency=options.row_latency)
+        login = dataset.records["HumanUser"][dataset.current_user["id"]]["login"]
+        project = dataset.project
+
+        recording = None
+        if options.replay:
+            # serve the recorded traffic, falling back on the
+            # synthetic site for anything that wasn't recorded
+            recording = traffic.Recording(options.replay)
+            thumbnail_folder = os.path.join(temp_folder, "thumbnails")
+            os.makedirs(thumbnail_folder)
+            sg = traffic.ReplayShotgun(recording,
+                                       latency_scale=options.latency_scale,
+                                       thumbnail_urls=recording.write_thumbnails(thumbnail_folder),
+                                       fallback=sg)
+            login = recording.login or login
+            project = recording.project or project
+
+        user = ShotgunUser(_FakeUserImpl(sg, login))
+        sgtk.set_authenticated_user(user)
+
+        manager = sgtk.bootstrap.ToolkitManager(user)
+        manager.do_shotgun_config_lookup = False
+        manager.base_configuration = {"type": "dev", "path": os.path.join(BENCHMARK_ROOT, "config")}
+        engine = manager.bootstrap_engine("tk-shell", entity=project)
+
+        try:
+            app = engine.apps[APP_INSTANCE_NAME]
+
+            replay_hooks = None
+            if recording:
+                # use the hook outputs of the recorded site
+                replay_hooks = traffic.ReplayHooks(recording)
+                replay_hooks.install(app)
+
+            open_start_time = time.time()
+            dialog = app.create_dialog()
+            open_time = time.time() - open_start_time
+
+            benchmark = NavigationBenchmark(dialog, qt_app)
+            benchmark.record("open_panel", open_time)
+            benchmark.settle(project)
+
+            if recording:
+                benchmark.replay(recording.events)
+            else:
+                # pick a reproducible set of shots to visit
+                shots = sorted(dataset.records["Shot"].values(), key=lambda x: x["id"])
+                targets = random.Random(options.seed).sample(shots, min(options.navigations, len(shots)))
+
+                for entity in targets:
+                    benchmark.navigate(entity)
+                benchmark.history(targets)
+
+            calls = dict(sg.call_counts)
+            if not recording:
+                benchmark.check_inbox_round_trip(targets[0], dataset.current_user, sg)
+
+            dialog.window().close()
+            qt_app.processEvents()
+
+        finally:
+            engine.destroy()
+
+        results = {"timings": benchmark.timings,
+                   "calls": calls,
+                   "replay_misses": len(sg.misses) if recording else 0,
+                   "hook_misses": len(replay_hooks.misses) if replay_hooks else 0,
+                   # ru_maxrss is reported in kilobytes on linux
+                   "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0}
+
+    finally:
+        shutil.rmtree(temp_folder, ignore_errors=True)
+
+    return results
+
+
+def _print_results(results):
+    """
+    Prints a summary of the results.
+    """
+    print "%-26s %10s %10s %10s %6s" % ("timing", "min ms", "median ms", "max ms", "n")
+    for (name, values) in sorted(results["timings"].iteritems()):
+        completed = sorted(x for x in values if x is not None)
+        timeouts = len(values) - len(completed)
+        if not completed:
+            print "%-26s %10s" % (name, "timeout")
+            continue
+        print "%-26s %10.1f %10.1f %10.1f %6d%s" % (
+            name,
+            completed[0] * 1000,
+            completed[len(completed) / 2] * 1000,
+            completed[-1] * 1000,
+            len(completed),
+            "  (%d timeouts)" % timeouts if timeouts else "",
+        )
+
+    print
+    print "peak rss: %.1f MB" % results["peak_rss_mb"]
+    print "shotgun calls: %s" % ", ".join("%s=%d" % x for x in sorted(results["calls"].iteritems()))
+    if results["replay_misses"]:
+        print "calls missing from the recording: %d" % results["replay_misses"]
+    if results["hook_misses"]:
+        print "hook calls missing from the recording: %d" % results["hook_misses"]
+
+
+def main():
+    """
+    Entry point
+    """
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("--tk-core", help="Path to a tk-core checkout")
+    parser.add_option("--tk-shell", help="Path to a tk-shell checkout")
+    parser.add_option("--shotgunutils", help="Path to a tk-framework-shotgunutils checkout")
+    parser.add_option("--qtwidgets", help="Path to a tk-framework-qtwidgets checkout")
+    parser.add_option("--size", default="small", choices=sorted(fake_shotgun.PROJECT_SIZES.keys()),
+                      help="Synthetic project size")
+    parser.add_option("--seed", type="int", default=0, help="Seed for the synthetic project")
+    parser.add_option("--latency", type="float", default=0.05, help="Seconds of latency per Shotgun call")
+    parser.add_option("--row-latency", type="float", default=0.0002, help="Seconds of latency per returned row")
+    parser.add_option("--navigations", type="int", default=5, help="Number of shots to navigate to")
+    parser.add_option("--json", help="Write the raw results to this file")
+    parser.add_option("--replay", help="Replay a session recorded with traffic.py")
+    parser.add_option("--latency-scale", type="float", default=1.0,
+                      help="Factor applied to the recorded latencies when replaying")
+    (options, _) = parser.parse_args()
+
+    for name in ["tk_core", "tk_shell", "shotgunutils", "qtwidgets"]:
+        if not getattr(options, name):
+            parser.error("--%s is required." % name.replace("_", "-"))
+
+    results = run(options)
+    _print_results(results)
+
+    if options.json:
+        with open(options.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Engine startup benchmark for the Shotgun Panel.
+
+Starts an engine for a given pipeline configuration and context and
+reports how long the engine startup took, followed by the cost of
+importing the panel UI. The UI import is deferred until the panel is
+first displayed, so it should not be part of engine startup.
+
+After the engine has started, the event loop is run until the schema
+preload has been triggered, to check that the preload does not import
+the panel UI either.
+
+Each iteration runs in a fresh python process so that module imports
+are measured cold.
+
+Usage:
+
+    python startup.py [--iterations N] [--engine tk-shell] <path>
+
+Where path is a file system path inside a project, used to determine
+the pipeline configuration and context. Toolkit core must be importable
+and the current user authenticated.
+"""
+
+import os
+import sys
+import json
+import time
+import optparse
+import subprocess
+
+APP_INSTANCE_NAME = "tk-multi-shotgunpanel"
+
+# time the event loop keeps running after the schema preload
+# has been triggered, in seconds
+PRELOAD_MARGIN = 1.0
+
+def _run_event_loop(duration):
+    """
+    Processes Qt events for a given time, so that timers can fire.
+
+    :param duration: Time to run the event loop for, in seconds
+    """
+    from sgtk.platform.qt import QtGui
+    qt_app = QtGui.QApplication.instance() or QtGui.QApplication(sys.argv)
+    end = time.time() + duration
+    while time.time() < end:
+        qt_app.processEvents()
+        time.sleep(0.01)
+
+def _is_dialog_imported(app):
+    """
+    Checks if the panel dialog module has been imported.
+
+    :param app: App instance
+    :returns: True if the dialog module is in sys.modules
+    """
+    dialog_path = os.path.join(app.disk_location, "python", "app", "dialog.py")
+    for module in sys.modules.values():
+        module_path = getattr(module, "__file__", None)
+        if module_path and os.path.splitext(module_path)[0] == os.path.splitext(dialog_path)[0]:
+            return True
+    return False
+
+def _run_once(engine_name, path):
+    """
+    Starts an engine and measures the startup costs of the panel.
+
+    :param engine_name: Name of the engine to start
+    :param path: Path to derive the pipeline configuration and context from
+    :returns: Dictionary of timings, in seconds
+    """
+    import sgtk
+
+    before = time.time()
+    tk = sgtk.sgtk_from_path(path)
+    ctx = tk.context_from_path(path)
+    engine = sgtk.platform.start_engine(engine_name, tk, ctx)
+    engine_startup = time.time() - before
+
+    app = engine.apps.get(APP_INSTANCE_NAME)
+    if app is None:
+        raise RuntimeError("App %s is not configured for engine %s" % (APP_INSTANCE_NAME, engine_name))
+
+    # let the schema preload timer fire
+    _run_event_loop(app.SCHEMA_PRELOAD_DELAY / 1000.0 + PRELOAD_MARGIN)
+    if _is_dialog_imported(app):
+        raise RuntimeError("The panel dialog was imported before the panel was displayed.")
+
+    before = time.time()
+    app.import_module("app").get_dialog_class()
+    payload_import = time.time() - before
+
+    engine.destroy()
+
+    return {
+        "engine_startup": engine_startup,
+        "payload_import": payload_import,
+    }
+
+def main():
+    """
+    Entry point
+    """
+    parser = optparse.OptionParser(usage="%prog [options] path")
+    parser.add_option("--engine", default="tk-shell", help="Engine to start")
+    parser.add_option("--iterations", type="int", default=5, help="Number of cold starts")
+    parser.add_option("--child", action="store_true", help=optparse.SUPPRESS_HELP)
+    (options, args) = parser.parse_args()
+
+    if len(args) != 1:
+        parser.error("A path inside a project is required.")
+
+    if options.child:
+        print json.dumps(_run_once(options.engine, args[0]))
+        return
+
+    results = []
+    for _ in range(options.iterations):
+        output = subprocess.check_output([sys.executable,
+                                          os.path.abspath(__file__),
+                                          "--child",
+                                          "--engine", options.engine,
+                                          args[0]])
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for key in ["engine_startup", "payload_import"]:
+        values = sorted(x[key] for x in results)
+        print "%-16s min %7.1f ms   median %7.1f ms   max %7.1f ms" % (
+            key,
+            values[0] * 1000,
+            values[len(values) / 2] * 1000,
+            values[-1] * 1000,
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,523 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Recording and replay of the Shotgun traffic generated by the panel.
+
+A recording captures, from a real session, every Shotgun API call made
+through toolkit (with its response and duration), every thumbnail
+downloaded, the output of the data hooks and the navigation performed
+in the panel. It is saved as a gzipped json file.
+
+To record a session, run the following in the host application before
+the panel is opened, then use the panel and stop the recording::
+
+    import sys
+    sys.path.append("/path/to/tk-multi-shotgunpanel/benchmarks")
+    import traffic
+    recorder = traffic.Recorder(sgtk.platform.current_engine().apps["tk-multi-shotgunpanel"])
+    recorder.start()
+    ...
+    recorder.stop("/tmp/session.json.gz")
+
+The recording can then be replayed offline by the navigation benchmark,
+which uses a :class:`ReplayShotgun` connection to serve the recorded
+responses in their original order, with the original latencies scaled
+by a configurable factor::
+
+    python navigation.py ... --replay /tmp/session.json.gz --latency-scale 1.0
+"""
+
+import os
+import copy
+import gzip
+import json
+import time
+import base64
+import datetime
+import threading
+
+# version of the recording file format
+FORMAT_VERSION = 1
+
+# shotgun api methods which are recorded and replayed
+RECORDED_METHODS = ["find",
+                    "find_one",
+                    "summarize",
+                    "create",
+                    "update",
+                    "delete",
+                    "batch",
+                    "text_search",
+                    "note_thread_read",
+                    "activity_stream_read",
+                    "schema_read",
+                    "schema_field_read",
+                    "schema_entity_read"]
+
+# hook methods which return data and whose output is recorded
+RECORDED_HOOK_METHODS = [("shotgun_fields_hook", "get_list_item_definition"),
+                         ("shotgun_fields_hook", "get_all_fields"),
+                         ("shotgun_fields_hook", "get_main_view_definition"),
+                         ("actions_hook", "generate_actions")]
+
+
+def _encode(value):
+    """
+    Converts a value returned by the Shotgun API into something
+    that can be serialized as json.
+    """
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": time.mktime(value.timetuple())}
+    if isinstance(value, datetime.date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, dict):
+        return dict((k, _encode(v)) for (k, v) in value.iteritems())
+    if isinstance(value, (list, tuple)):
+        return [_encode(x) for x in value]
+    return value
+
+
+def _decode(value):
+    """
+    Inverse of _encode()
+    """
+    if isinstance(value, dict):
+        if "$datetime" in value:
+            return datetime.datetime.fromtimestamp(value["$datetime"])
+        if "$date" in value:
+            return datetime.datetime.strptime(value["$date"], "%Y-%m-%d").date()
+        return dict((k, _decode(v)) for (k, v) in value.iteritems())
+    if isinstance(value, list):
+        return [_decode(x) for x in value]
+    return value
+
+
+def _request_key(method, args, kwargs):
+    """
+    Returns a key identifying a request, independent of dictionary ordering.
+    """
+    return json.dumps([method, _encode(list(args)), _encode(kwargs)], sort_keys=True)
+
+
+class RecordingShotgun(object):
+    """
+    Wraps a Shotgun API connection, recording all calls made through it.
+    """
+
+    def __init__(self, sg, recorder):
+        """
+        :param sg: Shotgun API connection to wrap
+        :param recorder: :class:`Recorder` to report calls to
+        """
+        self._sg = sg
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attr = getattr(self._sg, name)
+        if name not in RECORDED_METHODS:
+            return attr
+
+        def _recorded_call(*args, **kwargs):
+            start_time = time.time()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception, e:
+                self._recorder.add_call(name, args, kwargs, start_time, error=str(e))
+                raise
+            self._recorder.add_call(name, args, kwargs, start_time, result=result)
+            return result
+
+        return _recorded_call
+
+
+class Recorder(object):
+    """
+    Records the Shotgun traffic of a panel session.
+
+    Recording works by patching toolkit's connection factory, the
+    thumbnail download method of the shotgun utils framework, the app's
+    hook execution and the panel's navigation methods. Recording should be
+    started before the panel is opened so that all traffic is captured.
+    """
+
+    def __init__(self, app):
+        """
+        :param app: The Shotgun Panel app instance
+        """
+        self._app = app
+        self._lock = threading.Lock()
+        self._start_time = None
+        self._patches = []
+        self._wrapped = {}
+
+        self._context = {}
+        self._calls = []
+        self._thumbnails = {}
+        self._hooks = []
+        self._events = []
+
+    def _patch(self, owner, name, replacement):
+        """
+        Replaces an attribute, keeping track of the original so it can be restored.
+        """
+        self._patches.append((owner, name, owner.__dict__[name] if name in owner.__dict__ else getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def _wrap_connection(self, sg):
+        """
+        Returns a recording wrapper for a connection, reusing wrappers.
+        """
+        if isinstance(sg, RecordingShotgun):
+            return sg
+        with self._lock:
+            if id(sg) not in self._wrapped:
+                self._wrapped[id(sg)] = (sg, RecordingShotgun(sg, self))
+            return self._wrapped[id(sg)][1]
+
+    def add_call(self, method, args, kwargs, start_time, result=None, error=None):
+        """
+        Records a Shotgun API call.
+        """
+        call = {"method": method,
+                "args": _encode(list(args)),
+                "kwargs": _encode(kwargs),
+                "start": start_time - self._start_time,
+                "duration": time.time() - start_time,
+                "thread": threading.current_thread().name}
+        if error is None:
+            call["result"] = _encode(result)
+        else:
+            call["error"] = error
+        with self._lock:
+            self._calls.append(call)
+
+    def add_event(self, event, **kwargs):
+        """
+        Records a panel navigation event.
+        """
+        kwargs["event"] = event
+        kwargs["time"] = time.time() - self._start_time
+        with self._lock:
+            self._events.append(kwargs)
+
+    def start(self):
+        """
+        Starts recording.
+        """
+        import tank.util.shotgun as sg_util
+
+        self._start_time = time.time()
+        recorder = self
+
+        # all toolkit connections, including the per thread connections
+        # used by the background workers, come from this factory
+        get_sg_connection = sg_util.get_sg_connection
+        self._patch(sg_util, "get_sg_connection",
+                    lambda: recorder._wrap_connection(get_sg_connection()))
+
+        # thumbnails
+        shotgun_data = self._app.frameworks["tk-framework-shotgunutils"].import_module("shotgun_data")
+        retriever_class = shotgun_data.ShotgunDataRetriever
+        download_thumbnail = retriever_class.download_thumbnail
+
+        def _download_thumbnail(url, bundle, *args, **kwargs):
+            path = download_thumbnail(url, bundle, *args, **kwargs)
+            with open(path, "rb") as fh:
+                data = base64.b64encode(fh.read())
+            with recorder._lock:
+                recorder._thumbnails[url] = {"data": data, "extension": os.path.splitext(path)[1]}
+            return path
+        self._patch(retriever_class, "download_thumbnail", staticmethod(_download_thumbnail))
+
+        # hooks
+        execute_hook_method = self._app.execute_hook_method
+
+        def _execute_hook_method(hook_name, method_name, **kwargs):
+            result = execute_hook_method(hook_name, method_name, **kwargs)
+            if (hook_name, method_name) in RECORDED_HOOK_METHODS:
+                with recorder._lock:
+                    recorder._hooks.append({"hook": hook_name,
+                                            "method": method_name,
+                                            "kwargs": _encode(kwargs),
+                                            "result": _encode(result)})
+            return result
+        self._app.execute_hook_method = _execute_hook_method
+
+        # navigation
+        app_payload = self._app.import_module("app")
+        dialog_class = app_payload.get_dialog_class()
+        navigate_to = dialog_class._navigate_to
+        on_prev_clicked = dialog_class._on_prev_clicked
+        on_next_clicked = dialog_class._on_next_clicked
+
+        def _navigate_to(dialog, location):
+            recorder.add_event("navigate", entity_type=location.entity_type, entity_id=location.entity_id)
+            return navigate_to(dialog, location)
+
+        def _on_prev_clicked(dialog, *args):
+            recorder.add_event("back")
+            return on_prev_clicked(dialog)
+
+        def _on_next_clicked(dialog, *args):
+            recorder.add_event("forward")
+            return on_next_clicked(dialog)
+
+        self._patch(dialog_class, "_navigate_to", _navigate_to)
+        self._patch(dialog_class, "_on_prev_clicked", _on_prev_clicked)
+        self._patch(dialog_class, "_on_next_clicked", _on_next_clicked)
+
+        location_class = app_payload.shotgun_location.ShotgunLocation
+        set_tab_index = location_class.set_tab_index
+
+        def _set_tab_index(location, index):
+            recorder.add_event("tab", entity_type=location.entity_type, tab_index=index)
+            return set_tab_index(location, index)
+        self._patch(location_class, "set_tab_index", _set_tab_index)
+
+        # finally, capture the context and the schema so that the
+        # session can be replayed against a cold cache
+        sg = sg_util.get_sg_connection()
+        context = self._app.context
+        self._context = {"project": None, "user": None, "login": sgtk_login(self._app)}
+        if context.project:
+            self._context["project"] = _encode(sg.find_one("Project",
+                                                           [["id", "is", context.project["id"]]],
+                                                           ["name", "tank_name"]))
+            sg.schema_read(context.project)
+            sg.schema_entity_read(context.project)
+        if context.user:
+            self._context["user"] = _encode(sg.find_one(context.user["type"],
+                                                        [["id", "is", context.user["id"]]],
+                                                        ["name", "login", "email"]))
+        sg.find("Status", [], ["bg_color", "code", "name"])
+
+    def stop(self, path):
+        """
+        Stops recording and writes the recording to disk.
+
+        :param path: Path to write the gzipped json recording to
+        """
+        for (owner, name, original) in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches = []
+        self._wrapped = {}
+        del self._app.execute_hook_method
+
+        with self._lock:
+            recording = {"version": FORMAT_VERSION,
+                         "context": self._context,
+                         "calls": self._calls,
+                         "thumbnails": self._thumbnails,
+                         "hooks": self._hooks,
+                         "events": self._events}
+
+        fh = gzip.open(path, "wb")
+        try:
+            json.dump(recording, fh, separators=(",", ":"))
+        finally:
+            fh.close()
+
+
+def sgtk_login(app):
+    """
+    Returns the login of the current toolkit user, if any.
+    """
+    import sgtk
+    user = sgtk.get_authenticated_user()
+    return user.login if user else None
+
+
+class Recording(object):
+    """
+    A recording loaded from disk.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path to a recording written by :class:`Recorder`
+        """
+        fh = gzip.open(path, "rb")
+        try:
+            data = json.load(fh)
+        finally:
+            fh.close()
+
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError("Unsupported recording format version %s." % data.get("version"))
+
+        self.context = _decode(data["context"])
+        self.calls = data["calls"]
+        self.thumbnails = data["thumbnails"]
+        self.hooks = data["hooks"]
+        self.events = data["events"]
+
+    @property
+    def project(self):
+        """
+        Project record for the recorded session
+        """
+        return self.context["project"]
+
+    @property
+    def login(self):
+        """
+        Login of the user who recorded the session
+        """
+        return self.context["login"]
+
+    def write_thumbnails(self, folder):
+        """
+        Writes all recorded thumbnails to disk.
+
+        :param folder: Folder to write to
+        :returns: Dictionary mapping recorded urls to file:// urls
+        """
+        urls = {}
+        for (idx, (url, thumbnail)) in enumerate(sorted(self.thumbnails.iteritems())):
+            path = os.path.join(folder, "thumb_%d%s" % (idx, thumbnail["extension"]))
+            with open(path, "wb") as fh:
+                fh.write(base64.b64decode(thumbnail["data"]))
+            urls[url] = "file://%s" % path
+        return urls
+
+    def get_hook_results(self):
+        """
+        Returns the recorded hook outputs.
+
+        :returns: Dictionary keyed by (hook name, method name, kwargs key)
+        """
+        results = {}
+        for hook in self.hooks:
+            key = (hook["hook"], hook["method"], json.dumps(hook["kwargs"], sort_keys=True))
+            results[key] = _decode(hook["result"])
+        return results
+
+
+class ReplayHooks(object):
+    """
+    Serves the recorded outputs of the hook methods in RECORDED_HOOK_METHODS,
+    so that a session recorded with a site's custom hooks, e.g. a custom
+    shotgun_fields hook, is replayed with the same field lists and queries.
+    Calls which weren't recorded are passed on to the local hooks.
+    """
+
+    def __init__(self, recording):
+        """
+        :param recording: :class:`Recording` to replay
+        """
+        self._results = recording.get_hook_results()
+        # hook calls which weren't found in the recording
+        self.misses = []
+
+    def install(self, app):
+        """
+        Patches the hook execution of an app instance.
+
+        :param app: App instance, before its dialog has been created
+        """
+        execute_hook_method = app.execute_hook_method
+        results = self._results
+        misses = self.misses
+
+        def _execute_hook_method(hook_name, method_name, **kwargs):
+            if (hook_name, method_name) in RECORDED_HOOK_METHODS:
+                key = (hook_name, method_name, json.dumps(_encode(kwargs), sort_keys=True))
+                if key in results:
+                    return copy.deepcopy(results[key])
+                misses.append(key)
+            return execute_hook_method(hook_name, method_name, **kwargs)
+        app.execute_hook_method = _execute_hook_method
+
+
+class ReplayShotgun(object):
+    """
+    Shotgun API stand-in which serves the responses from a recording.
+
+    Identical requests are served in the order in which they were
+    recorded, with the last response being repeated once they have all
+    been used. Each call sleeps for the recorded duration multiplied by
+    the latency scale. Requests which weren't recorded are passed to an
+    optional fallback connection, or otherwise return an empty result.
+    """
+
+    def __init__(self, recording, latency_scale=1.0, thumbnail_urls=None, fallback=None):
+        """
+        :param recording: :class:`Recording` to replay
+        :param latency_scale: Factor to apply to the recorded latencies
+        :param thumbnail_urls: Dictionary mapping recorded urls to the
+                               urls that should be returned instead
+        :param fallback: Connection to pass requests that weren't recorded to
+        """
+        self._lock = threading.Lock()
+        self._latency_scale = latency_scale
+        self._thumbnail_urls = thumbnail_urls or {}
+        self._fallback = fallback
+
+        self._responses = {}
+        for call in recording.calls:
+            key = _request_key(call["method"], _decode(call["args"]), _decode(call["kwargs"]))
+            self._responses.setdefault(key, []).append(call)
+
+        # requests which weren't found in the recording
+        self.misses = []
+        self.call_counts = {}
+
+        if fallback:
+            self.base_url = fallback.base_url
+            self.config = fallback.config
+            self.server_caps = fallback.server_caps
+            self.server_info = fallback.server_info
+
+    def _replace_urls(self, value):
+        """
+        Substitutes recorded thumbnail urls in a response.
+        """
+        if isinstance(value, basestring):
+            return self._thumbnail_urls.get(value, value)
+        if isinstance(value, dict):
+            return dict((k, self._replace_urls(v)) for (k, v) in value.iteritems())
+        if isinstance(value, list):
+            return [self._replace_urls(x) for x in value]
+        return value
+
+    def _replay(self, method, args, kwargs):
+        """
+        Replays a single request.
+        """
+        key = _request_key(method, args, kwargs)
+
+        with self._lock:
+            self.call_counts[method] = self.call_counts.get(method, 0) + 1
+            responses = self._responses.get(key)
+            if responses:
+                call = responses.pop(0) if len(responses) > 1 else responses[0]
+            else:
+                call = None
+                self.misses.append(key)
+
+        if call is None:
+            if self._fallback and hasattr(self._fallback, method):
+                return getattr(self._fallback, method)(*args, **kwargs)
+            return [] if method == "find" else None
+
+        time.sleep(call["duration"] * self._latency_scale)
+
+        if "error" in call:
+            raise Exception(call["error"])
+
+        return self._replace_urls(_decode(copy.deepcopy(call["result"])))
+
+    def __getattr__(self, name):
+        if name in RECORDED_METHODS:
+            return lambda *args, **kwargs: self._replay(name, args, kwargs)
+        if self._fallback:
+            return getattr(self._fallback, name)
+        raise AttributeError(name)
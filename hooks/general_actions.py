@@ -98,10 +98,22 @@ class GeneralActions(HookBaseClass):
         Execute a given action. The data sent to this be method will
         represent one of the actions enumerated by the generate_actions method.
         
+        The method can optionally report back which Shotgun records the action
+        has modified. This allows the panel to update those items in place rather
+        than reloading everything. Return a list of dictionaries, each with type
+        and id keys and optionally the new values for the fields that the action
+        changed, for example::
+
+            [{"type": "Task", "id": 123, "sg_status_list": "ip"}]
+
+        Return an empty list if the action didn't change any Shotgun data. If None
+        is returned, the panel will assume that anything may have changed and
+        do a full refresh.
+
         :param name: Action name string representing one of the items returned by generate_actions.
         :param params: Params data, as specified by generate_actions.
         :param sg_data: Shotgun data dictionary
-        :returns: No return value expected.
+        :returns: List of modified Shotgun records or None, see above.
         """
         app = self.parent
         app.log_debug("Execute action called for action %s. "
@@ -115,18 +127,67 @@ class GeneralActions(HookBaseClass):
             assignees = data["task_assignees"] or []
             assignees.append(app.context.user)
             app.shotgun.update("Task", sg_data["id"], {"task_assignees": assignees})
+            return [{"type": "Task", "id": sg_data["id"], "task_assignees": assignees}]
 
         elif name == "task_to_ip":        
             app.shotgun.update("Task", sg_data["id"], {"sg_status_list": "ip"})
+            return [{"type": "Task", "id": sg_data["id"], "sg_status_list": "ip"}]
 
         elif name == "quicktime_clipboard":
             self._copy_to_clipboard(sg_data["sg_path_to_movie"])
+            return []
             
         elif name == "sequence_clipboard":
             self._copy_to_clipboard(sg_data["sg_path_to_frames"])
+            return []
             
         elif name == "publish_clipboard":
             self._copy_to_clipboard(sg_data["path"]["local_path"])
+            return []
+
+    def get_update_requests(self, name, params, sg_data):
+        """
+        Returns the Shotgun updates that carry out a given action, if the
+        action can be handed over to the panel rather than being executed.
+        This is only called if the background_action_updates setting is
+        enabled.
+        
+        The panel writes the updates to Shotgun in the background, shows the
+        new values in the UI straight away and rolls them back if the update
+        fails. Update requests are dictionaries with type, id and update keys.
+        Multi entity fields can be appended to or removed from via the optional
+        multi_entity_update_modes key, using the same syntax as the Shotgun API
+        update() method::
+
+            [{"type": "Task", 
+              "id": 123, 
+              "update": {"task_assignees": [user]},
+              "multi_entity_update_modes": {"task_assignees": "add"}}]
+
+        If None is returned, the action is executed with execute_action.
+
+        :param name: Action name string representing one of the items returned by generate_actions.
+        :param params: Params data, as specified by generate_actions.
+        :param sg_data: Shotgun data dictionary
+        :returns: List of update requests or None, see above.
+        """
+        app = self.parent
+        
+        if name == "assign_task":
+            if app.context.user is None:
+                raise Exception("Cannot establish current user!")
+            
+            return [{"type": "Task", 
+                     "id": sg_data["id"], 
+                     "update": {"task_assignees": [app.context.user]},
+                     "multi_entity_update_modes": {"task_assignees": "add"}}]
+
+        elif name == "task_to_ip":        
+            return [{"type": "Task", 
+                     "id": sg_data["id"], 
+                     "update": {"sg_status_list": "ip"}}]
+
+        return None
             
         
     def _copy_to_clipboard(self, text):
@@ -105,7 +105,9 @@ class MayaActions(HookBaseClass):
         :param name: Action name string representing one of the items returned by generate_actions.
         :param params: Params data, as specified by generate_actions.
         :param sg_data: Shotgun data dictionary
-        :returns: No return value expected.
+        :returns: Optional list of Shotgun records modified by the action, or None
+                  if the panel should be fully refreshed. See the general_actions
+                  hook for details.
         """
         app = self.parent
         app.log_debug("Execute action called for action %s. "
@@ -133,7 +135,7 @@ class MayaActions(HookBaseClass):
         
         else:
             try:
-                HookBaseClass.execute_action(self, name, params, sg_data)
+                return HookBaseClass.execute_action(self, name, params, sg_data)
             except AttributeError, e:
                 # base class doesn't have the method, so ignore and continue
                 pass                          
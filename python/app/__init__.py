@@ -8,4 +8,16 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
-from .dialog import AppDialog
+# the dialog pulls in all the widgets, models and frameworks of the
+# panel, so it is only imported once the panel is displayed. The schema
+# preloader is used at engine startup and must stay lightweight.
+from .schema_preloader import SchemaPreloader
+
+def get_dialog_class():
+    """
+    Returns the panel dialog class, importing the UI on first use.
+
+    :returns: :class:`AppDialog` class
+    """
+    from .dialog import AppDialog
+    return AppDialog
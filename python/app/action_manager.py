@@ -27,6 +27,15 @@ class ActionManager(QtCore.QObject):
     # emitted when the user requests a refresh via the actions system
     refresh_request = QtCore.Signal()
     
+    # emitted when an action reports which shotgun records it has modified.
+    # the list contains shotgun dictionaries with type, id and any new field values.
+    records_updated = QtCore.Signal(list)
+    
+    # emitted when an action requests the panel to update shotgun records.
+    # the list contains update requests, each with type, id and update keys
+    # and the dictionary holds the shotgun data for the item the action was run on.
+    update_requested = QtCore.Signal(list, dict)
+    
     # the area of the UI that an action is being requested/run for.
     UI_AREA_MAIN = 0x1
     UI_AREA_DETAILS = 0x2
@@ -171,14 +180,25 @@ class ActionManager(QtCore.QObject):
                             "Params: %s. Sg data: %s" % (action_name, params, sg_data))
         
         try:
-            self._app.execute_hook_method("actions_hook", 
-                                          "execute_action", 
-                                          name=action_name, 
-                                          params=params, 
-                                          sg_data=sg_data)
-            
-            # refresh UI
-            self.refresh_request.emit()
+            update_requests = self._get_update_requests(action_name, sg_data, params)
+            if update_requests:
+                # the panel carries out the updates in the background
+                self.update_requested.emit(update_requests, sg_data)
+            else:
+                sg_records = self._app.execute_hook_method("actions_hook", 
+                                                           "execute_action", 
+                                                           name=action_name, 
+                                                           params=params, 
+                                                           sg_data=sg_data)
+                
+                if self._is_valid_record_list(sg_records):
+                    # the action told us exactly what it modified,
+                    # so only update those records in the UI
+                    if len(sg_records) > 0:
+                        self.records_updated.emit(sg_records)
+                else:
+                    # we don't know what has changed - refresh UI
+                    self.refresh_request.emit()
             
         except Exception, e:
             self._app.log_exception("Could not execute execute_action hook.")
@@ -190,6 +210,73 @@ class ActionManager(QtCore.QObject):
                 # ignore all errors. ex: using a core that doesn't support metrics
                 pass
 
+    def _get_update_requests(self, action_name, sg_data, params):
+        """
+        Asks the actions hook for the updates that carry out an action,
+        if background action updates are enabled.
+        
+        :param action_name: Name of action to execute
+        :param sg_data: Shotgun data dictionary
+        :param params: action parameters passed in from the hook
+        :returns: List of update requests, or None if the action
+                  should be executed by the hook.
+        """
+        if not self._app.get_setting("background_action_updates"):
+            return None
+        
+        try:
+            update_requests = self._app.execute_hook_method("actions_hook", 
+                                                            "get_update_requests", 
+                                                            name=action_name, 
+                                                            params=params, 
+                                                            sg_data=sg_data)
+        except AttributeError:
+            # the hook doesn't derive from the default actions hook
+            self._app.log_debug("Actions hook has no get_update_requests method.")
+            return None
+        
+        if update_requests is None:
+            return None
+        
+        if not isinstance(update_requests, list):
+            update_requests = [update_requests]
+        for update_request in update_requests:
+            if not isinstance(update_request, dict) or "type" not in update_request or \
+               "id" not in update_request or not isinstance(update_request.get("update"), dict):
+                self._app.log_warning("Actions hook returned invalid update request %s - "
+                                      "dropping the updates and executing the action "
+                                      "instead." % (update_request,))
+                return None
+        
+        return update_requests
+
+    def _is_valid_record_list(self, sg_records):
+        """
+        Checks that the value returned by the execute_action hook
+        is a list of shotgun records, each with a type and an id.
+        
+        :param sg_records: Value returned by the hook
+        :returns: True if valid, False otherwise
+        """
+        if not isinstance(sg_records, list):
+            return False
+        
+        for sg_record in sg_records:
+            if not isinstance(sg_record, dict) or "type" not in sg_record or "id" not in sg_record:
+                self._app.log_warning("Action hook returned invalid record %s - "
+                                      "will refresh the entire UI." % sg_record)
+                return False
+            if "update" in sg_record:
+                # update requests are only carried out when
+                # returned by the get_update_requests method
+                self._app.log_warning("Action hook returned update request %s from "
+                                      "execute_action, which is not carried out. Return it "
+                                      "from get_update_requests instead - will refresh "
+                                      "the entire UI." % (sg_record,))
+                return False
+        
+        return True
+
     def _show_docs(self):
         """
         Internal action callback - Launch app documentation
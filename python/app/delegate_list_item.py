@@ -16,6 +16,7 @@ shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "sho
 shotgun_view = sgtk.platform.import_framework("tk-framework-qtwidgets", "views")
 
 from .widget_list_item import ListItemWidget
+from . import tracing
 
 class ListItemDelegate(shotgun_view.EditSelectedWidgetDelegate):
     """
@@ -90,27 +91,28 @@ class ListItemDelegate(shotgun_view.EditSelectedWidgetDelegate):
         :param model_index: The model index to operate on
         :param style_options: QT style options
         """
-        icon = shotgun_model.get_sanitized_data(model_index, QtCore.Qt.DecorationRole)
-        if icon:
-            thumb = icon.pixmap(512)
-            widget.set_thumbnail(thumb)
-
-        # note: This is a violation of the model/delegate independence.
-        if model_index.model().sourceModel().is_highlighted(model_index):
-            widget.set_highlighted(True)
-        else:
-            widget.set_highlighted(False)
-
-        # get the shotgun data
-        sg_item = shotgun_model.get_sg_data(model_index)
-        
-        # get the formatter object which defines how this object is to be presented
-        sg_formatter = model_index.model().sourceModel().get_formatter()
-        
-        # ask to format the data
-        (header_left, header_right, body) = sg_formatter.format_list_item_details(sg_item)
+        with tracing.span("delegate_paint", "ui"):
+            icon = shotgun_model.get_sanitized_data(model_index, QtCore.Qt.DecorationRole)
+            if icon:
+                thumb = icon.pixmap(512)
+                widget.set_thumbnail(thumb)
+
+            # note: This is a violation of the model/delegate independence.
+            if model_index.model().sourceModel().is_highlighted(model_index):
+                widget.set_highlighted(True)
+            else:
+                widget.set_highlighted(False)
+
+            # get the shotgun data
+            sg_item = shotgun_model.get_sg_data(model_index)
+
+            # get the formatter object which defines how this object is to be presented
+            sg_formatter = model_index.model().sourceModel().get_formatter()
+
+            # ask to format the data
+            (header_left, header_right, body) = sg_formatter.format_list_item_details(sg_item)
 
-        widget.set_text(header_left, header_right, body)
+            widget.set_text(header_left, header_right, body)
 
         
     def sizeHint(self, style_options, model_index):
@@ -0,0 +1,224 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import json
+import time
+
+from sgtk.platform.qt import QtCore, QtGui
+from .ui.diagnostics_dialog import Ui_DiagnosticsDialog
+from . import tracing
+from . import query_stats
+from . import memory_stats
+
+
+class DiagnosticsDialog(QtGui.QDialog):
+    """
+    Hidden dialog displaying the tracing spans recorded for
+    recent navigations as a waterfall, with the option to export
+    them as Chrome trace json, a report of the queries issued
+    by the panel and an estimate of the panel's memory usage.
+    """
+
+    def __init__(self, get_memory_usage, parent):
+        """
+        :param get_memory_usage: Callable returning a list of memory usage entries,
+                                 see :meth:`memory_stats.format_report()`
+        :param parent: The model parent.
+        :type parent: :class:`~PySide.QtGui.QObject`
+        """
+        super(DiagnosticsDialog, self).__init__(parent)
+
+        # now load in the UI that was created in the UI designer
+        self.ui = Ui_DiagnosticsDialog()
+        self.ui.setupUi(self)
+
+        self._get_memory_usage = get_memory_usage
+        self._navigations = []
+        self._waterfall = WaterfallWidget(self)
+        self.ui.waterfall_area.setWidget(self._waterfall)
+
+        self.ui.navigation_combo.currentIndexChanged.connect(self._on_navigation_selected)
+        self.ui.refresh.clicked.connect(self.refresh)
+        self.ui.export_trace.clicked.connect(self._on_export_clicked)
+
+        self.refresh()
+
+    def refresh(self):
+        """
+        Reloads the recorded navigations and the query and memory reports.
+        """
+        self.ui.query_report.setPlainText(query_stats.get_report())
+        self.ui.memory_report.setPlainText(memory_stats.format_report(self._get_memory_usage()))
+
+        # most recent navigation first
+        self._navigations = list(reversed(tracing.get_navigations()))
+
+        self.ui.navigation_combo.blockSignals(True)
+        try:
+            self.ui.navigation_combo.clear()
+            for root in self._navigations:
+                self.ui.navigation_combo.addItem(
+                    "%s  %s %s  (%d spans)" % (
+                        time.strftime("%H:%M:%S", time.localtime(root.start_time)),
+                        root.args["entity_type"],
+                        root.args["entity_id"],
+                        root.args["spans"]
+                    )
+                )
+        finally:
+            self.ui.navigation_combo.blockSignals(False)
+
+        self._on_navigation_selected(0)
+
+    def _on_navigation_selected(self, index):
+        """
+        Displays the waterfall for the navigation at the given combo box index.
+
+        :param index: Index in the navigation combo box
+        """
+        if index < 0 or index >= len(self._navigations):
+            self._waterfall.set_navigation(None)
+            self.ui.summary.setText("No navigations have been recorded.")
+            return
+
+        root = self._navigations[index]
+        self._waterfall.set_navigation(root)
+
+        # summarize the total time spent per span type
+        totals = {}
+        for (span, _) in root.walk():
+            if span is not root and span.duration is not None:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration
+
+        self.ui.summary.setText(
+            ", ".join("%s: %.0f ms" % (name, total * 1000) for (name, total) in sorted(totals.iteritems()))
+        )
+
+    def _on_export_clicked(self):
+        """
+        Exports all recorded navigations as a Chrome trace file.
+        """
+        path = QtGui.QFileDialog.getSaveFileName(
+            self,
+            "Export Chrome Trace",
+            "shotgun_panel_trace.json",
+            "Trace Files (*.json)"
+        )
+        # PySide returns a (path, filter) tuple
+        if isinstance(path, tuple):
+            path = path[0]
+        if not path:
+            return
+
+        with open(path, "w") as fh:
+            json.dump(tracing.to_chrome_trace(tracing.get_navigations()), fh)
+
+
+class WaterfallWidget(QtGui.QWidget):
+    """
+    Paints the spans for a navigation as a waterfall: one row per
+    span, indented by depth, with a bar covering the time the span ran.
+    """
+
+    ROW_HEIGHT = 18
+    LABEL_WIDTH = 260
+    MARGIN = 6
+
+    # bar colors per span category
+    CATEGORY_COLORS = {
+        "navigation": QtGui.QColor(120, 120, 120),
+        "ui": QtGui.QColor(48, 167, 227),
+        "model": QtGui.QColor(110, 190, 90),
+        "shotgun": QtGui.QColor(230, 160, 50),
+    }
+
+    def __init__(self, parent):
+        """
+        :param parent: Parent widget
+        """
+        super(WaterfallWidget, self).__init__(parent)
+        self._rows = []
+        self._start_time = 0
+        self._end_time = 0
+
+    def set_navigation(self, root):
+        """
+        Sets the navigation to display.
+
+        :param root: Navigation root span or None
+        """
+        self._rows = list(root.walk()) if root else []
+
+        if self._rows:
+            now = time.time()
+            self._start_time = root.start_time
+            self._end_time = max(span.end_time or now for (span, _) in self._rows)
+
+        self.setMinimumHeight(len(self._rows) * self.ROW_HEIGHT + 2 * self.MARGIN)
+        self.update()
+
+    def _get_row(self, pos):
+        """
+        Returns the span at the given widget position, or None.
+        """
+        idx = (pos.y() - self.MARGIN) / self.ROW_HEIGHT
+        if 0 <= idx < len(self._rows):
+            return self._rows[idx][0]
+        return None
+
+    def event(self, event):
+        """
+        Shows the span arguments as a tooltip.
+        """
+        if event.type() == QtCore.QEvent.ToolTip:
+            span = self._get_row(event.pos())
+            if span:
+                lines = ["%s: %s" % (k, v) for (k, v) in sorted(span.args.iteritems())]
+                lines.append("thread: %s" % span.thread_name)
+                QtGui.QToolTip.showText(event.globalPos(), "\n".join(lines), self)
+            else:
+                QtGui.QToolTip.hideText()
+            return True
+        return super(WaterfallWidget, self).event(event)
+
+    def paintEvent(self, event):
+        """
+        Paints the waterfall.
+        """
+        if not self._rows:
+            return
+
+        painter = QtGui.QPainter(self)
+        try:
+            total_duration = max(self._end_time - self._start_time, 0.001)
+            bar_area_width = max(self.width() - self.LABEL_WIDTH - 2 * self.MARGIN, 1)
+            now = time.time()
+
+            for (row, (span, depth)) in enumerate(self._rows):
+                y = self.MARGIN + row * self.ROW_HEIGHT
+
+                end_time = span.end_time or now
+                duration = end_time - span.start_time
+
+                painter.setPen(self.palette().color(QtGui.QPalette.Text))
+                painter.drawText(
+                    QtCore.QRect(self.MARGIN + depth * 10, y, self.LABEL_WIDTH - depth * 10, self.ROW_HEIGHT),
+                    QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter,
+                    "%s  %.1f ms%s" % (span.name, duration * 1000, "" if span.end_time else "..."),
+                )
+
+                x = self.MARGIN + self.LABEL_WIDTH + int(
+                    (span.start_time - self._start_time) / total_duration * bar_area_width
+                )
+                width = max(int(duration / total_duration * bar_area_width), 1)
+                color = self.CATEGORY_COLORS.get(span.category, QtGui.QColor(180, 180, 180))
+                painter.fillRect(x, y + 3, width, self.ROW_HEIGHT - 6, color)
+        finally:
+            painter.end()
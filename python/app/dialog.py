@@ -10,6 +10,7 @@
 
 import sgtk
 import pprint
+import time
 
 # by importing QT from sgtk rather than directly, we ensure that
 # the code will be compatible with both PySide and PyQt.
@@ -30,9 +31,23 @@ from .model_all_fields import SgAllFieldsModel
 from .model_details import SgEntityDetailsModel
 from .model_current_user import SgCurrentUserModel
 from .not_found_overlay import NotFoundModelOverlay
+from .listing_proxy import ListingProxyModel
 from .shotgun_formatter import ShotgunTypeFormatter
 from .note_updater import NoteUpdater
+from .record_updater import RecordUpdater
+from .record_store import RecordStore
+from .query_coalescer import QueryCoalescer
+from .tab_counter import TabCounter
+from .link_resolver import LinkResolver
+from .query_splitter import QuerySplitter
+from .inbox_index import InboxIndex
 from .work_area_dialog import WorkAreaDialog
+from .diagnostics_dialog import DiagnosticsDialog
+from .stall_watchdog import StallWatchdog
+from . import utils
+from . import tracing
+from . import memory_stats
+from . import schema_lookup
 
 shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
 task_manager = sgtk.platform.import_framework("tk-framework-shotgunutils", "task_manager")
@@ -49,6 +64,15 @@ MAX_LEN_UPPER_BODY_DETAILS = 1200
 # milliseconds to show splash
 SPLASH_UI_TIME_MILLISECONDS = 2000
 
+# seconds after which tabs that haven't been displayed are torn down
+TAB_IDLE_TIMEOUT_SECONDS = 600
+
+# milliseconds between checks for idle tabs
+TAB_IDLE_CHECK_INTERVAL_MILLISECONDS = 60000
+
+# milliseconds between memory usage summaries and budget checks
+MEMORY_CHECK_INTERVAL_MILLISECONDS = 300000
+
 class AppDialog(QtGui.QWidget):
     """
     Main application dialog window. This defines the top level UI
@@ -100,9 +124,17 @@ class AppDialog(QtGui.QWidget):
         # most of the useful accessors are available through the Application class instance
         # it is often handy to keep a reference to this. You can get it via the following method:
         self._app = sgtk.platform.current_bundle()
+
+        # optionally watch for UI thread stalls caused by the panel
+        self._stall_watchdog = None
+        if self._app.get_setting("enable_stall_watchdog"):
+            self._stall_watchdog = StallWatchdog(self._app.get_setting("stall_watchdog_threshold"), self)
+            self._stall_watchdog.start()
         
         self._action_manager = ActionManager(self)
         self._action_manager.refresh_request.connect(self.setup_ui)
+        self._action_manager.records_updated.connect(self._on_records_modified)
+        self._action_manager.update_requested.connect(self._on_update_requested)
 
         # create a background task manager
         self._task_manager = task_manager.BackgroundTaskManager(self, 
@@ -111,6 +143,9 @@ class AppDialog(QtGui.QWidget):
 
         # register the data fetcher with the global schema manager
         shotgun_globals.register_bg_task_manager(self._task_manager)
+        # and have the schema lookup tables wait for the schema to be
+        # loaded through it, in case the preloader hasn't run
+        schema_lookup.reset()
                 
         # now load in the UI that was created in the UI designer
         self.ui = Ui_Dialog() 
@@ -119,6 +154,55 @@ class AppDialog(QtGui.QWidget):
         # create a note updater to run operations on notes in the db
         self._note_updater = NoteUpdater(self._task_manager, self)
 
+        # create a store for the records loaded by all the models, so that
+        # fresher values for a record are reflected everywhere it is displayed
+        self._record_store = RecordStore(self)
+        self._record_store.records_changed.connect(self._update_records)
+
+        # identical finds requested by the panel share a single call
+        self._query_coalescer = QueryCoalescer(self._task_manager, self)
+
+        # create a record updater to re-read records that have been modified
+        self._record_updater = RecordUpdater(self._task_manager,
+                                             self._query_coalescer,
+                                             self._record_store,
+                                             self)
+        self._record_updater.records_updated.connect(self._update_records)
+        self._record_updater.records_committed.connect(self._on_records_modified)
+        self._record_updater.update_failed.connect(self._on_update_failed)
+
+        # optionally count the records in the listing tabs, so that
+        # the counts can be displayed in the tab captions
+        self._tab_counter = None
+        if self._app.get_setting("show_tab_counts"):
+            self._tab_counter = TabCounter(self._task_manager, self)
+            self._tab_counter.counts_available.connect(self._on_tab_counts_available)
+        # (caption without counts, caption displayed) keyed by (page, tab) index
+        self._tab_captions = {}
+
+        # optionally resolve deep links in the listings with batched
+        # queries backed by a shared entity cache
+        self._link_resolver = None
+        if self._app.get_setting("resolve_deep_links"):
+            self._link_resolver = LinkResolver(self._query_coalescer, self._record_store, self)
+            self._link_resolver.records_resolved.connect(self._update_records)
+
+        # optionally run listing queries combining several
+        # conditions with OR as one query per condition
+        self._query_splitter = None
+        if self._app.get_setting("split_or_queries"):
+            self._query_splitter = QuerySplitter(self._query_coalescer, self)
+            if self._tab_counter:
+                self._tab_counter.set_query_splitter(self._query_splitter)
+
+        # optionally list the current user's notes and tasks from
+        # a local index which is kept up to date incrementally
+        self._inbox_index = None
+        if self._app.get_setting("use_inbox_index"):
+            self._inbox_index = InboxIndex(self._query_coalescer, self._record_store, self)
+            if self._tab_counter:
+                self._tab_counter.set_inbox_index(self._inbox_index)
+
         # flag to keep track of when we are navigating
         self._navigating = False
 
@@ -193,6 +277,7 @@ class AppDialog(QtGui.QWidget):
         
         # top detail section
         self._details_model = SgEntityDetailsModel(self, self._task_manager)
+        self._details_model.set_record_store(self._record_store)
         self._details_overlay = ShotgunModelOverlayWidget(self._details_model, 
                                                           self.ui.top_group)
         
@@ -274,74 +359,48 @@ class AppDialog(QtGui.QWidget):
                                   "view": self.ui.version_publish_view,
                                   "entity_type": self._publish_entity_type}
 
-        
-        # now initialize all tabs. This will add two model and delegate keys
-        # to all the dicts
-        
-        for (idx, tab_dict) in self._detail_tabs.iteritems():
-            
-            ModelClass = tab_dict["model_class"]
-            DelegateClass = tab_dict["delegate_class"] 
-                    
-            self._app.log_debug("Creating %r..." % ModelClass)
-            
-            # create model 
-            tab_dict["model"] = ModelClass(tab_dict["entity_type"], 
-                                           tab_dict["view"],
-                                           self._task_manager)
-                
-            # create proxy for sorting
-            tab_dict["sort_proxy"] = QtGui.QSortFilterProxyModel(self)
-            tab_dict["sort_proxy"].setSourceModel(tab_dict["model"])
-                        
-            # now use the proxy model to sort the data to ensure
-            # higher version numbers appear earlier in the list
-            # the history model is set up so that the default display
-            # role contains the version number field in shotgun.
-            # This field is what the proxy model sorts by default
-            # We set the dynamic filter to true, meaning QT will keep
-            # continously sorting. And then tell it to use column 0
-            # (we only have one column in our models) and descending order.
-            tab_dict["sort_proxy"].setDynamicSortFilter(True)
-            tab_dict["sort_proxy"].sort(0, QtCore.Qt.DescendingOrder)
-    
-            # set up model
-            tab_dict["view"].setModel(tab_dict["sort_proxy"])            
+
+        # the models, delegates and overlays for the tabs are created
+        # the first time a tab is displayed. Here we just hook up the views.
+        for tab_dict in self._detail_tabs.values():
+            tab_dict["model"] = None
             # set up a global on-click handler for
             tab_dict["view"].doubleClicked.connect(self._on_entity_doubleclicked)
-            # create delegate
-            tab_dict["delegate"] = DelegateClass(tab_dict["view"], self._action_manager)
-            tab_dict["delegate"].change_work_area.connect(self._change_work_area)
-            # hook up delegate renderer with view
-            tab_dict["view"].setItemDelegate(tab_dict["delegate"])
-            # and set up a spinner overlay
-            tab_dict["overlay"] = NotFoundModelOverlay(tab_dict["model"], tab_dict["view"])
-        
-            if ModelClass == SgPublishHistoryListingModel:
-                # this class needs special access to the overlay
-                tab_dict["model"].set_overlay(tab_dict["overlay"])
-        
-        # set up the all fields tabs
-        self._entity_details_model = SgAllFieldsModel(self, self._task_manager)
-        self._entity_details_overlay = ShotgunModelOverlayWidget(
-            self._entity_details_model,
-            self.ui.entity_info_widget
-        )
-             
-        self._entity_details_model.data_updated.connect(self.ui.entity_info_widget.set_data)
-        self.ui.entity_info_widget.link_activated.connect(self._on_link_clicked)
-           
-        self._version_details_model = SgAllFieldsModel(self.ui.version_info_widget, self._task_manager)        
-        self._version_details_model.data_updated.connect(self.ui.version_info_widget.set_data)
-        self.ui.version_info_widget.link_activated.connect(self._on_link_clicked)
-        
-        self._publish_details_model = SgAllFieldsModel(self.ui.publish_info_widget, self._task_manager)
-        self._publish_details_model.data_updated.connect(self.ui.publish_info_widget.set_data)
-        self.ui.publish_info_widget.link_activated.connect(self._on_link_clicked)
+
+        # set up the all fields tabs. As with the other tabs,
+        # the models are created on first display.
+        self._info_tabs = {}
+        self._info_tabs[self.ENTITY_PAGE_IDX] = {"widget": self.ui.entity_info_widget,
+                                                 "tab_index": self.ENTITY_TAB_INFO,
+                                                 "model": None}
+        self._info_tabs[self.VERSION_PAGE_IDX] = {"widget": self.ui.version_info_widget,
+                                                  "tab_index": self.VERSION_TAB_INFO,
+                                                  "model": None}
+        self._info_tabs[self.PUBLISH_PAGE_IDX] = {"widget": self.ui.publish_info_widget,
+                                                  "tab_index": self.PUBLISH_TAB_INFO,
+                                                  "model": None}
+
+        for tab_dict in self._info_tabs.values():
+            tab_dict["widget"].link_activated.connect(self._on_link_clicked)
+
+        # periodically tear down tabs which haven't been used for a while
+        self._idle_tab_timer = QtCore.QTimer(self)
+        self._idle_tab_timer.timeout.connect(self._destroy_idle_tabs)
+        self._idle_tab_timer.start(TAB_IDLE_CHECK_INTERVAL_MILLISECONDS)
+
+        # periodically log memory usage and keep the tabs within budget
+        self._memory_timer = QtCore.QTimer(self)
+        self._memory_timer.timeout.connect(self._check_memory_usage)
+        self._memory_timer.start(MEMORY_CHECK_INTERVAL_MILLISECONDS)
 
         # the set work area overlay
         self.ui.set_context.change_work_area.connect(self._change_work_area)
 
+        # hidden diagnostics page displaying timings for recent navigations
+        self._diagnostics_dialog = None
+        self._diagnostics_shortcut = QtGui.QShortcut(QtGui.QKeySequence("Ctrl+Shift+D"), self)
+        self._diagnostics_shortcut.activated.connect(self._show_diagnostics)
+
         # kick off
         self._on_home_clicked()
 
@@ -378,18 +437,24 @@ class AppDialog(QtGui.QWidget):
             self._details_model.destroy()
             self._current_user_model.destroy()
             
-            # and the all fields model
-            self._entity_details_model.destroy()
-            self._version_details_model.destroy()
-            self._publish_details_model.destroy()
-            
             # gracefully close all tab model connections
-            for tab_dict in self._detail_tabs.values():
-                tab_dict["model"].destroy()            
+            self._idle_tab_timer.stop()
+            self._memory_timer.stop()
+            for idx in self._detail_tabs.keys():
+                self._destroy_tab(idx)
+
+            # and the all fields models
+            for page_idx in self._info_tabs.keys():
+                self._destroy_info_tab(page_idx)
 
             # shut down main threadpool
             self._task_manager.shut_down()                
 
+            # report any UI thread stalls
+            if self._stall_watchdog:
+                self._stall_watchdog.stop()
+                self._app.log_info(self._stall_watchdog.get_report())
+
         except Exception, e:
             self._app.log_exception("Error running Shotgun Panel App closeEvent()")
                 
@@ -399,6 +464,18 @@ class AppDialog(QtGui.QWidget):
         # okay to close dialog
         event.accept()
 
+    def _show_diagnostics(self):
+        """
+        Shows the diagnostics dialog with timings for recent navigations.
+        """
+        if self._diagnostics_dialog is None:
+            self._diagnostics_dialog = DiagnosticsDialog(self.get_memory_usage, self)
+        else:
+            self._diagnostics_dialog.refresh()
+        self._diagnostics_dialog.show()
+        self._diagnostics_dialog.raise_()
+        self._diagnostics_dialog.activateWindow()
+
 
     ##################################################################################################
     # load data and set up UI for a particular state
@@ -407,26 +484,33 @@ class AppDialog(QtGui.QWidget):
         """
         sets up the UI for the current location
         """
-        if self._current_location.entity_type == "Version":
-            self.focus_version()
-            
-        elif self._current_location.entity_type in ["PublishedFile", "TankPublishedFile"]:
-            self.focus_publish()
-        
-        elif self._current_location.entity_type == "Note":
-            self.focus_note()
-        
-        else:            
-            self.focus_entity()
+        tracing.begin_navigation(self._current_location.entity_type,
+                                 self._current_location.entity_id)
+
+        with tracing.span("setup_ui", "ui"):
+            if self._current_location.entity_type == "Version":
+                self.focus_version()
+
+            elif self._current_location.entity_type in ["PublishedFile", "TankPublishedFile"]:
+                self.focus_publish()
 
-        # update the details area
-        self._details_model.load_data(self._current_location)
+            elif self._current_location.entity_type == "Note":
+                self.focus_note()
 
-        # update the work area button
-        self.ui.set_context.set_up(
-            self._current_location.entity_type,
-            self._current_location.entity_id
-        )
+            else:            
+                self.focus_entity()
+
+            # count the records for the tabs on the page
+            self._request_tab_counts()
+
+            # update the details area
+            self._details_model.load_data(self._current_location)
+
+            # update the work area button
+            self.ui.set_context.set_up(
+                self._current_location.entity_type,
+                self._current_location.entity_id
+            )
         
 
     def focus_entity(self):
@@ -544,8 +628,11 @@ class AppDialog(QtGui.QWidget):
         # store setting
         self._settings_manager.store("latest_publishes_only", checked)
         
-        # refresh the publishes tab
-        self._load_entity_tab_data(self.ui.entity_tab_widget.currentIndex())
+        # the latest publishes are filtered on the client,
+        # so there is no need to reload the publishes tab
+        model = self._detail_tabs[(self.ENTITY_PAGE_IDX, self.ENTITY_TAB_PUBLISHES)]["model"]
+        if model:
+            model.set_show_latest_only(checked)
 
     def _on_pending_versions_toggled(self, checked):
         """
@@ -556,8 +643,11 @@ class AppDialog(QtGui.QWidget):
         # store setting
         self._settings_manager.store("pending_versions_only", checked)
         
-        # refresh the versions tab
-        self._load_entity_tab_data(self.ui.entity_tab_widget.currentIndex())
+        # filter the versions already loaded if possible,
+        # otherwise refresh the versions tab
+        model = self._detail_tabs[(self.ENTITY_PAGE_IDX, self.ENTITY_TAB_VERSIONS)]["model"]
+        if model is None or not model.set_show_pending_only(checked):
+            self._load_entity_tab_data(self.ui.entity_tab_widget.currentIndex())
 
     def _load_entity_tab_data(self, index):
         """
@@ -572,27 +662,27 @@ class AppDialog(QtGui.QWidget):
             self.ui.entity_activity_stream.load_data(self._current_location.entity_dict)
 
         elif index == self.ENTITY_TAB_NOTES:
-            self._detail_tabs[(self.ENTITY_PAGE_IDX, index)]["model"].load_data(self._current_location)
+            self._get_tab_model((self.ENTITY_PAGE_IDX, index)).load_data(self._current_location)
             
         elif index == self.ENTITY_TAB_VERSIONS:
             show_pending_only = self.ui.pending_versions_only.isChecked()
-            self._detail_tabs[(self.ENTITY_PAGE_IDX, index)]["model"].load_data(
+            self._get_tab_model((self.ENTITY_PAGE_IDX, index)).load_data(
                 self._current_location,
                 show_pending_only
             )
         
         elif index == self.ENTITY_TAB_PUBLISHES:
             show_latest_only = self.ui.latest_publishes_only.isChecked()
-            self._detail_tabs[(self.ENTITY_PAGE_IDX, index)]["model"].load_data(
+            self._get_tab_model((self.ENTITY_PAGE_IDX, index)).load_data(
                 self._current_location,
                 show_latest_only
             )
             
         elif index == self.ENTITY_TAB_TASKS:
-            self._detail_tabs[(self.ENTITY_PAGE_IDX, index)]["model"].load_data(self._current_location)
+            self._get_tab_model((self.ENTITY_PAGE_IDX, index)).load_data(self._current_location)
         
         elif index == self.ENTITY_TAB_INFO:
-            self._entity_details_model.load_data(self._current_location)
+            self._get_info_model(self.ENTITY_PAGE_IDX).load_data(self._current_location)
         
         else:
             self._app.log_error("Cannot load data for unknown entity tab index %s." % index)
@@ -610,16 +700,16 @@ class AppDialog(QtGui.QWidget):
             self.ui.version_activity_stream.load_data(self._current_location.entity_dict)
         
         elif index == self.VERSION_TAB_NOTES:
-            self._detail_tabs[(self.VERSION_PAGE_IDX, index)]["model"].load_data(self._current_location)
+            self._get_tab_model((self.VERSION_PAGE_IDX, index)).load_data(self._current_location)
 
         elif index == self.VERSION_TAB_PUBLISHES:        
-            self._detail_tabs[(self.VERSION_PAGE_IDX, index)]["model"].load_data(
+            self._get_tab_model((self.VERSION_PAGE_IDX, index)).load_data(
                 self._current_location,
                 show_latest_only=False
             )
             
         elif index == self.VERSION_TAB_INFO:
-            self._version_details_model.load_data(self._current_location)
+            self._get_info_model(self.VERSION_PAGE_IDX).load_data(self._current_location)
             
         else:
             self._app.log_error("Cannot load data for unknown version tab.")
@@ -634,21 +724,327 @@ class AppDialog(QtGui.QWidget):
             self._current_location.set_tab_index(index)
         
         if index == self.PUBLISH_TAB_HISTORY:
-            self._detail_tabs[(self.PUBLISH_PAGE_IDX, index)]["model"].load_data(self._current_location)
+            self._get_tab_model((self.PUBLISH_PAGE_IDX, index)).load_data(self._current_location)
 
         elif index == self.PUBLISH_TAB_CONTAINS:        
-            self._detail_tabs[(self.PUBLISH_PAGE_IDX, index)]["model"].load_data(self._current_location)
+            self._get_tab_model((self.PUBLISH_PAGE_IDX, index)).load_data(self._current_location)
         
         elif index == self.PUBLISH_TAB_USED_IN:
-            self._detail_tabs[(self.PUBLISH_PAGE_IDX, index)]["model"].load_data(self._current_location)
+            self._get_tab_model((self.PUBLISH_PAGE_IDX, index)).load_data(self._current_location)
         
         elif index == self.PUBLISH_TAB_INFO:
-            self._publish_details_model.load_data(self._current_location)
+            self._get_info_model(self.PUBLISH_PAGE_IDX).load_data(self._current_location)
             
         else:
             self._app.log_error("Cannot load data for unknown publish tab.")
         
 
+    ###################################################################################################
+    # tab construction and teardown
+
+    def _get_tab_model(self, idx):
+        """
+        Returns the listing model for a tab, creating the model,
+        sort proxy, delegate and overlay for the tab if needed.
+
+        :param idx: Tab key in the form (page index, tab index)
+        :returns: Listing model for the tab
+        """
+        tab_dict = self._detail_tabs[idx]
+        tab_dict["last_used"] = time.time()
+
+        if tab_dict["model"]:
+            return tab_dict["model"]
+
+        ModelClass = tab_dict["model_class"]
+        DelegateClass = tab_dict["delegate_class"]
+
+        self._app.log_debug("Creating %r..." % ModelClass)
+
+        # create model
+        tab_dict["model"] = ModelClass(tab_dict["entity_type"],
+                                       tab_dict["view"],
+                                       self._task_manager)
+
+        # create proxy for sorting and filtering
+        tab_dict["sort_proxy"] = ListingProxyModel(self)
+        tab_dict["sort_proxy"].setSourceModel(tab_dict["model"])
+
+        # now use the proxy model to sort the data to ensure
+        # the most recent items appear earlier in the list.
+        # The proxy sorts by the typed sort key set by the model,
+        # e.g. the update time or id, and re-sorts when rows are
+        # added or sort keys change. Tell it to use column 0
+        # (we only have one column in our models) and descending order.
+        tab_dict["sort_proxy"].sort(0, QtCore.Qt.DescendingOrder)
+
+        # set up model
+        tab_dict["view"].setModel(tab_dict["sort_proxy"])
+        # create delegate
+        tab_dict["delegate"] = DelegateClass(tab_dict["view"], self._action_manager)
+        tab_dict["delegate"].change_work_area.connect(self._change_work_area)
+        # hook up delegate renderer with view
+        tab_dict["view"].setItemDelegate(tab_dict["delegate"])
+        # and set up a spinner overlay
+        tab_dict["overlay"] = NotFoundModelOverlay(tab_dict["model"], tab_dict["view"])
+
+        if ModelClass == SgPublishHistoryListingModel:
+            # this class needs special access to the overlay
+            tab_dict["model"].set_overlay(tab_dict["overlay"])
+
+        tab_dict["model"].set_link_resolver(self._link_resolver)
+        tab_dict["model"].set_query_splitter(self._query_splitter)
+        tab_dict["model"].set_query_coalescer(self._query_coalescer)
+        tab_dict["model"].set_inbox_index(self._inbox_index)
+        tab_dict["model"].set_record_store(self._record_store)
+
+        return tab_dict["model"]
+
+    def _destroy_tab(self, idx):
+        """
+        Tears down the model, sort proxy, delegate and overlay for a tab.
+        They will be recreated the next time the tab is displayed.
+
+        :param idx: Tab key in the form (page index, tab index)
+        """
+        tab_dict = self._detail_tabs[idx]
+        if tab_dict["model"] is None:
+            return
+
+        self._app.log_debug("Destroying %r..." % tab_dict["model"])
+
+        tab_dict["view"].setModel(None)
+        tab_dict["view"].setItemDelegate(None)
+
+        tab_dict["overlay"].hide()
+        tab_dict["overlay"].deleteLater()
+        tab_dict["delegate"].deleteLater()
+        tab_dict["sort_proxy"].deleteLater()
+        tab_dict["model"].destroy()
+        tab_dict["model"].deleteLater()
+
+        tab_dict["model"] = None
+        tab_dict["sort_proxy"] = None
+        tab_dict["delegate"] = None
+        tab_dict["overlay"] = None
+
+    def _get_info_model(self, page_idx):
+        """
+        Returns the all fields model for the info tab of a page,
+        creating it if needed.
+
+        :param page_idx: Page index of the info tab
+        :returns: :class:`SgAllFieldsModel` instance
+        """
+        tab_dict = self._info_tabs[page_idx]
+        tab_dict["last_used"] = time.time()
+
+        if tab_dict["model"]:
+            return tab_dict["model"]
+
+        tab_dict["model"] = SgAllFieldsModel(tab_dict["widget"], self._task_manager)
+        tab_dict["model"].set_record_store(self._record_store)
+        tab_dict["model"].data_updated.connect(tab_dict["widget"].set_data)
+        tab_dict["overlay"] = ShotgunModelOverlayWidget(tab_dict["model"], tab_dict["widget"])
+
+        return tab_dict["model"]
+
+    def _destroy_info_tab(self, page_idx):
+        """
+        Tears down the all fields model for the info tab of a page.
+
+        :param page_idx: Page index of the info tab
+        """
+        tab_dict = self._info_tabs[page_idx]
+        if tab_dict["model"] is None:
+            return
+
+        tab_dict["overlay"].hide()
+        tab_dict["overlay"].deleteLater()
+        tab_dict["model"].destroy()
+        tab_dict["model"].deleteLater()
+        tab_dict["widget"].clear()
+
+        tab_dict["model"] = None
+        tab_dict["overlay"] = None
+
+    def _get_current_tab(self):
+        """
+        Returns the tab currently being displayed.
+
+        :returns: Tuple with (page index, tab index) or None
+                  if the current page doesn't have any tabs.
+        """
+        page_idx = self.ui.page_stack.currentIndex()
+
+        tab_widgets = {
+            self.ENTITY_PAGE_IDX: self.ui.entity_tab_widget,
+            self.VERSION_PAGE_IDX: self.ui.version_tab_widget,
+            self.PUBLISH_PAGE_IDX: self.ui.publish_tab_widget,
+        }
+
+        if page_idx not in tab_widgets:
+            return None
+
+        return (page_idx, tab_widgets[page_idx].currentIndex())
+
+    def _destroy_idle_tabs(self):
+        """
+        Tears down all tabs which haven't been displayed
+        for TAB_IDLE_TIMEOUT_SECONDS.
+        """
+        current_tab = self._get_current_tab()
+        expiry_time = time.time() - TAB_IDLE_TIMEOUT_SECONDS
+
+        for (idx, tab_dict) in self._detail_tabs.iteritems():
+            if tab_dict["model"] and idx != current_tab and tab_dict["last_used"] < expiry_time:
+                self._destroy_tab(idx)
+
+        for (page_idx, tab_dict) in self._info_tabs.iteritems():
+            if tab_dict["model"] and \
+               (page_idx, tab_dict["tab_index"]) != current_tab and \
+               tab_dict["last_used"] < expiry_time:
+                self._destroy_info_tab(page_idx)
+
+    ###################################################################################################
+    # memory accounting
+
+    def _get_tab_memory_usage(self):
+        """
+        Estimates the memory held by the models of all tabs that have been created.
+
+        :returns: List of dictionaries with keys name, count, bytes, tab (the
+                  (page index, tab index) tuple), last_used and destroy, a
+                  callable tearing down the tab.
+        """
+        page_names = {self.ENTITY_PAGE_IDX: "entity",
+                      self.VERSION_PAGE_IDX: "version",
+                      self.PUBLISH_PAGE_IDX: "publish"}
+
+        tabs = []
+        for (idx, tab_dict) in self._detail_tabs.iteritems():
+            if tab_dict["model"]:
+                usage = memory_stats.get_model_usage(tab_dict["model"])
+                tabs.append({"name": "%s page: %s tab" % (page_names[idx[0]], tab_dict["entity_type"]),
+                             "count": usage["items"],
+                             "bytes": usage["data_bytes"] + usage["pixmap_bytes"],
+                             "tab": idx,
+                             "last_used": tab_dict["last_used"],
+                             "destroy": lambda idx=idx: self._destroy_tab(idx)})
+
+        for (page_idx, tab_dict) in self._info_tabs.iteritems():
+            if tab_dict["model"]:
+                usage = memory_stats.get_model_usage(tab_dict["model"])
+                tabs.append({"name": "%s page: info tab" % page_names[page_idx],
+                             "count": usage["items"],
+                             "bytes": usage["data_bytes"] + usage["pixmap_bytes"],
+                             "tab": (page_idx, tab_dict["tab_index"]),
+                             "last_used": tab_dict["last_used"],
+                             "destroy": lambda page_idx=page_idx: self._destroy_info_tab(page_idx)})
+
+        return tabs
+
+    def _get_history_memory_usage(self):
+        """
+        Estimates the memory held by the data and thumbnails that history
+        entries carry for display, other than the current location.
+
+        :returns: List of dictionaries with keys name, count, bytes, tab
+                  (always None) and destroy, a callable releasing the data.
+        """
+        entries = []
+        for (idx, sg_location) in enumerate(self._history_items):
+            if sg_location is self._current_location:
+                continue
+            usage = memory_stats.get_location_usage(sg_location)
+            num_bytes = usage["known_data_bytes"] + usage["known_pixmap_bytes"]
+            if num_bytes:
+                entries.append({"name": "history entry %d: %s %s" % (idx,
+                                                                     sg_location.entity_type,
+                                                                     sg_location.entity_id),
+                                "count": 1,
+                                "bytes": num_bytes,
+                                "tab": None,
+                                "destroy": sg_location.clear_known_data})
+        return entries
+
+    def get_memory_usage(self):
+        """
+        Estimates the memory held by the panel's models, pixmaps,
+        actions and history.
+
+        :returns: List of dictionaries with keys name, count and bytes
+        """
+        entries = []
+
+        for (name, model) in [("details", self._details_model),
+                              ("current user", self._current_user_model)]:
+            usage = memory_stats.get_model_usage(model)
+            entries.append({"name": "%s model" % name,
+                            "count": usage["items"],
+                            "bytes": usage["data_bytes"] + usage["pixmap_bytes"]})
+
+        for tab in sorted(self._get_tab_memory_usage(), key=lambda x: x["name"]):
+            entries.append({"name": tab["name"], "count": tab["count"], "bytes": tab["bytes"]})
+
+        pixmaps = [self._details_model.get_pixmap(), self._current_user_model.get_pixmap()]
+        entries.append({"name": "header pixmaps",
+                        "count": len([x for x in pixmaps if x]),
+                        "bytes": sum(memory_stats.estimate_pixmap_bytes(x) for x in pixmaps)})
+
+        entries.append({"name": "record store",
+                        "count": len(self._record_store),
+                        "bytes": memory_stats.estimate_value_bytes(self._record_store.records)})
+
+        entries.append({"name": "actions",
+                        "count": len(self._menu.actions()),
+                        "bytes": 0})
+
+        # each history entry holds a formatter with the hook data for its
+        # type, and possibly the data and thumbnail it was navigated with
+        usages = [memory_stats.get_location_usage(x) for x in self._history_items]
+        entries.append({"name": "history entries",
+                        "count": len(self._history_items),
+                        "bytes": sum(x["formatter_bytes"] for x in usages)})
+        entries.append({"name": "history known data",
+                        "count": len([x for x in self._history_items if x.known_sg_data]),
+                        "bytes": sum(x["known_data_bytes"] for x in usages)})
+        entries.append({"name": "history known pixmaps",
+                        "count": len([x for x in self._history_items if x.known_pixmap]),
+                        "bytes": sum(x["known_pixmap_bytes"] for x in usages)})
+
+        return entries
+
+    def _check_memory_usage(self):
+        """
+        Logs a summary of the memory usage and, if the tab models and
+        history entries exceed the memory budget, releases the data carried
+        by the oldest history entries and then tears down the least recently
+        used tabs.
+        """
+        self._app.log_debug("Shotgun Panel memory usage:\n%s" %
+                            memory_stats.format_report(self.get_memory_usage()))
+
+        budget = self._app.get_setting("memory_budget") * 1024 * 1024
+        tabs = self._get_tab_memory_usage()
+        history = self._get_history_memory_usage()
+        total = sum(x["bytes"] for x in tabs + history)
+        current_tab = self._get_current_tab()
+
+        # the data carried by history entries only speeds up their display,
+        # so it is released before any tab is torn down, oldest first
+        for entry in history + sorted(tabs, key=lambda x: x["last_used"]):
+            if total <= budget:
+                break
+            if entry["tab"] is not None and entry["tab"] == current_tab:
+                continue
+            self._app.log_debug("Tabs and history use %s, exceeding the memory budget. Releasing %s." % (
+                memory_stats.format_bytes(total),
+                entry["name"])
+            )
+            entry["destroy"]()
+            total -= entry["bytes"]
+
     ###################################################################################################
     # top detail area callbacks
 
@@ -685,7 +1081,8 @@ class AppDialog(QtGui.QWidget):
         
         # populate the text with data
         if sg_data:
-            (header, body) = formatter.format_entity_details(sg_data) 
+            (header, body) = formatter.format_entity_details(sg_data,
+                                                             not self._details_model.has_details())
             self.ui.details_text_header.setText(header)
             self.ui.details_text_header.setToolTip(header)
             
@@ -715,6 +1112,152 @@ class AppDialog(QtGui.QWidget):
         for a in self._actions:
             self._menu.addAction(a)
             
+    ###################################################################################################
+    # tab counts
+
+    def _get_counted_tab_widget(self, page_idx):
+        """
+        Returns the tab widget for a page with tabs that display counts.
+
+        :param page_idx: Page index
+        :returns: QTabWidget, or None if the page doesn't display counts
+        """
+        if page_idx == self.ENTITY_PAGE_IDX:
+            return self.ui.entity_tab_widget
+        elif page_idx == self.VERSION_PAGE_IDX:
+            return self.ui.version_tab_widget
+        return None
+
+    def _request_tab_counts(self):
+        """
+        Requests the record counts for the listing tabs
+        on the page for the current location.
+        """
+        if not self._tab_counter:
+            return
+
+        page_idx = self.ui.page_stack.currentIndex()
+        tab_widget = self._get_counted_tab_widget(page_idx)
+        if tab_widget is None:
+            return
+
+        location_key = (self._current_location.entity_type, self._current_location.entity_id)
+        tabs = []
+        for ((tab_page_idx, tab_idx), tab_dict) in sorted(self._detail_tabs.iteritems()):
+            if tab_page_idx != page_idx or not tab_widget.isTabEnabled(tab_idx):
+                continue
+
+            # remove the counts for the previous location
+            caption = tab_widget.tabText(tab_idx)
+            (base_caption, displayed_caption) = self._tab_captions.get((page_idx, tab_idx), (None, None))
+            if caption == displayed_caption:
+                caption = base_caption
+                tab_widget.setTabText(tab_idx, caption)
+            self._tab_captions[(page_idx, tab_idx)] = (caption, caption)
+
+            tabs.append(((location_key, page_idx, tab_idx), tab_dict["entity_type"]))
+
+        self._tab_counter.request_counts(self._current_location, tabs)
+
+    def _on_tab_counts_available(self, key, counts):
+        """
+        Callback called when the record counts for a tab are available.
+
+        :param key: Tuple with (location key, page index, tab index)
+        :param counts: Dictionary with keys count and unread
+        """
+        (location_key, page_idx, tab_idx) = key
+        if location_key != (self._current_location.entity_type, self._current_location.entity_id):
+            # the user has navigated elsewhere
+            return
+
+        (base_caption, _) = self._tab_captions[(page_idx, tab_idx)]
+        if counts["unread"]:
+            caption = "%s (%d, %d unread)" % (base_caption, counts["count"], counts["unread"])
+        else:
+            caption = "%s (%d)" % (base_caption, counts["count"])
+
+        self._get_counted_tab_widget(page_idx).setTabText(tab_idx, caption)
+        self._tab_captions[(page_idx, tab_idx)] = (base_caption, caption)
+
+    ###################################################################################################
+    # record updates
+
+    def _on_records_modified(self, sg_records):
+        """
+        Callback called when an action has modified a set of shotgun records.
+        
+        Rather than reloading the whole UI, the affected items are updated
+        in place and then only those records are re-read from Shotgun.
+        
+        :param sg_records: List of shotgun dictionaries, each with type and id 
+               keys and the new values for any fields changed by the action.
+        """
+        sg_records = [utils.sanitize_sg_data(x) for x in sg_records]
+        
+        # first reflect the values reported by the action straight away
+        self._record_store.write(sg_records, time.time(), notify=False)
+        found_records = self._update_records(sg_records)
+        
+        # now re-read the modified records. This picks up any other changes
+        # that the action didn't report, for example updated_at.
+        for (entity_type, (entity_ids, fields)) in found_records.iteritems():
+            self._record_updater.refresh_records(entity_type, 
+                                                 sorted(entity_ids), 
+                                                 sorted(fields))
+
+        # the expensive fields of the info tabs are re-read by their own queries
+        for tab_dict in self._info_tabs.values():
+            if tab_dict["model"]:
+                tab_dict["model"].refresh_chunks(sg_records)
+
+    def _on_update_requested(self, update_requests, sg_data):
+        """
+        Callback called when an action wants the panel to update a set of
+        shotgun records. The update is carried out in the background and 
+        the new values are reflected in the UI straight away.
+        
+        :param update_requests: List of update request dictionaries
+        :param sg_data: Shotgun data for the item that the action was run on
+        """
+        self._record_updater.update_records(update_requests, sg_data)
+
+    def _on_update_failed(self, sg_records, msg):
+        """
+        Callback called when a background update failed.
+        Restores the original values in the UI.
+        
+        :param sg_records: List of shotgun dictionaries with the original values
+        :param msg: Error message
+        """
+        self._update_records(sg_records)
+        QtGui.QMessageBox.critical(None, "Action Error", "Error: %s" % msg)
+
+    def _update_records(self, sg_records):
+        """
+        Updates all items in the UI that represent any of the given 
+        shotgun records in place.
+        
+        :param sg_records: List of sanitized shotgun dictionaries, each 
+               with type and id keys and any number of field values.
+        :returns: Dictionary keyed by entity type, where each value is a 
+                  tuple with a set of the entity ids that were found in the 
+                  UI and a set of the fields retrieved for those records by
+                  the main queries of the models displaying them.
+        """
+        models = [self._details_model]
+        models += [tab_dict["model"] for tab_dict in self._detail_tabs.values() if tab_dict["model"]]
+        models += [tab_dict["model"] for tab_dict in self._info_tabs.values() if tab_dict["model"]]
+        
+        found_records = {}
+        for model in models:
+            for entity in model.update_records(sg_records):
+                (entity_ids, fields) = found_records.setdefault(entity["type"], (set(), set()))
+                entity_ids.add(entity["id"])
+                fields.update(model.query_fields)
+                
+        return found_records
+
     ###################################################################################################
     # UI callbacks
     def _on_entity_doubleclicked(self, model_index):
@@ -722,9 +1265,37 @@ class AppDialog(QtGui.QWidget):
         Someone double clicked an entity
         """
         sg_item = shotgun_model.get_sg_data(model_index)
-        sg_location = ShotgunLocation(sg_item["type"], sg_item["id"])
+        # carry the data for the item across so that the
+        # details can be displayed without waiting for shotgun
+        icon = model_index.data(QtCore.Qt.DecorationRole)
+        sg_location = ShotgunLocation(sg_item["type"],
+                                      sg_item["id"],
+                                      sg_item,
+                                      utils.get_icon_pixmap(icon) if isinstance(icon, QtGui.QIcon) else None)
         self._navigate_to(sg_location)
 
+    def _get_known_location(self, entity_type, entity_id):
+        """
+        Creates a location for the given entity, carrying any data
+        for it that is already loaded in the listings or the record store.
+
+        :param entity_type: Shotgun entity type
+        :param entity_id: Shotgun entity id
+        :returns: :class:`ShotgunLocation` instance
+        """
+        for tab_dict in self._detail_tabs.values():
+            if tab_dict["model"]:
+                item = tab_dict["model"].get_entity_item(entity_type, entity_id)
+                if item:
+                    return ShotgunLocation(entity_type,
+                                           entity_id,
+                                           item.get_sg_data(),
+                                           utils.get_icon_pixmap(item.icon()))
+        # fall back on any data in the record store
+        return ShotgunLocation(entity_type,
+                               entity_id,
+                               self._record_store.get_record(entity_type, entity_id))
+
     def navigate_to_entity(self, entity_type, entity_id):
         """
         Navigate to a particular entity.
@@ -734,7 +1305,7 @@ class AppDialog(QtGui.QWidget):
         :param entity_type: Shotgun entity type
         :param entity_id: Shotgun entity id
         """
-        sg_location = ShotgunLocation(entity_type, entity_id)
+        sg_location = self._get_known_location(entity_type, entity_id)
         if sg_location.sg_formatter.should_open_in_shotgun_web:
             sg_url = sg_location.get_external_url()
             QtGui.QDesktopServices.openUrl(QtCore.QUrl(sg_url))            
@@ -800,6 +1371,11 @@ class AppDialog(QtGui.QWidget):
         # add new record
         self._history_index += 1
         self._history_items.append(shotgun_location)
+        # and drop the oldest records if the history is too long
+        num_dropped = len(self._history_items) - self._app.get_setting("max_history_items")
+        if num_dropped > 0:
+            self._history_items = self._history_items[num_dropped:]
+            self._history_index -= num_dropped
         self._compute_history_button_visibility()
         
         # set the current location
@@ -0,0 +1,491 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import json
+import time
+import errno
+import hashlib
+import datetime
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+from . import utils
+
+shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
+
+
+class InboxIndex(QtCore.QObject):
+    """
+    Local index of the notes and tasks listed for the current user.
+
+    For each listing query, the index holds the id, updated_at and, for
+    notes, the read state of the most recently updated matching records.
+    It is persisted in the app's cache location, so that the user's notes
+    and tasks can be listed from local state, without running their
+    heavyweight queries.
+
+    An index is seeded once by running its query. After that, it is
+    advanced with watermark queries, which only return the records
+    updated since the last update of the index. Records that no longer
+    match the query, for example tasks which have been set to final, are
+    found by checking which indexed records have been updated since.
+    Read state changes do not update a note's updated_at. These are
+    picked up from the record store instead, and with a full re-seed
+    once the index is older than RESEED_INTERVAL.
+
+    Only the MAX_RECORDS most recently updated records are indexed, which
+    bounds both the index and the id filters of its update queries. Once
+    records have been left out, the index no longer knows the number of
+    matching records and reports no counts.
+
+    The listing models then only re-read their records if the index
+    reports that their updated_at values have changed.
+
+    :signal index_updated(str): Emitted when an index has been seeded or
+        updated, with the key returned by get_key().
+    """
+
+    # entity types indexed for the current user
+    ENTITY_TYPES = ["Note", "Task"]
+
+    # indices are seeded again after this many seconds
+    RESEED_INTERVAL = 24 * 60 * 60
+
+    # indices are not updated more often than this, in seconds
+    MIN_UPDATE_INTERVAL = 10
+
+    # watermark queries overlap with the previous update by this many
+    # seconds, to pick up records committed while it was running
+    WATERMARK_OVERLAP = 60
+
+    # field holding the read state of notes
+    READ_STATE_FIELD = "read_by_current_user"
+
+    # maximum number of records per index. The listings display up to
+    # 50 records, the margin keeps records which move back into a listing
+    # when more recently updated ones no longer match its query.
+    MAX_RECORDS = 200
+
+    # version of the files written to disk
+    FORMAT_VERSION = 2
+
+    index_updated = QtCore.Signal(str)
+
+    def __init__(self, query_coalescer, record_store, parent):
+        """
+        Constructor
+
+        :param query_coalescer: :class:`QueryCoalescer` to run finds with
+        :param record_store: :class:`RecordStore` to pick up read states from
+        :param parent: QT parent object
+        """
+        QtCore.QObject.__init__(self, parent)
+
+        # indices keyed by key. Each index is a dictionary with
+        # the entity type, filters, records keyed by id, the
+        # watermark and the times it was seeded and updated.
+        self._indices = {}
+
+        # index keys and request type, keyed by request uid
+        self._requests = {}
+
+        self._app = sgtk.platform.current_bundle()
+        self._record_store = record_store
+        self._record_store.records_changed.connect(self._on_records_changed)
+        self._query_coalescer = query_coalescer
+        self._query_coalescer.work_completed.connect(self.__on_worker_signal)
+        self._query_coalescer.work_failure.connect(self.__on_worker_failure)
+
+    def covers(self, sg_location, entity_type):
+        """
+        Checks if the records of a given type listed for
+        a location are indexed.
+
+        :param sg_location: Location the records are listed for
+        :param entity_type: Shotgun entity type of the listed records
+        :returns: True if the records are indexed
+        """
+        user = self._app.context.user or {}
+        return (
+            entity_type in self.ENTITY_TYPES and
+            sg_location.entity_type == user.get("type") and
+            sg_location.entity_id == user.get("id")
+        )
+
+    def get_key(self, entity_type, filters):
+        """
+        Returns the key identifying the index of a query.
+
+        :param entity_type: Shotgun entity type
+        :param filters: Std shotgun filters
+        :returns: Index key
+        """
+        signature = utils.get_query_signature(entity_type, filters, [])
+        return hashlib.md5(signature.encode("utf-8")).hexdigest()
+
+    def get_records(self, entity_type, filters, limit=None):
+        """
+        Returns the indexed records for a query, most recently updated first.
+
+        :param entity_type: Shotgun entity type
+        :param filters: Std shotgun filters
+        :param limit: Maximum number of records, or None
+        :returns: List of shotgun dictionaries with type, id and updated_at,
+                  or None if the index hasn't been seeded.
+        """
+        index = self._get_index(entity_type, filters)
+        if index["seeded_at"] is None:
+            return None
+
+        records = sorted(index["records"].iteritems(),
+                         key=lambda x: (x[1]["updated_at"], x[0]),
+                         reverse=True)
+        if limit:
+            records = records[:limit]
+        return [
+            {"type": entity_type, "id": entity_id, "updated_at": record["updated_at"]}
+            for (entity_id, record) in records
+        ]
+
+    def get_counts(self, entity_type, filters):
+        """
+        Returns the number of indexed records for a query.
+
+        :param entity_type: Shotgun entity type
+        :param filters: Std shotgun filters
+        :returns: Dictionary with keys count and unread, on the form
+                  used by the :class:`TabCounter`, or None if the index
+                  hasn't been seeded. unread is None for tasks.
+        """
+        index = self._get_index(entity_type, filters)
+        if index["seeded_at"] is None or not index["complete"]:
+            return None
+
+        unread = None
+        if entity_type == "Note":
+            unread = len([x for x in index["records"].itervalues() if x["read_state"] == "unread"])
+        return {"count": len(index["records"]), "unread": unread}
+
+    def update(self, entity_type, filters):
+        """
+        Brings the index for a query up to date in the background. The
+        index is seeded if needed, otherwise only the records updated
+        since the last update are read. An index_updated signal is
+        emitted once done.
+
+        :param entity_type: Shotgun entity type
+        :param filters: Std shotgun filters
+        """
+        index = self._get_index(entity_type, filters)
+        if self._is_updating(index["key"]):
+            return
+
+        now = time.time()
+        fields = self._get_fields(entity_type)
+        if index["seeded_at"] is None or now - index["seeded_at"] > self.RESEED_INTERVAL:
+            self._app.log_debug("Seeding %s inbox index." % entity_type)
+            uid = self._query_coalescer.execute_find(entity_type,
+                                                     index["filters"],
+                                                     fields,
+                                                     [{"field_name": "updated_at", "direction": "desc"}],
+                                                     self.MAX_RECORDS)
+            self._requests[uid] = (index["key"], "seed", now)
+            return
+
+        if now - index["updated_at"] < self.MIN_UPDATE_INTERVAL:
+            return
+
+        watermark = datetime.datetime.fromtimestamp(index["watermark"] - self.WATERMARK_OVERLAP)
+        uid = self._query_coalescer.execute_find(
+            entity_type,
+            index["filters"] + [["updated_at", "greater_than", watermark]],
+            fields
+        )
+        self._requests[uid] = (index["key"], "delta", now)
+
+        if index["records"]:
+            # find the indexed records that were updated, so that
+            # the ones which no longer match the query can be removed
+            uid = self._query_coalescer.execute_find(
+                entity_type,
+                [["id", "in", sorted(index["records"])], ["updated_at", "greater_than", watermark]],
+                ["id"]
+            )
+            self._requests[uid] = (index["key"], "updated", now)
+
+    def write_records(self, entity_type, filters, sg_data_list, entity_ids):
+        """
+        Updates the index for a query with records read by a listing.
+
+        :param entity_type: Shotgun entity type
+        :param filters: Std shotgun filters
+        :param sg_data_list: List of shotgun dictionaries read by id
+        :param entity_ids: List of ids which were read. Ids which are
+                           not part of the data no longer exist and
+                           are removed from the index.
+        """
+        index = self._get_index(entity_type, filters)
+        if index["seeded_at"] is None:
+            return
+
+        self._add_records(index, sg_data_list)
+        found_ids = set(x["id"] for x in sg_data_list)
+        for entity_id in entity_ids:
+            if entity_id not in found_ids:
+                index["records"].pop(entity_id, None)
+        self._evict_records(index)
+        self._save_index(index)
+
+    def _is_updating(self, key):
+        """
+        Checks if an index is being seeded or updated.
+
+        :param key: Index key
+        """
+        return key in [x[0] for x in self._requests.itervalues()]
+
+    def _get_fields(self, entity_type):
+        """
+        Returns the fields held by the index for an entity type.
+
+        :param entity_type: Shotgun entity type
+        :returns: List of shotgun fields
+        """
+        if entity_type == "Note":
+            return ["updated_at", self.READ_STATE_FIELD]
+        return ["updated_at"]
+
+    def _get_index(self, entity_type, filters):
+        """
+        Returns the index for a query, loading it from disk if needed.
+
+        :param entity_type: Shotgun entity type
+        :param filters: Std shotgun filters
+        :returns: Index dictionary
+        """
+        key = self.get_key(entity_type, filters)
+        if key not in self._indices:
+            index = {
+                "key": key,
+                "entity_type": entity_type,
+                "filters": utils.canonical_filters(filters),
+                "records": {},
+                "complete": False,
+                "watermark": None,
+                "seeded_at": None,
+                "updated_at": None
+            }
+            index.update(self._load_index(key))
+            self._indices[key] = index
+        return self._indices[key]
+
+    def _get_path(self, key):
+        """
+        Returns the path of the file holding an index.
+
+        :param key: Index key
+        :returns: Path on disk
+        """
+        return os.path.join(self._app.cache_location, "inbox_index", "%s.json" % key)
+
+    def _load_index(self, key):
+        """
+        Reads an index from disk.
+
+        :param key: Index key
+        :returns: Dictionary with the records, complete, watermark, seeded_at
+                  and updated_at of the index, or an empty dictionary if
+                  there is no valid index on disk.
+        """
+        path = self._get_path(key)
+        if not os.path.exists(path):
+            return {}
+
+        try:
+            with open(path, "r") as fh:
+                data = json.load(fh)
+        except Exception, e:
+            self._app.log_warning("Could not read inbox index %s: %s" % (path, e))
+            return {}
+
+        if data.get("version") != self.FORMAT_VERSION:
+            return {}
+
+        return {
+            "records": dict((int(x), y) for (x, y) in data["records"].iteritems()),
+            "complete": data["complete"],
+            "watermark": data["watermark"],
+            "seeded_at": data["seeded_at"],
+            "updated_at": data["updated_at"]
+        }
+
+    def _save_index(self, index):
+        """
+        Writes an index to disk.
+
+        :param index: Index dictionary
+        """
+        path = self._get_path(index["key"])
+        try:
+            try:
+                os.makedirs(os.path.dirname(path))
+            except OSError, e:
+                if e.errno != errno.EEXIST:
+                    raise
+            with open(path, "w") as fh:
+                json.dump({
+                    "version": self.FORMAT_VERSION,
+                    "records": index["records"],
+                    "complete": index["complete"],
+                    "watermark": index["watermark"],
+                    "seeded_at": index["seeded_at"],
+                    "updated_at": index["updated_at"]
+                }, fh)
+        except Exception, e:
+            self._app.log_warning("Could not write inbox index %s: %s" % (path, e))
+
+    def _add_records(self, index, sg_data_list):
+        """
+        Adds or updates records in an index and advances its watermark.
+
+        :param index: Index dictionary
+        :param sg_data_list: List of shotgun dictionaries
+        """
+        for sg_data in sg_data_list:
+            sg_data = utils.sanitize_sg_data(sg_data)
+            record = index["records"].setdefault(sg_data["id"], {"read_state": None})
+            record["updated_at"] = sg_data.get("updated_at")
+            if self.READ_STATE_FIELD in sg_data:
+                record["read_state"] = sg_data[self.READ_STATE_FIELD]
+            if sg_data.get("updated_at"):
+                index["watermark"] = max(index["watermark"], sg_data["updated_at"])
+
+    def _evict_records(self, index):
+        """
+        Removes all but the MAX_RECORDS most recently updated records
+        from an index.
+
+        :param index: Index dictionary
+        """
+        if len(index["records"]) <= self.MAX_RECORDS:
+            return
+
+        records = sorted(index["records"].iteritems(),
+                         key=lambda x: (x[1]["updated_at"], x[0]),
+                         reverse=True)
+        for (entity_id, _) in records[self.MAX_RECORDS:]:
+            del index["records"][entity_id]
+        # the number of matching records is no longer known
+        index["complete"] = False
+
+    def _on_records_changed(self, sg_records):
+        """
+        Called when records in the record store have changed.
+        Updates the read state of any indexed notes.
+
+        :param sg_records: List of shotgun dictionaries with type, id
+                           and the changed fields.
+        """
+        for index in self._indices.itervalues():
+            if index["entity_type"] != "Note":
+                continue
+            changed = False
+            for sg_record in sg_records:
+                if sg_record["type"] != "Note" or self.READ_STATE_FIELD not in sg_record:
+                    continue
+                record = index["records"].get(sg_record["id"])
+                if record and record["read_state"] != sg_record[self.READ_STATE_FIELD]:
+                    record["read_state"] = sg_record[self.READ_STATE_FIELD]
+                    changed = True
+            if changed:
+                self._save_index(index)
+
+    def __on_worker_failure(self, uid, msg):
+        """
+        Asynchronous callback - the worker thread errored.
+
+        :param uid: Unique id for request that failed
+        :param msg: Error message
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        msg = shotgun_model.sanitize_qt(msg)
+        if uid not in self._requests:
+            return
+        (key, _, _) = self._requests.pop(uid)
+        # records are not removed based on a partial
+        # update. The update is retried next time.
+        self._indices[key]["update_failed"] = True
+        if not self._is_updating(key):
+            self._finish_update(key)
+        self._app.log_warning("Could not update %s inbox index: %s" % (
+            self._indices[key]["entity_type"], msg)
+        )
+
+    def __on_worker_signal(self, uid, request_type, data):
+        """
+        Signaled whenever the worker completes something.
+
+        :param uid: Unique id for request
+        :param request_type: String identifying the request class
+        :param data: the data that was returned
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        data = shotgun_model.sanitize_qt(data)
+        if uid not in self._requests:
+            return
+
+        (key, index_request_type, timestamp) = self._requests.pop(uid)
+        index = self._indices[key]
+
+        if index_request_type == "seed":
+            index["records"] = {}
+            index["watermark"] = None
+            self._add_records(index, data["sg"])
+            # the seed query is capped at MAX_RECORDS
+            index["complete"] = len(data["sg"]) < self.MAX_RECORDS
+            index["seeded_at"] = timestamp
+            # the watermark falls back on the time of the query
+            # if none of the records have an updated_at value
+            index["watermark"] = index["watermark"] or timestamp
+
+        elif index_request_type == "delta":
+            self._add_records(index, data["sg"])
+            index["matching_ids"] = set(x["id"] for x in data["sg"])
+
+        else:
+            index["updated_ids"] = set(x["id"] for x in data["sg"])
+
+        if self._is_updating(key):
+            # wait for the other part of the update
+            return
+
+        index["updated_at"] = timestamp
+        self._finish_update(key)
+        self.index_updated.emit(key)
+
+    def _finish_update(self, key):
+        """
+        Completes the update of an index once all its queries have
+        returned, and writes it to disk.
+
+        :param key: Index key
+        """
+        index = self._indices[key]
+        updated_ids = index.pop("updated_ids", set())
+        matching_ids = index.pop("matching_ids", set())
+        if not index.pop("update_failed", False):
+            # indexed records which have been updated since the watermark
+            # but weren't returned by the delta query no longer match
+            for entity_id in updated_ids - matching_ids:
+                index["records"].pop(entity_id, None)
+        self._evict_records(index)
+        self._save_index(index)
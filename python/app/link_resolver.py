@@ -0,0 +1,242 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import time
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+from . import utils
+
+shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
+
+
+def split_deep_link(field_name):
+    """
+    Splits a deep link field into its parts.
+
+    :param field_name: Shotgun field, e.g. 'sg_sequence.Sequence.code'
+    :returns: Tuple with (link_field, linked_type, linked_field), e.g.
+              ('sg_sequence', 'Sequence', 'code'), or None if the field
+              is not a deep link.
+    """
+    tokens = field_name.split(".", 2)
+    if len(tokens) != 3:
+        return None
+    return tuple(tokens)
+
+
+def get_primary_fields(fields, server_fields=None):
+    """
+    Returns the fields to request in a primary query when deep links are
+    resolved by the LinkResolver: deep links are replaced by their link field.
+
+    :param fields: List of shotgun fields
+    :param server_fields: List of deep links which should still be resolved
+                          by the server, e.g. thumbnail fields, which need
+                          to be part of the data when items are created.
+    :returns: List of shotgun fields without deep links
+    """
+    primary_fields = set()
+    for field_name in fields:
+        deep_link = split_deep_link(field_name)
+        if deep_link and field_name not in (server_fields or []):
+            primary_fields.add(deep_link[0])
+        else:
+            primary_fields.add(field_name)
+    return utils.canonical_fields(primary_fields)
+
+
+class LinkResolver(QtCore.QObject):
+    """
+    Resolves deep link fields, e.g. sg_sequence.Sequence.code, on the
+    client rather than as part of the listing queries.
+
+    The listing queries only retrieve the link field (sg_sequence). The
+    fields of the linked entities are then read with one batched query
+    per linked entity type and written to the record store which is
+    shared by all models for the rest of the session. Linked entities
+    which appear in many rows or many listings, e.g. sequences, projects
+    and users, are therefore only read once.
+
+    Deep links in the filters returned by the shotgun_fields hook are
+    not affected and are still resolved by the server. So are thumbnail
+    deep links, e.g. user.HumanUser.image, since the models only download
+    thumbnails for values present when their items are created.
+
+    :signal records_resolved(list): Emitted when deep link values have
+        arrived for a set of records. The list contains shotgun data
+        dictionaries with type, id and the resolved deep link fields.
+    """
+
+    records_resolved = QtCore.Signal(list)
+
+    def __init__(self, query_coalescer, record_store, parent):
+        """
+        Constructor
+
+        :param query_coalescer: :class:`QueryCoalescer` to run finds with
+        :param record_store: :class:`RecordStore` holding the linked entities
+        :param parent: QT parent object
+        """
+        QtCore.QObject.__init__(self, parent)
+
+        self._record_store = record_store
+
+        # records waiting for a linked entity, keyed by (type, id).
+        # each value is a list of (record type, record id, deep link field, linked field)
+        self._pending = {}
+
+        # linked entities and fields being read, keyed by request uid.
+        # each value is a tuple with (linked type, linked ids, linked fields, timestamp)
+        self._requests = {}
+
+        self._app = sgtk.platform.current_bundle()
+        self._query_coalescer = query_coalescer
+        self._query_coalescer.work_completed.connect(self.__on_worker_signal)
+        self._query_coalescer.work_failure.connect(self.__on_worker_failure)
+
+    def resolve(self, sg_data_list, fields):
+        """
+        Fills in the deep link fields of a list of records.
+
+        Values already in the record store are filled in straight away. The
+        remaining deep link fields are set to None and the linked entities
+        are read in the background, after which a records_resolved signal
+        is emitted with the values.
+
+        :param sg_data_list: List of shotgun dictionaries, modified in place
+        :param fields: List of fields which may contain deep links
+        :returns: The given list of shotgun dictionaries
+        """
+        deep_links = [(x, split_deep_link(x)) for x in fields if split_deep_link(x)]
+        if not deep_links:
+            return sg_data_list
+
+        # linked fields to read, keyed by linked entity type
+        missing_fields = {}
+        # linked ids to read, keyed by linked entity type
+        missing_ids = {}
+
+        for sg_data in sg_data_list:
+            for (field_name, (link_field, linked_type, linked_field)) in deep_links:
+                sg_data[field_name] = None
+
+                link = sg_data.get(link_field)
+                if not isinstance(link, dict) or link.get("type") != linked_type:
+                    # deep links resolve to None for empty links
+                    # and links to other entity types
+                    continue
+
+                key = (linked_type, link["id"])
+                stored_data = self._record_store.get_record(linked_type, link["id"], [linked_field])
+                if stored_data and linked_field in stored_data:
+                    sg_data[field_name] = stored_data[linked_field]
+                    continue
+
+                self._pending.setdefault(key, []).append(
+                    (sg_data["type"], sg_data["id"], field_name, linked_field)
+                )
+                if not self._is_requested(key, linked_field):
+                    missing_fields.setdefault(linked_type, set()).add(linked_field)
+                    missing_ids.setdefault(linked_type, set()).add(link["id"])
+
+        for (linked_type, linked_ids) in missing_ids.iteritems():
+            linked_fields = utils.canonical_fields(missing_fields[linked_type])
+            timestamp = time.time()
+            uid = self._query_coalescer.execute_find(linked_type,
+                                                     [["id", "in", sorted(linked_ids)]],
+                                                     linked_fields)
+            self._requests[uid] = (linked_type, linked_ids, linked_fields, timestamp)
+
+        return sg_data_list
+
+    def _is_requested(self, key, linked_field):
+        """
+        Checks if a linked entity field is already being read.
+
+        :param key: Linked entity (type, id) tuple
+        :param linked_field: Field on the linked entity
+        """
+        for (linked_type, linked_ids, linked_fields, _) in self._requests.itervalues():
+            if key[0] == linked_type and key[1] in linked_ids and linked_field in linked_fields:
+                return True
+        return False
+
+    def __on_worker_failure(self, uid, msg):
+        """
+        Asynchronous callback - the worker thread errored.
+
+        :param uid: Unique id for request that failed
+        :param msg: Error message
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        msg = shotgun_model.sanitize_qt(msg)
+        if uid in self._requests:
+            (linked_type, linked_ids, _, _) = self._requests.pop(uid)
+            self._app.log_warning("Could not resolve deep links to %s: %s" % (linked_type, msg))
+            # the records keep their None values, but make sure
+            # the entities can be requested again.
+            for linked_id in linked_ids:
+                self._pending.pop((linked_type, linked_id), None)
+
+    def __on_worker_signal(self, uid, request_type, data):
+        """
+        Signaled whenever the worker completes something.
+        This method will dispatch the work to different methods
+        depending on what async task has completed.
+
+        :param uid: Unique id for request
+        :param request_type: String identifying the request class
+        :param data: the data that was returned
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        data = shotgun_model.sanitize_qt(data)
+        if uid not in self._requests:
+            return
+
+        (linked_type, linked_ids, linked_fields, timestamp) = self._requests.pop(uid)
+
+        # entities which could not be found resolve to None
+        linked_records = dict((x, dict((y, None) for y in linked_fields)) for x in linked_ids)
+        for sg_data in data["sg"]:
+            sg_data = utils.sanitize_sg_data(sg_data)
+            linked_records[sg_data["id"]].update((x, sg_data.get(x)) for x in linked_fields)
+        self._record_store.write(
+            [dict(fields, type=linked_type, id=linked_id) for (linked_id, fields) in linked_records.iteritems()],
+            timestamp
+        )
+
+        # records are updated per (type, id), so merge
+        # the values for all the deep links of a record
+        sg_records = {}
+        for linked_id in linked_ids:
+            key = (linked_type, linked_id)
+            # the store may hold fresher values than the ones just read
+            stored_data = self._record_store.get_record(linked_type, linked_id) or linked_records[linked_id]
+
+            still_pending = []
+            for (record_type, record_id, field_name, linked_field) in self._pending.pop(key, []):
+                if linked_field not in stored_data:
+                    # requested by a later query which is still running
+                    still_pending.append((record_type, record_id, field_name, linked_field))
+                    continue
+                sg_record = sg_records.setdefault((record_type, record_id),
+                                                  {"type": record_type, "id": record_id})
+                sg_record[field_name] = stored_data[linked_field]
+            if still_pending:
+                self._pending[key] = still_pending
+
+        self._app.log_debug("Resolved deep links to %d %s entities for %d records." % (
+            len(linked_ids), linked_type, len(sg_records))
+        )
+        if sg_records:
+            self._record_store.write(sg_records.values(), timestamp, notify=False)
+            self.records_resolved.emit(sg_records.values())
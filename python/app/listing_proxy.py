@@ -0,0 +1,87 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from sgtk.platform.qt import QtCore, QtGui
+
+from .model_entity_listing import SgEntityListingModel
+
+
+class ListingProxyModel(QtGui.QSortFilterProxyModel):
+    """
+    Proxy model used by the listing tabs.
+
+    Rows are filtered by the listing model itself, see
+    :meth:`SgEntityListingModel.filter_accepts_item()`. This makes it
+    possible for toggles such as 'latest publishes only' to be applied
+    to the data already loaded, without querying Shotgun again.
+
+    Rows are sorted by the typed sort key that the listing model sets
+    for each item. Sorting is not dynamic: the rows are only sorted
+    again when rows have been added or a sort key has changed, and not
+    whenever an item changes, e.g. when its thumbnail arrives. Changes
+    arriving together are sorted in a single pass.
+    """
+
+    def __init__(self, parent):
+        """
+        Constructor
+
+        :param parent: QT parent object
+        """
+        QtGui.QSortFilterProxyModel.__init__(self, parent)
+        self.setSortRole(SgEntityListingModel.SORT_KEY_ROLE)
+        self.setDynamicSortFilter(False)
+
+        self._sort_timer = QtCore.QTimer(self)
+        self._sort_timer.setSingleShot(True)
+        self._sort_timer.setInterval(0)
+        self._sort_timer.timeout.connect(self._sort)
+
+    def setSourceModel(self, model):
+        """
+        Sets the listing model to filter and sort.
+
+        :param model: :class:`SgEntityListingModel` instance
+        """
+        QtGui.QSortFilterProxyModel.setSourceModel(self, model)
+        model.filter_changed.connect(self.invalidateFilter)
+        # rows can be affected by rows arriving later, for example
+        # when a newer publish supersedes one that is already listed
+        model.data_refreshed.connect(self.invalidateFilter)
+        model.rowsInserted.connect(self._schedule_sort)
+        model.sort_keys_changed.connect(self._schedule_sort)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        """
+        Checks if a row should be displayed.
+
+        :param source_row: Row in the source model
+        :param source_parent: Parent index in the source model
+        :returns: True if the row should be displayed
+        """
+        model = self.sourceModel()
+        item = model.itemFromIndex(model.index(source_row, 0, source_parent))
+        if item is None:
+            return True
+        return model.filter_accepts_item(item)
+
+    def _schedule_sort(self, *args):
+        """
+        Sorts the rows once control returns to the event loop.
+        """
+        if not self._sort_timer.isActive():
+            self._sort_timer.start()
+
+    def _sort(self):
+        """
+        Sorts the rows by the current sort column and order.
+        """
+        if self.sortColumn() >= 0:
+            self.sort(self.sortColumn(), self.sortOrder())
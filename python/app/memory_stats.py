@@ -0,0 +1,128 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Estimates of the memory held by the panel's models, pixmaps and history.
+
+The numbers are estimates: python object sizes are computed with
+sys.getsizeof() and pixmaps are accounted for by their pixel data.
+They are meant to spot growth over a long session rather than
+to match the process memory exactly.
+"""
+
+import sys
+
+
+def estimate_value_bytes(value):
+    """
+    Estimates the memory held by a python value, such as a shotgun data dictionary.
+
+    :param value: Python value
+    :returns: Estimated size in bytes
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for (k, v) in value.iteritems():
+            size += estimate_value_bytes(k) + estimate_value_bytes(v)
+    elif isinstance(value, (list, tuple, set)):
+        for v in value:
+            size += estimate_value_bytes(v)
+    return size
+
+
+def estimate_pixmap_bytes(pixmap):
+    """
+    Estimates the memory held by the pixel data of a pixmap or image.
+
+    :param pixmap: QPixmap or QImage, or None
+    :returns: Estimated size in bytes
+    """
+    if pixmap is None or pixmap.isNull():
+        return 0
+    return pixmap.width() * pixmap.height() * pixmap.depth() / 8
+
+
+def estimate_icon_bytes(icon):
+    """
+    Estimates the memory held by the pixmaps of an icon.
+
+    :param icon: QIcon, or None
+    :returns: Estimated size in bytes
+    """
+    if icon is None or icon.isNull():
+        return 0
+    # assume 32 bit pixmaps for each size the icon holds
+    return sum(size.width() * size.height() * 4 for size in icon.availableSizes())
+
+
+def get_model_usage(model):
+    """
+    Estimates the memory held by the items of a shotgun model.
+
+    :param model: ShotgunModel instance, or None
+    :returns: Dictionary with keys items, data_bytes and pixmap_bytes
+    """
+    usage = {"items": 0, "data_bytes": 0, "pixmap_bytes": 0}
+    if model is None:
+        return usage
+
+    items = [model.invisibleRootItem()]
+    while items:
+        parent_item = items.pop()
+        for row in range(parent_item.rowCount()):
+            item = parent_item.child(row)
+            usage["items"] += 1
+            if hasattr(item, "get_sg_data"):
+                usage["data_bytes"] += estimate_value_bytes(item.get_sg_data())
+            usage["pixmap_bytes"] += estimate_icon_bytes(item.icon())
+            items.append(item)
+
+    return usage
+
+
+def get_location_usage(sg_location):
+    """
+    Estimates the memory held by a location, such as a history entry.
+
+    :param sg_location: :class:`ShotgunLocation` instance
+    :returns: Dictionary with keys formatter_bytes, known_data_bytes
+              and known_pixmap_bytes
+    """
+    return {"formatter_bytes": estimate_value_bytes(vars(sg_location.sg_formatter)),
+            "known_data_bytes": estimate_value_bytes(sg_location.known_sg_data),
+            "known_pixmap_bytes": estimate_pixmap_bytes(sg_location.known_pixmap)}
+
+
+def format_bytes(num_bytes):
+    """
+    Formats a byte count for display.
+
+    :param num_bytes: Number of bytes
+    :returns: String, e.g. '12.3 MB'
+    """
+    if num_bytes >= 1024 * 1024:
+        return "%.1f MB" % (num_bytes / (1024.0 * 1024.0))
+    return "%.1f kB" % (num_bytes / 1024.0)
+
+
+def format_report(entries):
+    """
+    Formats memory usage entries as a table.
+
+    :param entries: List of dictionaries with keys name, count and bytes
+    :returns: Report as a string
+    """
+    lines = ["%-40s %8s %12s" % ("", "count", "size")]
+    total = 0
+    for entry in entries:
+        lines.append("%-40s %8d %12s" % (entry["name"], entry["count"], format_bytes(entry["bytes"])))
+        total += entry["bytes"]
+    lines.append("%-40s %8s %12s" % ("total", "", format_bytes(total)))
+    return "\n".join(lines)
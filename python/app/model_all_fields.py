@@ -9,54 +9,103 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 from sgtk.platform.qt import QtCore, QtGui
 import sgtk
+import time
+from . import utils
+from . import tracing
+from . import query_stats
 
 # import the shotgun_model module from the shotgun utils framework
 shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
 ShotgunModel = shotgun_model.ShotgunModel
 
+shotgun_globals = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_globals")
+
 class SgAllFieldsModel(ShotgunModel):
     """
     Model that represents all the fields for an entity, as defined
     by a shotgun location object.
-    
+
     Data is loaded in via the load_data(location_object) method and the
     model will use the sg_location.sg_formatter.all_fields to determine
     which fields to load in.
-    
-    Once loaded or updated, a data_updated signal is emitted.
-    
+
+    Fields are loaded in chunks: this model itself retrieves all the
+    inexpensive fields, so that these can be displayed as quickly as
+    possible. Multi entity fields and deep links are potentially slow to
+    resolve. All the multi entity fields are loaded in one separate query
+    and all the deep links in another, each with its own cache, by
+    :class:`AllFieldsChunkModel` helper models.
+
+    Once loaded or updated, a data_updated signal is emitted. This
+    happens every time one of the chunks arrives.
+
     :signal data_updated(dict): Signal emitted when shotgun data has arrived.
         the signal carries with it a dictionary of Shotgun data, as specified
-        by the location object passed in to :meth:`load_data()`.
+        by the location object passed in to :meth:`load_data()`. Fields
+        that haven't been loaded yet are not included in the dictionary.
     """
-    
+
     data_updated = QtCore.Signal(dict)
 
+    # shotgun data types that are loaded in separate chunks
+    CHUNKED_DATA_TYPES = ["multi_entity"]
+
     def __init__(self, parent, bg_task_manager):
         """
         Constructor
-        
+
         :param parent: QT parent object.
         """
         # init base class
-        ShotgunModel.__init__(self, 
-                              parent, 
-                              download_thumbs=False, 
+        ShotgunModel.__init__(self,
+                              parent,
+                              download_thumbs=False,
                               bg_task_manager=bg_task_manager)
-        
-        self._sg_location = None                
+
+        self._sg_location = None
+        self._bg_task_manager = bg_task_manager
+        self._round_trip_span = None
+        self._query = None
+        self._record_store = None
+        self._main_fields = []
+        self._query_time = None
+        # signature of the query currently being refreshed
+        self._in_flight_signature = None
         self.data_refreshed.connect(self._on_data_refreshed)
+        self.data_refresh_fail.connect(self._on_data_refresh_fail)
+
+        # helper models used to load expensive fields.
+        # these are reused from location to location.
+        self._chunk_models = []
+        # number of chunk models used by the current location
+        self._num_active_chunks = 0
+
+    def destroy(self):
+        """
+        Tear down method
+        """
+        # make sure we gracefully stop the chunk models
+        for chunk_model in self._chunk_models:
+            chunk_model.destroy()
+        self._chunk_models = []
+
+        # call base class
+        ShotgunModel.destroy(self)
 
     def _get_sg_data(self):
         """
-        Returns the sg data dictionary for the associated item
-        None if not available.
+        Returns the sg data dictionary for the associated item,
+        including the fields for all the chunks that have been
+        loaded so far. An empty dictionary is returned if no data
+        is available.
         """
         if self.rowCount() == 0:
-            data = {}
-        else:
-            data = self.item(0).get_sg_data()
-        
+            return {}
+
+        data = dict(self.item(0).get_sg_data())
+        for chunk_model in self._chunk_models[:self._num_active_chunks]:
+            data.update(chunk_model.get_sg_data())
+
         return data
 
     def _on_data_refreshed(self):
@@ -68,9 +117,132 @@ class SgAllFieldsModel(ShotgunModel):
         sg_data = self._get_sg_data()
         self.data_updated.emit(sg_data)
 
+    def _on_data_refresh_fail(self, msg):
+        """
+        Called when the refresh query failed.
+        """
+        self._in_flight_signature = None
+
+    def _before_data_processing(self, sg_data_list):
+        """
+        Called just after data has been retrieved from Shotgun but before any processing
+        takes place.
+
+        :param sg_data_list: list of shotgun dictionaries, as returned by the find() call.
+        :returns: should return a list of shotgun dictionaries, on the same form as the input.
+        """
+        self._in_flight_signature = None
+        if self._round_trip_span:
+            self._round_trip_span.finish(records=len(sg_data_list))
+        query_stats.finish_query(self._query, sg_data_list)
+        if self._record_store and self._query_time:
+            self._record_store.merge(sg_data_list, self._query_time)
+        return sg_data_list
+
+    def _split_fields(self, entity_type, fields):
+        """
+        Splits the given list of fields into fields which can be
+        loaded in the main query and chunks of expensive fields that
+        should be loaded separately: one chunk with the fields of the
+        chunked data types and one with the deep links.
+
+        Fields that cannot be found in the schema (for example if the
+        schema hasn't been loaded yet) are loaded in the main query.
+
+        :param entity_type: Shotgun entity type
+        :param fields: List of fields to split
+        :returns: Tuple with (main_fields, chunks), where chunks is a
+                  list of non empty lists of fields.
+        """
+        main_fields = []
+        chunked_type_fields = []
+        deep_link_fields = []
+
+        for field_name in fields:
+            if "." in field_name:
+                # deep links require joins on the server
+                deep_link_fields.append(field_name)
+                continue
+
+            try:
+                data_type = shotgun_globals.get_data_type(entity_type, field_name)
+            except Exception:
+                data_type = None
+
+            if data_type in self.CHUNKED_DATA_TYPES:
+                chunked_type_fields.append(field_name)
+            else:
+                main_fields.append(field_name)
+
+        chunks = [x for x in (chunked_type_fields, deep_link_fields) if x]
+        return (main_fields, chunks)
+
     ############################################################################################
     # public interface
 
+    def update_records(self, sg_records):
+        """
+        Updates the data in place if the entity represented by this model
+        is part of the given list of shotgun records. A data_updated signal
+        is emitted if the data was changed.
+
+        :param sg_records: List of shotgun dictionaries, each with type and id
+               keys and the new values for any number of fields.
+        :returns: List of entity dictionaries with type and id keys for
+                  the records that were found in this model.
+        """
+        if self._sg_location is None or self.rowCount() == 0:
+            return []
+
+        for sg_record in sg_records:
+            if sg_record["type"] == self._sg_location.entity_type and \
+               sg_record["id"] == self._sg_location.entity_id:
+                changed = utils.update_item_sg_data(self.item(0), sg_record)
+                for chunk_model in self._chunk_models[:self._num_active_chunks]:
+                    changed = chunk_model.update_record(sg_record) or changed
+                if changed:
+                    self.data_updated.emit(self._get_sg_data())
+                return [self._sg_location.entity_dict]
+
+        return []
+
+    def set_record_store(self, record_store):
+        """
+        Specify the record store shared by the panel models. When set,
+        the data returned by the main query is written into the store and values
+        which the store holds in a fresher state are displayed instead.
+
+        :param record_store: :class:`RecordStore` object, or None
+        """
+        self._record_store = record_store
+
+    def refresh_chunks(self, sg_records):
+        """
+        Requests an async refresh of the expensive fields if the entity
+        represented by this model is part of the given list of shotgun
+        records. Each chunk is re-read by its own query.
+
+        :param sg_records: List of shotgun dictionaries with type and id keys
+        """
+        if self._sg_location is None:
+            return
+
+        for sg_record in sg_records:
+            if sg_record["type"] == self._sg_location.entity_type and \
+               sg_record["id"] == self._sg_location.entity_id:
+                for chunk_model in self._chunk_models[:self._num_active_chunks]:
+                    chunk_model.refresh()
+                return
+
+    @property
+    def query_fields(self):
+        """
+        The list of inexpensive shotgun fields currently being retrieved
+        by the main query of this model. The expensive fields are
+        retrieved by the chunk models, see :meth:`refresh_chunks()`.
+        """
+        return self._main_fields
+
     def load_data(self, sg_location):
         """
         Clears the model and sets it up for a particular entity.
@@ -78,17 +250,133 @@ class SgAllFieldsModel(ShotgunModel):
         """
         # set the current location to represent
         self._sg_location = sg_location
-          
-        filters = [ ["id", "is", self._sg_location.entity_id ] ]
-        hierarchy = ["id"]
-
-        ShotgunModel._load_data(self, 
-                                       sg_location.sg_formatter.entity_type, 
-                                       filters,
-                                       hierarchy, 
-                                       sg_location.sg_formatter.all_fields)
-        # signal to any views that data now may be available
-        self.data_updated.emit(self._get_sg_data())
+        entity_type = sg_location.sg_formatter.entity_type
+
+        with tracing.span("load_data", "model", entity_type=entity_type):
+            filters = [ ["id", "is", self._sg_location.entity_id ] ]
+            hierarchy = ["id"]
+
+            (main_fields, chunks) = self._split_fields(
+                entity_type,
+                utils.canonical_fields(sg_location.sg_formatter.all_fields)
+            )
+            self._main_fields = main_fields
+
+            signature = utils.get_query_signature(entity_type, filters, main_fields)
+            if signature == self._in_flight_signature:
+                # the fields for the entity are still being loaded,
+                # for example when quickly toggling between tabs.
+                return
+
+            with tracing.span("cache_read", "model", entity_type=entity_type):
+                ShotgunModel._load_data(self,
+                                        entity_type,
+                                        filters,
+                                        hierarchy,
+                                        main_fields)
+            if self._record_store and self.rowCount() > 0:
+                sg_record = self._record_store.get_record(entity_type,
+                                                          self._sg_location.entity_id,
+                                                          main_fields)
+                if sg_record:
+                    utils.update_item_sg_data(self.item(0), sg_record)
+
+            # set up the chunks for the expensive fields,
+            # creating more helper models as needed.
+            while len(self._chunk_models) < len(chunks):
+                chunk_model = AllFieldsChunkModel(self, self._bg_task_manager)
+                chunk_model.data_refreshed.connect(self._on_data_refreshed)
+                self._chunk_models.append(chunk_model)
+
+            self._num_active_chunks = len(chunks)
+            for (chunk_model, chunk_fields) in zip(self._chunk_models, chunks):
+                chunk_model.load_data(entity_type, self._sg_location.entity_id, chunk_fields)
+
+            # signal to any views that data now may be available
+            self.data_updated.emit(self._get_sg_data())
+
+            # the round trip completes in _before_data_processing
+            self._round_trip_span = tracing.start_span("server_round_trip", "shotgun",
+                                                       entity_type=entity_type)
+            self._query = query_stats.start_query(entity_type,
+                                                  "all fields",
+                                                  entity_type,
+                                                  filters,
+                                                  main_fields)
+
+            # request the main fields first so that they can be
+            # displayed before the expensive fields have arrived
+            self._query_time = time.time()
+            self._in_flight_signature = signature
+            self._refresh_data()
+            for chunk_model in self._chunk_models[:self._num_active_chunks]:
+                chunk_model.refresh()
+
+
+class AllFieldsChunkModel(ShotgunModel):
+    """
+    Helper class used by SgAllFieldsModel. Loads a subset of the
+    fields for an entity in a separate query so that expensive fields
+    don't hold up the display of the inexpensive ones. Each chunk
+    is cached separately.
+
+    The model emits the standard data_refreshed signal whenever
+    new data has arrived.
+    """
+
+    def __init__(self, parent, bg_task_manager):
+        """
+        Constructor
+
+        :param parent: QT parent object
+        """
+        # init base class
+        ShotgunModel.__init__(self,
+                              parent,
+                              download_thumbs=False,
+                              bg_task_manager=bg_task_manager)
+        self._fields = []
+
+    def load_data(self, entity_type, entity_id, fields):
+        """
+        Clears the model and loads any cached data for the given fields.
+
+        :param entity_type: Shotgun entity type to load
+        :param entity_id: Shotgun id to load
+        :param fields: List of fields to load
+        """
+        self._fields = fields
+        ShotgunModel._load_data(self,
+                                entity_type,
+                                [["id", "is", entity_id]],
+                                ["id"],
+                                fields)
+
+    def refresh(self):
+        """
+        Requests an async refresh of the data from Shotgun.
+        """
         self._refresh_data()
-        
-        
+
+    def update_record(self, sg_record):
+        """
+        Updates the loaded fields in place with the values
+        from the given shotgun record.
+
+        :param sg_record: Shotgun dictionary with new field values
+        :returns: True if the data was changed, False otherwise
+        """
+        if self.rowCount() == 0:
+            return False
+        return utils.update_item_sg_data(self.item(0), sg_record)
+
+    def get_sg_data(self):
+        """
+        Returns the loaded fields for the entity. An empty dictionary
+        is returned if no data is available.
+        """
+        if self.rowCount() == 0:
+            return {}
+
+        sg_data = self.item(0).get_sg_data()
+        return dict((x, sg_data[x]) for x in self._fields if x in sg_data)
@@ -10,6 +10,10 @@
 
 from sgtk.platform.qt import QtCore, QtGui
 import sgtk
+import time
+from . import utils
+from . import tracing
+from . import query_stats
 
 # import the shotgun_model module from the shotgun utils framework
 shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
@@ -43,8 +47,16 @@ class SgEntityDetailsModel(ShotgunModel):
                               bg_task_manager=bg_task_manager)
         
         self._sg_location = None
+        self._query_fields = []
         self._current_pixmap = None
+        self._round_trip_span = None
+        self._query = None
+        self._record_store = None
+        self._query_time = None
+        # signature of the query currently being refreshed
+        self._in_flight_signature = None
         self.data_refreshed.connect(self._on_data_refreshed)
+        self.data_refresh_fail.connect(self._on_data_refresh_fail)
 
     def _on_data_refreshed(self):
         """
@@ -52,8 +64,33 @@ class SgEntityDetailsModel(ShotgunModel):
         so that a data_updated signal is consistenntly sent
         out both after the data has been updated and after a cache has been read in
         """
+        if self._sg_location and self.rowCount() > 0:
+            # the details have been loaded, the known data is no longer needed
+            self._sg_location.clear_known_data()
         self.data_updated.emit()
 
+    def _on_data_refresh_fail(self, msg):
+        """
+        Called when the refresh query failed.
+        """
+        self._in_flight_signature = None
+
+    def _before_data_processing(self, sg_data_list):
+        """
+        Called just after data has been retrieved from Shotgun but before any processing
+        takes place.
+
+        :param sg_data_list: list of shotgun dictionaries, as returned by the find() call.
+        :returns: should return a list of shotgun dictionaries, on the same form as the input.
+        """
+        self._in_flight_signature = None
+        if self._round_trip_span:
+            self._round_trip_span.finish(records=len(sg_data_list))
+        query_stats.finish_query(self._query, sg_data_list)
+        if self._record_store and self._query_time:
+            self._record_store.merge(sg_data_list, self._query_time)
+        return sg_data_list
+
     def _populate_default_thumbnail(self, item):
         """
         Called whenever an item needs to get a default thumbnail attached to a node.
@@ -62,7 +99,9 @@ class SgEntityDetailsModel(ShotgunModel):
         on a call to _populate_thumbnail will follow where the subclassing implementation
         can populate the real image.
         """
-        self._current_pixmap = self._sg_location.sg_formatter.default_pixmap
+        # keep showing the known thumbnail until the real one has loaded
+        self._current_pixmap = self._sg_location.known_pixmap or \
+                               self._sg_location.sg_formatter.default_pixmap
         self.thumbnail_updated.emit()
 
     def _populate_thumbnail_image(self, item, field, image, path):
@@ -101,12 +140,22 @@ class SgEntityDetailsModel(ShotgunModel):
     ############################################################################################
     # public interface
 
+    def set_record_store(self, record_store):
+        """
+        Specify the record store shared by the panel models. When set,
+        the data returned by queries is written into the store and values
+        which the store holds in a fresher state are displayed instead.
+
+        :param record_store: :class:`RecordStore` object, or None
+        """
+        self._record_store = record_store
+
     def load_data(self, sg_location):
         """
         Clears the model and sets it up for a particular entity.
         Loads any cached data that exists and requests an async update.
         
-        The fields defined in the sg_location.sg_formatter.fields 
+        The fields defined in the sg_location.sg_formatter.details_fields
         property will be loaded.
         
         :param sg_location: Shotgun Location object of the object to load.
@@ -114,33 +163,120 @@ class SgEntityDetailsModel(ShotgunModel):
         # set the current location to represent
         self._sg_location = sg_location
           
-        fields = sg_location.sg_formatter.fields + sg_location.sg_formatter.thumbnail_fields
+        fields = utils.canonical_fields(sg_location.sg_formatter.details_fields)
+        self._query_fields = fields
 
         hierarchy = ["id"]
+        filters = [["id", "is", sg_location.entity_id]]
+
+        signature = utils.get_query_signature(sg_location.entity_type, filters, fields)
+        if signature == self._in_flight_signature:
+            # the details for the entity are still being loaded, for example
+            # when stepping back and forth in the history. Their data will
+            # be displayed once it arrives.
+            self.thumbnail_updated.emit()
+            self.data_updated.emit()
+            return
+
+        with tracing.span("load_data", "model", entity_type=sg_location.entity_type):
+            with tracing.span("cache_read", "model", entity_type=sg_location.entity_type):
+                ShotgunModel._load_data(self,
+                                        sg_location.entity_type,
+                                        filters,
+                                        hierarchy,
+                                        fields)
+
+            if self.rowCount() > 0:
+                sg_location.clear_known_data()
+                if self._record_store:
+                    sg_record = self._record_store.get_record(sg_location.entity_type,
+                                                              sg_location.entity_id,
+                                                              fields)
+                    if sg_record:
+                        utils.update_item_sg_data(self.item(0), sg_record)
+            elif sg_location.known_sg_data:
+                # nothing cached - display the data carried by the location
+                # straight away. It is replaced once the details have loaded.
+                self._current_pixmap = sg_location.known_pixmap or sg_location.sg_formatter.default_pixmap
+                self.thumbnail_updated.emit()
+
+            # signal to any views that data now may be available
+            self.data_updated.emit()
+
+            # the round trip completes in _before_data_processing
+            self._round_trip_span = tracing.start_span("server_round_trip", "shotgun",
+                                                       entity_type=sg_location.entity_type)
+            self._query = query_stats.start_query(sg_location.entity_type,
+                                                  "details",
+                                                  sg_location.entity_type,
+                                                  filters,
+                                                  fields,
+                                                  sg_location.sg_formatter.deep_link_tokens)
+            self._query_time = time.time()
+            self._in_flight_signature = signature
+            self._refresh_data()
+
+    
+    @property
+    def query_fields(self):
+        """
+        The list of shotgun fields currently being retrieved for the details item.
+        """
+        return self._query_fields
+
+    def update_records(self, sg_records):
+        """
+        Updates the details item in place if it is part of the given 
+        list of shotgun records. A data_updated signal is emitted if 
+        the item was changed.
+        
+        :param sg_records: List of shotgun dictionaries, each with type and id 
+               keys and the new values for any number of fields.
+        :returns: List of entity dictionaries with type and id keys for
+                  the records that were found in this model.
+        """
+        if self._sg_location is None:
+            return []
+
+        if self.rowCount() == 0:
+            # keep the data displayed from the location up to date
+            known_sg_data = self._sg_location.known_sg_data
+            for sg_record in sg_records:
+                if known_sg_data and sg_record["type"] == self._sg_location.entity_type and \
+                   sg_record["id"] == self._sg_location.entity_id:
+                    known_sg_data.update(sg_record)
+                    self.data_updated.emit()
+            return []
         
-        ShotgunModel._load_data(self, 
-                                sg_location.entity_type, 
-                                [["id", "is", sg_location.entity_id]], 
-                                hierarchy,
-                                fields)
+        for sg_record in sg_records:
+            if sg_record["type"] == self._sg_location.entity_type and \
+               sg_record["id"] == self._sg_location.entity_id:
+                if utils.update_item_sg_data(self.item(0), sg_record):
+                    self.data_updated.emit()
+                return [self._sg_location.entity_dict]
         
-        # signal to any views that data now may be available
-        self.data_updated.emit()
-        self._refresh_data()
+        return []
 
-    
     def get_sg_data(self):
         """
         Returns the sg data dictionary for the associated item
-        None if not available.
+        None if not available. Until the details have loaded, any
+        data known by the location is returned.
         """
         if self.rowCount() == 0:
-            data = None
+            data = self._sg_location.known_sg_data if self._sg_location else None
         else:
             data = self.item(0).get_sg_data()
         
         return data
         
+    def has_details(self):
+        """
+        Returns True if the details for the associated item have been
+        loaded, False if only the data known by the location is available.
+        """
+        return self.rowCount() > 0
+
     def get_pixmap(self):
         """
         Returns the thumbnail currently associated with the item.
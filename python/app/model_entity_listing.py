@@ -11,6 +11,13 @@
 
 from sgtk.platform.qt import QtCore, QtGui
 import sgtk
+import time
+import datetime
+from . import utils
+from . import tracing
+from . import query_stats
+from . import link_resolver
+from . import query_splitter
 from .shotgun_formatter import ShotgunTypeFormatter
 
 # import the shotgun_model module from the shotgun utils framework
@@ -28,10 +35,21 @@ class SgEntityListingModel(ShotgunModel):
     
     The returned data in this model is capped so that it will at
     the most contain SG_RECORD_LIMIT items.
+
+    :signal filter_changed(): Emitted when the items accepted by
+        :meth:`filter_accepts_item()` may have changed.
+    :signal sort_keys_changed(): Emitted when the sort key of
+        one or more items has changed.
     """
     
     # maximum number of items to show in the listings
     SG_RECORD_LIMIT = 50
+
+    # role holding the typed value that items are sorted by
+    SORT_KEY_ROLE = QtCore.Qt.UserRole + 1101
+
+    filter_changed = QtCore.Signal()
+    sort_keys_changed = QtCore.Signal()
     
     def __init__(self, entity_type, parent, bg_task_manager):
         """
@@ -42,6 +60,30 @@ class SgEntityListingModel(ShotgunModel):
         """
         self._sg_location = None
         self._sg_formatter = ShotgunTypeFormatter(entity_type)
+        self._query_fields = []
+        # field that the items are sorted by
+        self._sort_field = "updated_at"
+        self._round_trip_span = None
+        self._query = None
+        self._link_resolver = None
+        self._record_store = None
+        self._query_time = None
+        # signature of the query currently being refreshed
+        self._in_flight_signature = None
+        self._query_splitter = None
+        # uid of the running split query lookup, and
+        # the query the model is refreshed by id with
+        self._split_uid = None
+        self._id_query = None
+        # coalescer to read records by id with, and
+        # the uid of the running read
+        self._query_coalescer = None
+        self._id_uid = None
+        self._inbox_index = None
+        # key of the inbox index the model is refreshed from,
+        # and the ids of the records it is refreshed with
+        self._inbox_key = None
+        self._inbox_ids = None
         
         # init base class
         ShotgunModel.__init__(self,
@@ -49,10 +91,123 @@ class SgEntityListingModel(ShotgunModel):
                               download_thumbs=True,
                               bg_load_thumbs=True,
                               bg_task_manager=bg_task_manager)
+        self.data_refresh_fail.connect(self._on_data_refresh_fail)
+
+    def destroy(self):
+        """
+        Tear down method
+        """
+        self.set_query_splitter(None)
+        self.set_inbox_index(None)
+        self.set_query_coalescer(None)
+
+        # call base class
+        ShotgunModel.destroy(self)
 
     ############################################################################################
     # public interface
 
+    def set_record_store(self, record_store):
+        """
+        Specify the record store shared by the panel models. When set,
+        the data returned by queries is written into the store and values
+        which the store holds in a fresher state are displayed instead.
+
+        :param record_store: :class:`RecordStore` object, or None
+        """
+        self._record_store = record_store
+
+    def set_link_resolver(self, link_resolver):
+        """
+        Specify a link resolver to resolve deep link fields with. When set,
+        queries only retrieve the link fields and the deep link values are
+        filled in by the resolver. The resolver must be set before data is
+        loaded.
+
+        :param link_resolver: LinkResolver object, or None to let the
+                              server resolve deep links.
+        """
+        self._link_resolver = link_resolver
+
+    def set_query_splitter(self, splitter):
+        """
+        Specify a query splitter to run queries whose filters contain an
+        or group with. When set, the records matching each branch of the
+        group are looked up in parallel and the model is then refreshed with
+        the resulting ids, rather than with the or query itself.
+
+        :param splitter: :class:`QuerySplitter` object, or None to
+                         run queries as a single find.
+        """
+        if self._query_splitter:
+            if self._split_uid:
+                self._query_splitter.cancel(self._split_uid)
+                self._split_uid = None
+            self._query_splitter.work_completed.disconnect(self._on_split_query_completed)
+            self._query_splitter.work_failure.disconnect(self._on_split_query_failed)
+
+        self._query_splitter = splitter
+
+        if self._query_splitter:
+            self._query_splitter.work_completed.connect(self._on_split_query_completed)
+            self._query_splitter.work_failure.connect(self._on_split_query_failed)
+
+    def set_query_coalescer(self, query_coalescer):
+        """
+        Specify the query coalescer to read records by id with, when
+        the model is refreshed by the query splitter or the inbox index
+        and its items are the records to read.
+
+        :param query_coalescer: :class:`QueryCoalescer` object, or None
+        """
+        if self._query_coalescer:
+            if self._id_uid:
+                self._query_coalescer.cancel(self._id_uid)
+                self._id_uid = None
+            self._query_coalescer.work_completed.disconnect(self._on_id_query_completed)
+            self._query_coalescer.work_failure.disconnect(self._on_id_query_failed)
+
+        self._query_coalescer = query_coalescer
+
+        if self._query_coalescer:
+            self._query_coalescer.work_completed.connect(self._on_id_query_completed)
+            self._query_coalescer.work_failure.connect(self._on_id_query_failed)
+
+    def set_inbox_index(self, inbox_index):
+        """
+        Specify the inbox index to list the current user's records from.
+        When set, listings covered by the index are refreshed with the ids
+        of the most recently updated records in the index, and these are
+        only read from Shotgun if the index reports changes.
+
+        :param inbox_index: :class:`InboxIndex` object, or None
+        """
+        if self._inbox_index:
+            self._inbox_index.index_updated.disconnect(self._on_inbox_index_updated)
+
+        self._inbox_index = inbox_index
+        self._inbox_key = None
+
+        if self._inbox_index:
+            self._inbox_index.index_updated.connect(self._on_inbox_index_updated)
+
+    def get_entity_item(self, entity_type, entity_id):
+        """
+        Returns the item representing the given entity.
+
+        :param entity_type: Shotgun entity type
+        :param entity_id: Shotgun entity id
+        :returns: Model item, or None if the entity is not in the model
+        """
+        if entity_type != self._sg_formatter.entity_type:
+            return None
+        for row in range(self.rowCount()):
+            item = self.item(row)
+            sg_data = item.get_sg_data()
+            if sg_data and sg_data.get("type") == entity_type and sg_data.get("id") == entity_id:
+                return item
+        return None
+
     def get_formatter(self):
         """
         Returns the shotgun location associated with this model.
@@ -61,6 +216,27 @@ class SgEntityListingModel(ShotgunModel):
         """
         return self._sg_formatter
 
+    def filter_accepts_item(self, item):
+        """
+        Checks if an item should be displayed. This is used by the
+        listing proxy model and can be subclassed by models which
+        filter their data on the client.
+
+        :param item: Model item
+        :returns: True if the item should be displayed
+        """
+        return True
+
+    def get_filter_fields(self):
+        """
+        Returns the fields that :meth:`filter_accepts_item()` depends on.
+        The items are filtered again whenever :meth:`update_records()`
+        changes the value of any of these fields.
+
+        :returns: List of shotgun fields
+        """
+        return []
+
     def is_highlighted(self, model_index):
         """
         Compute if a model index belonging to this model 
@@ -71,6 +247,52 @@ class SgEntityListingModel(ShotgunModel):
         """
         return False
 
+    @property
+    def query_fields(self):
+        """
+        The list of shotgun fields currently being retrieved for the items in
+        this model by the listing query. Deep links resolved separately by the
+        link resolver are not included.
+        """
+        return self._get_primary_fields(self._query_fields)
+
+    def update_records(self, sg_records):
+        """
+        Updates any items in this model that represent the given shotgun
+        records in place, without reloading the model.
+        
+        :param sg_records: List of shotgun dictionaries, each with type and id 
+               keys and the new values for any number of fields.
+        :returns: List of entity dictionaries with type and id keys for
+                  the records that were found in this model.
+        """
+        sg_records_by_id = {}
+        for sg_record in sg_records:
+            if sg_record["type"] == self._sg_formatter.entity_type:
+                sg_records_by_id[sg_record["id"]] = sg_record
+        
+        filter_fields = self.get_filter_fields()
+        filter_data_changed = False
+
+        found_entities = []
+        for row in range(self.rowCount()):
+            item = self.item(row)
+            sg_data = item.get_sg_data()
+            if sg_data and sg_data.get("id") in sg_records_by_id:
+                filter_values = [sg_data.get(x) for x in filter_fields]
+                if utils.update_item_sg_data(item, sg_records_by_id[sg_data["id"]]):
+                    new_sg_data = item.get_sg_data()
+                    self._update_sort_key(item, new_sg_data)
+                    if filter_values != [new_sg_data.get(x) for x in filter_fields]:
+                        filter_data_changed = True
+                found_entities.append({"type": sg_data["type"], "id": sg_data["id"]})
+
+        if filter_data_changed:
+            # the proxy model doesn't filter dynamically
+            self._on_filter_data_changed()
+        
+        return found_entities
+
     def load_data(self, sg_location, additional_fields=None, sort_field=None):
         """
         Clears the model and sets it up for a particular entity.
@@ -94,31 +316,445 @@ class SgEntityListingModel(ShotgunModel):
         # if a sort field has not been specified, default to 
         # update date (unix time), in descending order
         sort_field = sort_field or "updated_at"
+        self._sort_field = sort_field
         
-        fields = self._sg_formatter.fields
-        if additional_fields:
-            fields += additional_fields
-            
-        hierarchy = [sort_field]
-        ShotgunModel._load_data(self, 
-                                self._sg_formatter.entity_type, 
-                                self._get_filters(), 
-                                hierarchy, 
-                                fields, 
-                                [{"field_name": sort_field, 
-                                  "direction": "desc"}],
-                                limit=self.SG_RECORD_LIMIT)
-        self._refresh_data()
+        # use a canonical form of the query, so that the cache identity
+        # is the same regardless of the order the fields were collected in
+        fields = utils.canonical_fields(self._sg_formatter.list_fields + (additional_fields or []))
+        self._query_fields = fields
+
+        entity_type = self._sg_formatter.entity_type
+        filters = utils.canonical_filters(self._get_filters())
+        order = utils.canonical_order([{"field_name": sort_field, "direction": "desc"}])
+
+        signature = self._get_query_signature(entity_type, filters, self._get_primary_fields(fields), order)
+        if signature == self._in_flight_signature:
+            # an identical query is still running, for example when
+            # quickly toggling between tabs. Its result will be loaded
+            # into the model once it arrives.
+            return
+
+        if self._split_uid:
+            # the model is about to be loaded with a different query
+            self._query_splitter.cancel(self._split_uid)
+            self._split_uid = None
+        if self._id_uid:
+            self._query_coalescer.cancel(self._id_uid)
+            self._id_uid = None
+        self._inbox_key = None
+        self._inbox_ids = None
+
+        with tracing.span("load_data", "model", entity_type=entity_type):
+            hierarchy = [sort_field]
+
+            with tracing.span("cache_read", "model", entity_type=entity_type):
+                ShotgunModel._load_data(self,
+                                        entity_type,
+                                        filters,
+                                        hierarchy,
+                                        self._get_primary_fields(fields),
+                                        order,
+                                        limit=self.SG_RECORD_LIMIT)
+            self._read_record_store()
+
+            if self._inbox_index and \
+               sort_field == "updated_at" and \
+               self._inbox_index.covers(sg_location, entity_type):
+                self._load_inbox_data(entity_type, filters, hierarchy, fields, order, signature)
+                return
+
+            # the round trip completes in _before_data_processing
+            self._round_trip_span = tracing.start_span("server_round_trip", "shotgun",
+                                                       entity_type=entity_type)
+            self._in_flight_signature = signature
+
+            if self._query_splitter and query_splitter.split_or_filters(filters):
+                self._load_split_data(entity_type, filters, hierarchy, fields, order, signature)
+                return
+
+            self._query = query_stats.start_query(sg_location.entity_type,
+                                                  entity_type,
+                                                  entity_type,
+                                                  filters,
+                                                  self._get_primary_fields(fields),
+                                                  self._sg_formatter.deep_link_tokens)
+            self._query_time = time.time()
+            self._refresh_data()
 
     ############################################################################################
     # protected methods
     
+    def _load_split_data(self, entity_type, filters, hierarchy, fields, order, signature):
+        """
+        Refreshes the model using the query splitter. The ids of the records
+        matching the filters are looked up first, after which the model
+        is refreshed with a query for these ids.
+
+        :param entity_type: Shotgun entity type
+        :param filters: Std shotgun filters, with an or group
+        :param hierarchy: Model hierarchy
+        :param fields: List of fields needed by the model
+        :param order: List of shotgun orderings
+        :param signature: Signature of the query
+        """
+        self._set_id_query(entity_type, filters, hierarchy, fields, order, signature)
+        self._split_uid = self._query_splitter.execute_find(entity_type,
+                                                            filters,
+                                                            ["id"],
+                                                            order,
+                                                            self.SG_RECORD_LIMIT)
+
+    def _load_inbox_data(self, entity_type, filters, hierarchy, fields, order, signature):
+        """
+        Refreshes the model from the inbox index. If the index hasn't been
+        seeded yet, the cached data of the query is displayed until it has.
+
+        :param entity_type: Shotgun entity type
+        :param filters: Std shotgun filters
+        :param hierarchy: Model hierarchy
+        :param fields: List of fields needed by the model
+        :param order: List of shotgun orderings
+        :param signature: Signature of the query
+        """
+        # any query still in flight was for another listing and its result
+        # is dropped. Only a refresh submitted for these records is in flight.
+        self._in_flight_signature = None
+        self._set_id_query(entity_type, filters, hierarchy, fields, order, signature)
+        self._inbox_key = self._inbox_index.get_key(entity_type, filters)
+        self._round_trip_span = None
+
+        sg_data_list = self._inbox_index.get_records(entity_type, filters, self.SG_RECORD_LIMIT)
+        if sg_data_list is not None:
+            self._load_inbox_records(sg_data_list)
+
+        # the model is brought up to date once the index has been updated
+        self._inbox_index.update(entity_type, filters)
+
+    def _load_inbox_records(self, sg_data_list):
+        """
+        Refreshes the model with a set of records from the inbox index.
+        They are only read from Shotgun if the loaded data is out of date.
+
+        :param sg_data_list: List of shotgun dictionaries with
+                             type, id and updated_at
+        """
+        ids = [x["id"] for x in sg_data_list]
+        if ids == self._inbox_ids and self._in_flight_signature:
+            # the records are already being read
+            return
+        self._inbox_ids = ids
+
+        loaded_data = {}
+        for row in range(self.rowCount()):
+            sg_data = self.item(row).get_sg_data()
+            if sg_data:
+                loaded_data[sg_data["id"]] = sg_data.get("updated_at")
+        if loaded_data == dict((x["id"], x["updated_at"]) for x in sg_data_list):
+            sgtk.platform.current_bundle().log_debug(
+                "%s records are up to date." % self._id_query["entity_type"]
+            )
+            return
+
+        # the round trip completes in _before_data_processing
+        self._round_trip_span = tracing.start_span("server_round_trip", "shotgun",
+                                                   entity_type=self._id_query["entity_type"])
+        self._refresh_id_query(sg_data_list)
+
+    def _on_inbox_index_updated(self, key):
+        """
+        Called when an index of the inbox index has been updated.
+
+        :param key: Key of the index
+        """
+        key = shotgun_model.sanitize_qt(key) # qstring on pyqt, str on pyside
+        if key != self._inbox_key:
+            return
+        sg_data_list = self._inbox_index.get_records(self._id_query["entity_type"],
+                                                     self._id_query["filters"],
+                                                     self.SG_RECORD_LIMIT)
+        self._load_inbox_records(sg_data_list)
+
+    def _set_id_query(self, entity_type, filters, hierarchy, fields, order, signature):
+        """
+        Sets up the query used when the model is refreshed by id
+        rather than with its filters.
+
+        :param entity_type: Shotgun entity type
+        :param filters: Std shotgun filters of the listing
+        :param hierarchy: Model hierarchy
+        :param fields: List of fields needed by the model
+        :param order: List of shotgun orderings
+        :param signature: Signature of the query
+        """
+        self._id_query = {
+            "entity_type": entity_type,
+            "filters": filters,
+            "hierarchy": hierarchy,
+            "fields": self._get_primary_fields(fields),
+            "order": order,
+            "signature": signature
+        }
+
+    def _refresh_id_query(self, sg_data_list):
+        """
+        Refreshes the model with a query for the given records rather
+        than with the filters of the listing.
+
+        If the model already holds exactly these records, they are read
+        through the query coalescer and updated in place. The model stays
+        loaded with the filters of the listing, so its cache keeps a
+        single key. Otherwise records have been added or removed, and the
+        model is loaded and refreshed with the id filters. Their data is
+        cached separately from the data of the listing filters.
+
+        :param sg_data_list: List of shotgun dictionaries
+        """
+        ids = [x["id"] for x in sg_data_list]
+        id_filters = utils.canonical_filters([["id", "in", ids]])
+
+        loaded_ids = set()
+        for row in range(self.rowCount()):
+            sg_data = self.item(row).get_sg_data()
+            if sg_data:
+                loaded_ids.add(sg_data["id"])
+
+        if not ids and not loaded_ids:
+            # nothing to read
+            self._in_flight_signature = None
+            self._round_trip_span = None
+            return
+
+        entity_type = self._id_query["entity_type"]
+        self._query = query_stats.start_query(self._sg_location.entity_type,
+                                              entity_type,
+                                              entity_type,
+                                              id_filters,
+                                              self._id_query["fields"],
+                                              self._sg_formatter.deep_link_tokens)
+        self._query_time = time.time()
+        self._in_flight_signature = self._id_query["signature"]
+
+        if self._query_coalescer and set(ids) == loaded_ids:
+            self._id_uid = self._query_coalescer.execute_find(entity_type,
+                                                              id_filters,
+                                                              self._id_query["fields"])
+            return
+
+        with tracing.span("cache_read", "model", entity_type=entity_type):
+            ShotgunModel._load_data(self,
+                                    entity_type,
+                                    id_filters,
+                                    self._id_query["hierarchy"],
+                                    self._id_query["fields"],
+                                    self._id_query["order"],
+                                    limit=self.SG_RECORD_LIMIT)
+        self._read_record_store()
+        self._refresh_data()
+
+    def _on_id_query_completed(self, uid, request_type, data):
+        """
+        Called when the records of the model have been read by id.
+        The items are updated in place.
+
+        :param uid: Unique id for request
+        :param request_type: String identifying the request class
+        :param data: Dictionary with the records under the 'sg' key
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        if uid != self._id_uid:
+            return
+        self._id_uid = None
+
+        data = shotgun_model.sanitize_qt(data)
+        sg_data_list = [utils.sanitize_sg_data(x) for x in data["sg"]]
+        self.update_records(self._before_data_processing(sg_data_list))
+
+    def _on_id_query_failed(self, uid, msg):
+        """
+        Called when the records of the model could not be read by id.
+
+        :param uid: Unique id for request that failed
+        :param msg: Error message
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        if uid != self._id_uid:
+            return
+        self._id_uid = None
+
+        self._in_flight_signature = None
+        self._round_trip_span = None
+        sgtk.platform.current_bundle().log_warning(
+            "Could not read %s records: %s" % (self._id_query["entity_type"], shotgun_model.sanitize_qt(msg))
+        )
+
+    def _on_split_query_completed(self, uid, request_type, data):
+        """
+        Called when the query splitter has looked up the
+        records for a query.
+
+        :param uid: Unique id for request
+        :param request_type: String identifying the request class
+        :param data: Dictionary with the records under the 'sg' key
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        if uid != self._split_uid:
+            return
+        self._split_uid = None
+
+        data = shotgun_model.sanitize_qt(data)
+        self._refresh_id_query(data["sg"])
+
+    def _on_split_query_failed(self, uid, msg):
+        """
+        Called when the query splitter could not look up
+        the records for a query. The model falls back on
+        running the query as a single find.
+
+        :param uid: Unique id for request that failed
+        :param msg: Error message
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        if uid != self._split_uid:
+            return
+        self._split_uid = None
+
+        msg = shotgun_model.sanitize_qt(msg)
+        sgtk.platform.current_bundle().log_warning(
+            "Split query failed, running it as a single query: %s" % msg
+        )
+        self._query = query_stats.start_query(self._sg_location.entity_type,
+                                              self._id_query["entity_type"],
+                                              self._id_query["entity_type"],
+                                              self._id_query["filters"],
+                                              self._id_query["fields"],
+                                              self._sg_formatter.deep_link_tokens)
+        self._query_time = time.time()
+        self._refresh_data()
+
+    def _get_query_signature(self, entity_type, filters, fields, order=None):
+        """
+        Returns a signature identifying the query the model is loaded with.
+        Deriving classes which process the data differently depending on
+        their state should include that state.
+
+        :returns: Signature string
+        """
+        return utils.get_query_signature(entity_type, filters, fields, order, self.SG_RECORD_LIMIT)
+
+    def _on_filter_data_changed(self):
+        """
+        Called when the values used to filter the items have been
+        changed in place. Deriving classes caching filter state
+        should clear it and call the base class.
+        """
+        self.filter_changed.emit()
+
+    def _on_data_refresh_fail(self, msg):
+        """
+        Called when the refresh query failed.
+        """
+        self._in_flight_signature = None
+
+    def _read_record_store(self):
+        """
+        Updates the items loaded from the cache with any
+        values held by the record store.
+        """
+        if not self._record_store:
+            return
+        for row in range(self.rowCount()):
+            item = self.item(row)
+            sg_data = item.get_sg_data()
+            if sg_data:
+                sg_record = self._record_store.get_record(sg_data["type"], sg_data["id"], sg_data.keys())
+                if sg_record and utils.update_item_sg_data(item, sg_record):
+                    self._update_sort_key(item, item.get_sg_data())
+
+    def _get_primary_fields(self, fields):
+        """
+        Returns the fields to request from Shotgun for the given fields.
+        If deep links are resolved by a link resolver, only the link
+        fields are requested, except for thumbnail deep links.
+
+        :param fields: List of fields needed by the model
+        :returns: List of fields to query
+        """
+        if self._link_resolver:
+            return link_resolver.get_primary_fields(fields, self._sg_formatter.thumbnail_fields)
+        return fields
+
     def _get_filters(self):
         """
         Return the filter to be used for the current query
         """
         return self._sg_formatter.get_link_filters(self._sg_location)
 
+    def _before_data_processing(self, sg_data_list):
+        """
+        Called just after data has been retrieved from Shotgun but before any processing
+        takes place. Deriving classes overriding this should call the base class.
+
+        :param sg_data_list: list of shotgun dictionaries, as returned by the find() call.
+        :returns: should return a list of shotgun dictionaries, on the same form as the input.
+        """
+        self._in_flight_signature = None
+        if self._round_trip_span:
+            self._round_trip_span.finish(records=len(sg_data_list))
+            self._round_trip_span = None
+        query_stats.finish_query(self._query, sg_data_list)
+        if self._record_store and self._query_time:
+            self._record_store.merge(sg_data_list, self._query_time)
+        if self._inbox_key and self._inbox_ids is not None:
+            self._inbox_index.write_records(self._id_query["entity_type"],
+                                            self._id_query["filters"],
+                                            sg_data_list,
+                                            self._inbox_ids)
+        if self._link_resolver:
+            # thumbnail deep links are resolved by the server
+            deep_links = [x for x in self._query_fields if x not in self._sg_formatter.thumbnail_fields]
+            self._link_resolver.resolve(sg_data_list, deep_links)
+        return sg_data_list
+
+    def _get_sort_key(self, sg_data):
+        """
+        Returns the value an item is sorted by, typed so that it
+        compares correctly, e.g. ids as numbers rather than strings.
+
+        :param sg_data: Shotgun data dictionary for the item
+        :returns: Sort key, dates are returned as unix timestamps.
+        """
+        value = sg_data.get(self._sort_field)
+        if isinstance(value, datetime.datetime):
+            value = time.mktime(value.timetuple())
+        if value is None:
+            # sort empty values after all others
+            value = 0
+        return value
+
+    def _update_sort_key(self, item, sg_data):
+        """
+        Sets the sort key of an item, emitting a sort_keys_changed
+        signal if it has changed.
+
+        :param item: Model item
+        :param sg_data: Shotgun data dictionary for the item
+        """
+        sort_key = self._get_sort_key(sg_data)
+        if item.data(self.SORT_KEY_ROLE) != sort_key:
+            item.setData(sort_key, self.SORT_KEY_ROLE)
+            self.sort_keys_changed.emit()
+
+    def _populate_item(self, item, sg_data):
+        """
+        Whenever an item is constructed or updated, this method is called.
+        Sets the typed sort key used by the listing proxy model.
+
+        :param item: QStandardItem that is about to be added to the model.
+        :param sg_data: Shotgun data dictionary that was received from Shotgun.
+        """
+        if sg_data:
+            self._update_sort_key(item, sg_data)
+
     def _populate_default_thumbnail(self, item):
         """
         Called whenever an item needs to get a default thumbnail attached to a node.
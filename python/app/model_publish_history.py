@@ -10,6 +10,7 @@
 
 from sgtk.platform.qt import QtCore, QtGui
 import sgtk
+import time
 
 # import the shotgun_model module from the shotgun utils framework
 shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
@@ -17,6 +18,7 @@ shotgun_data = sgtk.platform.import_framework("tk-framework-shotgunutils", "shot
 
 ShotgunModel = shotgun_model.ShotgunModel
 
+from . import utils
 from .model_entity_listing import SgEntityListingModel
 
 class SgPublishHistoryListingModel(SgEntityListingModel):
@@ -120,12 +122,13 @@ class SgPublishHistoryListingModel(SgEntityListingModel):
             # to effectively get the "version history", we look for items
             # which have the same project, same entity assocation, same name, same type 
             # and the same task.
-            filters = [ ["project", "is", sg_data["project"] ],
+            filters = utils.canonical_filters([
+                        ["project", "is", sg_data["project"] ],
                         ["name", "is", sg_data["name"] ],
                         ["task", "is", sg_data["task"] ],
                         ["entity", "is", sg_data["entity"] ],
                         [publish_type_field, "is", sg_data[publish_type_field] ],
-                      ]
+                      ])
 
             # the proxy model that is sorting this model will
             # sort based on id (pk), meaning that more recently 
@@ -133,17 +136,29 @@ class SgPublishHistoryListingModel(SgEntityListingModel):
             # This ensures that publishes with no version number defined
             # (yes, these exist) are also sorted correctly.
             hierarchy = ["created_at"]
+            self._sort_field = "created_at"
 
             self._current_version = sg_data["version_number"]
+            self._query_fields = utils.canonical_fields(self._sg_formatter.list_fields)
+
+            signature = self._get_query_signature(self._sg_formatter.entity_type,
+                                                  filters,
+                                                  self._get_primary_fields(self._query_fields))
+            if signature == self._in_flight_signature:
+                # the same history is still being loaded
+                return
 
             ShotgunModel._load_data(
                 self,
                 self._sg_formatter.entity_type,
                 filters,
                 hierarchy,
-                self._sg_formatter.fields
+                self._get_primary_fields(self._query_fields)
             )
+            self._read_record_store()
 
+            self._query_time = time.time()
+            self._in_flight_signature = signature
             self._refresh_data()
 
     ############################################################################################
@@ -15,9 +15,13 @@ from .model_entity_listing import SgEntityListingModel
 
 class SgLatestPublishListingModel(SgEntityListingModel):
     """
-    Model which fetches publish objects with the option to collapse
-    the list of returned data so that only the latest version of each
+    Model which fetches publish objects with the option to filter
+    the list of data so that only the latest version of each
     publish is shown.
+
+    The latest publishes are filtered on the client, by the listing
+    proxy model, so that the option can be toggled without querying
+    Shotgun again.
     """
 
     def __init__(self, entity_type, parent, bg_task_manager):
@@ -31,10 +35,16 @@ class SgLatestPublishListingModel(SgEntityListingModel):
         # should the model only show latest publishes?
         self._show_latest_only = False
         self._publish_type_field = None
+        # ids of the latest publishes, computed on demand
+        self._latest_ids = None
 
         # init base class
         SgEntityListingModel.__init__(self, entity_type, parent, bg_task_manager)
-        
+
+        # the latest publishes change whenever rows come and go
+        self.rowsInserted.connect(self._on_rows_changed)
+        self.rowsRemoved.connect(self._on_rows_changed)
+        self.modelReset.connect(self._on_rows_changed)
 
     def load_data(self, sg_location, show_latest_only):
         """
@@ -43,7 +53,7 @@ class SgLatestPublishListingModel(SgEntityListingModel):
         :param sg_location: Location object representing the *associated*
                object for which items should be loaded. 
                
-        :param show_latest_only: If true, the listing will be culled so that
+        :param show_latest_only: If true, the listing will be filtered so that
                only latest items are shown.
         """
         # figure out our current entity type
@@ -57,83 +67,123 @@ class SgLatestPublishListingModel(SgEntityListingModel):
         SgEntityListingModel.load_data(
             self,
             sg_location,
-            additional_fields=["version", "task", self._publish_type_field],
+            additional_fields=["name", "version", "task", self._publish_type_field],
             sort_field="created_at"
         )
 
+        # the items loaded from the cache may
+        # have superseded each other
+        self.filter_changed.emit()
 
+    def set_show_latest_only(self, show_latest_only):
+        """
+        Changes the latest only setting for the data already loaded.
 
-    def _before_data_processing(self, sg_data_list):
+        :param show_latest_only: If true, the listing will be filtered so that
+               only latest items are shown.
         """
-        Called just after data has been retrieved from Shotgun but before any processing
-        takes place. This makes it possible for deriving classes to perform summaries,
-        calculations and other manipulations of the data before it is passed on to the model
-        class.
+        if show_latest_only != self._show_latest_only:
+            self._show_latest_only = show_latest_only
+            self.filter_changed.emit()
 
-        :param sg_data_list: list of shotgun dictionaries, as returned by the find() call.
-        :returns: should return a list of shotgun dictionaries, on the same form as the input.
+    def filter_accepts_item(self, item):
+        """
+        Checks if an item should be displayed, according
+        to the show latest only setting.
+
+        :param item: Model item
+        :returns: True if the item should be displayed
         """
         if not self._show_latest_only:
-            # show everything
-            new_sg_data_list = sg_data_list
+            return True
 
-        else:
+        sg_data = item.get_sg_data()
+        if not sg_data:
+            return True
 
-            # filter the shotgun data so that we only return the latest publish for each file.
-    
-            # FIRST PASS!
-            # get a dict with only the latest versions, grouped by type and task
-            # rely on the fact that versions are returned in desc order from sg.
-            # (this is defined in SgEntityListingModel)
-            #
-            # for example, if there are these publishes:
-            # name FOO, version 1, task ANIM, type XXX
-            # name FOO, version 2, task ANIM, type XXX
-            # name FOO, version 3, task ANIM, type XXX
-            # name FOO, version 1, task ANIM, type YYY
-            # name FOO, version 2, task ANIM, type YYY
-            # name FOO, version 5, task LAY,  type YYY
-            # name FOO, version 6, task LAY,  type YYY
-            # name FOO, version 7, task LAY,  type YYY
-            #
-            # three items should show up:
-            # - Foo v3 (type XXX)
-            # - Foo v2 (type YYY, task ANIM)
-            # - Foo v7 (type YYY, task LAY)
-                    
-            unique_data = {}
-            
-            # the data is passed from sg in desc order, with the highest version
-            # first.
-            for sg_item in sg_data_list:
-                
-                # get the associated type
-                type_id = None
-                type_link = sg_item[self._publish_type_field]
-                if type_link:
-                    type_id = type_link["id"]
-    
-                # also get the associated task
-                task_id = None
-                task_link = sg_item["task"]
-                if task_link:
-                    task_id = task_link["id"]  
-    
-                # get a unique key to track this publish group
-                unique_key = (sg_item["name"], type_id, task_id)
-    
-                # add records only if a record doesn't already exist
-                # the data arrives in desc order, so we know that
-                # if a record already exists, it must have a higher 
-                # version than the current one. So skip current one.
-                if unique_key not in unique_data: 
-                    unique_data[unique_key] = sg_item            
-            
-            new_sg_data_list = unique_data.values()
-        
-        # now return this culled data set as our new set of shotgun data, now only
-        # including the latest publishes
-        return SgEntityListingModel._before_data_processing(self, new_sg_data_list) 
-                                       
-        
-        
+        if self._latest_ids is None:
+            self._latest_ids = self._get_latest_ids()
+        return sg_data["id"] in self._latest_ids
+
+    def get_filter_fields(self):
+        """
+        Returns the fields that determine the latest publishes.
+
+        :returns: List of shotgun fields
+        """
+        if not self._publish_type_field:
+            return []
+        return ["name", "task", self._publish_type_field, "created_at"]
+
+    def _on_filter_data_changed(self):
+        """
+        Called when the values used to determine the
+        latest publishes have been changed in place.
+        """
+        self._latest_ids = None
+        SgEntityListingModel._on_filter_data_changed(self)
+
+    def _on_rows_changed(self, *args):
+        """
+        Called when rows have been added to or removed from the model.
+        """
+        self._latest_ids = None
+
+    def _get_latest_ids(self):
+        """
+        Computes the latest publishes among the items in the model.
+
+        For example, if there are these publishes:
+        name FOO, version 1, task ANIM, type XXX
+        name FOO, version 2, task ANIM, type XXX
+        name FOO, version 3, task ANIM, type XXX
+        name FOO, version 1, task ANIM, type YYY
+        name FOO, version 2, task ANIM, type YYY
+        name FOO, version 5, task LAY,  type YYY
+        name FOO, version 6, task LAY,  type YYY
+        name FOO, version 7, task LAY,  type YYY
+
+        three items are latest:
+        - Foo v3 (type XXX)
+        - Foo v2 (type YYY, task ANIM)
+        - Foo v7 (type YYY, task LAY)
+
+        :returns: Set of publish ids
+        """
+        sg_data_list = []
+        for row in range(self.rowCount()):
+            sg_data = self.item(row).get_sg_data()
+            if sg_data:
+                sg_data_list.append(sg_data)
+
+        # sort in the order the data is requested from sg,
+        # with the most recent publish first.
+        # (this is defined in SgEntityListingModel)
+        sg_data_list.sort(key=lambda x: (x.get("created_at"), x["id"]), reverse=True)
+
+        unique_data = {}
+        for sg_item in sg_data_list:
+
+            # get the associated type
+            type_id = None
+            type_link = sg_item.get(self._publish_type_field)
+            if type_link:
+                type_id = type_link["id"]
+
+            # also get the associated task
+            task_id = None
+            task_link = sg_item.get("task")
+            if task_link:
+                task_id = task_link["id"]
+
+            # get a unique key to track this publish group
+            unique_key = (sg_item.get("name"), type_id, task_id)
+
+            # add records only if a record doesn't already exist
+            # the data is sorted in desc order, so we know that
+            # if a record already exists, it must have a higher
+            # version than the current one. So skip current one.
+            if unique_key not in unique_data:
+                unique_data[unique_key] = sg_item["id"]
+
+        return set(unique_data.values())
@@ -200,7 +200,7 @@ class TaskAssigneeModel(ShotgunModel):
         """        
         if len(user_ids) > 0:
             fields = ["image"]
-            self._load_data("HumanUser", [["id", "in", user_ids]], ["id"], fields)    
+            self._load_data("HumanUser", utils.canonical_filters([["id", "in", user_ids]]), ["id"], fields)
             self._refresh_data()
 
     def _populate_thumbnail_image(self, item, field, image, path):
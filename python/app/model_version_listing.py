@@ -17,6 +17,12 @@ class SgVersionModel(SgEntityListingModel):
     """
     Special model for versions so that we can control
     how to display items with different review status.
+
+    When all the versions for a location fit within the record
+    limit, the pending versions are filtered on the client, by the
+    listing proxy model, so that the pending versions only option
+    can be toggled without querying Shotgun again. Otherwise the
+    pending versions are queried from Shotgun.
     """
     def __init__(self, entity_type, parent, bg_task_manager):
         """
@@ -27,6 +33,10 @@ class SgVersionModel(SgEntityListingModel):
         :param parent: QT parent object
         """
         self._show_pending_only = False
+        # is the pending filter part of the query?
+        self._pending_on_server = False
+        # location for which all versions have been loaded, if any
+        self._complete_location = None
         
         # init base class
         SgEntityListingModel.__init__(self, entity_type, parent, bg_task_manager)
@@ -38,11 +48,40 @@ class SgVersionModel(SgEntityListingModel):
         # get base class filters
         filters = SgEntityListingModel._get_filters(self)
         
-        if self._show_pending_only:
+        if self._pending_on_server:
             # limit based on status
             filters.append(["sg_status_list", "is", "rev"])
         
         return filters
+
+    def _get_location_key(self, sg_location):
+        """
+        Returns a key identifying a location.
+
+        :param sg_location: Location object
+        :returns: Tuple with entity type and id
+        """
+        return (sg_location.entity_type, sg_location.entity_id)
+
+    def _before_data_processing(self, sg_data_list):
+        """
+        Called just after data has been retrieved from Shotgun but before any processing
+        takes place.
+
+        :param sg_data_list: list of shotgun dictionaries, as returned by the find() call.
+        :returns: should return a list of shotgun dictionaries, on the same form as the input.
+        """
+        sg_data_list = SgEntityListingModel._before_data_processing(self, sg_data_list)
+
+        if not self._pending_on_server:
+            if len(sg_data_list) < self.SG_RECORD_LIMIT:
+                # all the versions are loaded, so pending
+                # versions can be filtered on the client
+                self._complete_location = self._get_location_key(self._sg_location)
+            else:
+                self._complete_location = None
+
+        return sg_data_list
     
     ############################################################################################
     # public interface
@@ -54,19 +93,63 @@ class SgVersionModel(SgEntityListingModel):
         :param sg_location: Location object representing the *associated*
                object for which items should be loaded. 
                
-        :param show_latest_only: If true, the listing will be culled so that
-               only latest items are shown.
+        :param show_pending_only: If true, the listing will be filtered so that
+               only pending items are shown.
         """
         # figure out our current entity type
         self._show_pending_only = show_pending_only
+        self._pending_on_server = show_pending_only and \
+            self._complete_location != self._get_location_key(sg_location)
         
         # make sure that we include the status regardless of how the
         # ui is configured - this is so we can do a status comparison
-        # later in the _get_filters method.
+        # later in the filter_accepts_item method.
         SgEntityListingModel.load_data(
             self,
             sg_location,
             additional_fields=["sg_status_list"],
             sort_field="id"
         )
+        self.filter_changed.emit()
+
+    def set_show_pending_only(self, show_pending_only):
+        """
+        Changes the pending versions only setting for the data already
+        loaded, if this can be done without querying Shotgun.
 
+        :param show_pending_only: If true, the listing will be filtered so that
+               only pending items are shown.
+        :returns: True if the setting was applied, False if the data
+                  needs to be loaded again with :meth:`load_data()`.
+        """
+        if self._sg_location is None or self._pending_on_server or \
+           self._complete_location != self._get_location_key(self._sg_location):
+            return False
+
+        self._show_pending_only = show_pending_only
+        self.filter_changed.emit()
+        return True
+
+    def filter_accepts_item(self, item):
+        """
+        Checks if an item should be displayed, according
+        to the pending versions only setting.
+
+        :param item: Model item
+        :returns: True if the item should be displayed
+        """
+        if not self._show_pending_only or self._pending_on_server:
+            return True
+
+        sg_data = item.get_sg_data()
+        if not sg_data:
+            return True
+        return sg_data.get("sg_status_list") == "rev"
+
+    def get_filter_fields(self):
+        """
+        Returns the fields that the pending versions filter depends on.
+
+        :returns: List of shotgun fields
+        """
+        return ["sg_status_list"]
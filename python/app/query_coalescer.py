@@ -0,0 +1,146 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import copy
+import uuid
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+from . import utils
+
+shotgun_data = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_data")
+shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
+
+
+class QueryCoalescer(QtCore.QObject):
+    """
+    Runs Shotgun finds in the background on behalf of the panel, sharing
+    a single in-flight call between identical requests.
+
+    Requests are identified by their canonical signature, see
+    :meth:`utils.get_query_signature()`. When a find is requested while
+    an identical find is still running, no new call is made. Instead,
+    the result of the running call is passed on to every request once
+    it arrives.
+
+    The interface mirrors the ShotgunDataRetriever: execute_find() returns
+    a unique id and the work_completed and work_failure signals are
+    emitted with that id.
+
+    :signal work_completed(str, str, dict): Emitted for each request when
+        its data has arrived, with the request uid, the request type and
+        a dictionary with the records under the 'sg' key.
+    :signal work_failure(str, str): Emitted for each request when its
+        find failed, with the request uid and the error message.
+    """
+
+    work_completed = QtCore.Signal(str, str, dict)
+    work_failure = QtCore.Signal(str, str)
+
+    def __init__(self, task_manager, parent):
+        """
+        Constructor
+
+        :param task_manager: Task manager to use for background work
+        :param parent: QT parent object
+        """
+        QtCore.QObject.__init__(self, parent)
+
+        # request uids waiting for a running find, keyed by signature
+        self._subscribers = {}
+        # signatures of the running finds, keyed by data retriever uid
+        self._signatures = {}
+
+        self._app = sgtk.platform.current_bundle()
+        self.__sg_data_retriever = shotgun_data.ShotgunDataRetriever(self,
+                                                                     bg_task_manager=task_manager)
+        self.__sg_data_retriever.start()
+        self.__sg_data_retriever.work_completed.connect(self.__on_worker_signal)
+        self.__sg_data_retriever.work_failure.connect(self.__on_worker_failure)
+
+    def execute_find(self, entity_type, filters, fields, order=None, limit=None):
+        """
+        Runs a find in the background, or joins an identical find
+        that is already running.
+
+        :param entity_type: Shotgun entity type
+        :param filters: Std shotgun filters
+        :param fields: List of shotgun fields
+        :param order: List of shotgun orderings, or None
+        :param limit: Maximum number of records, or None
+        :returns: Unique id for the request
+        """
+        uid = uuid.uuid4().hex
+        signature = utils.get_query_signature(entity_type, filters, fields, order, limit)
+
+        if signature in self._subscribers:
+            self._app.log_debug("Joining in-flight %s query." % entity_type)
+            self._subscribers[signature].append(uid)
+            return uid
+
+        kwargs = {}
+        if limit:
+            kwargs["limit"] = limit
+        retriever_uid = self.__sg_data_retriever.execute_find(entity_type,
+                                                              utils.canonical_filters(filters),
+                                                              utils.canonical_fields(fields),
+                                                              utils.canonical_order(order) or None,
+                                                              **kwargs)
+        self._signatures[retriever_uid] = signature
+        self._subscribers[signature] = [uid]
+        return uid
+
+    def cancel(self, uid):
+        """
+        Cancels a request. The find itself keeps running if
+        other requests are waiting for it.
+
+        :param uid: Unique id returned by execute_find()
+        """
+        for subscribers in self._subscribers.itervalues():
+            if uid in subscribers:
+                subscribers.remove(uid)
+                return
+
+    def __on_worker_failure(self, uid, msg):
+        """
+        Asynchronous callback - the worker thread errored.
+
+        :param uid: Unique id for request that failed
+        :param msg: Error message
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        msg = shotgun_model.sanitize_qt(msg)
+        signature = self._signatures.pop(uid, None)
+        if signature is None:
+            return
+        for subscriber_uid in self._subscribers.pop(signature, []):
+            self.work_failure.emit(subscriber_uid, msg)
+
+    def __on_worker_signal(self, uid, request_type, data):
+        """
+        Signaled whenever the worker completes something.
+
+        :param uid: Unique id for request
+        :param request_type: String identifying the request class
+        :param data: the data that was returned
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        data = shotgun_model.sanitize_qt(data)
+        signature = self._signatures.pop(uid, None)
+        if signature is None:
+            return
+        subscribers = self._subscribers.pop(signature, [])
+        # each request gets its own copy of the data, since receivers
+        # may modify it. Copies are taken before any signals are emitted.
+        results = [data] + [copy.deepcopy(data) for _ in subscribers[1:]]
+        for (subscriber_uid, result) in zip(subscribers, results):
+            self.work_completed.emit(subscriber_uid, request_type, result)
@@ -0,0 +1,210 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import uuid
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+from . import utils
+
+shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
+
+
+def split_or_filters(filters):
+    """
+    Splits a list of filters containing an or group into one
+    list of filters per branch of the group.
+
+    For example, [A, {or: [B, C]}] is split into [A, B] and [A, C].
+    Only a single, top level or group is split.
+
+    :param filters: Std shotgun filters
+    :returns: List of filter lists, or None if the filters
+              cannot be split.
+    """
+    or_groups = [
+        x for x in filters
+        if isinstance(x, dict) and x["filter_operator"].lower() in ("or", "any")
+    ]
+    if len(or_groups) != 1 or len(or_groups[0]["filters"]) < 2:
+        return None
+
+    other_filters = [x for x in filters if x is not or_groups[0]]
+    return [other_filters + [x] for x in or_groups[0]["filters"]]
+
+
+def merge_records(sg_data_lists, order=None, limit=None):
+    """
+    Merges the records returned by several finds into a single
+    list, the way a single find would have returned them.
+
+    :param sg_data_lists: List of lists of shotgun dictionaries
+    :param order: List of shotgun orderings, or None
+    :param limit: Maximum number of records, or None
+    :returns: List of shotgun dictionaries, without duplicate
+              ids, sorted and capped at the given limit.
+    """
+    records = {}
+    for sg_data_list in sg_data_lists:
+        for sg_data in sg_data_list:
+            records.setdefault(sg_data["id"], sg_data)
+
+    # sort by id first, so that records with the same values
+    # for the sort fields come out in a stable order. Since the
+    # sorts are stable, sort by the last ordering first.
+    merged = sorted(records.values(), key=lambda x: x["id"])
+    for sg_order in reversed(order or []):
+        merged.sort(key=lambda x: x.get(sg_order["field_name"]),
+                    reverse=sg_order.get("direction") == "desc")
+
+    if limit:
+        merged = merged[:limit]
+    return merged
+
+
+class QuerySplitter(QtCore.QObject):
+    """
+    Runs finds whose filters combine several conditions with OR
+    as one find per condition.
+
+    On large sites, a query like the notes for the current user, which
+    matches notes created by the user, addressed to the user or one of
+    their groups, replied to by the user etc, can be very slow: the
+    server cannot use its indices for the OR of joins across several
+    tables. Each of the branches on its own is a simple query however.
+
+    The branch finds are run in parallel through the query coalescer.
+    Once they have all completed, the records are merged and deduplicated
+    by id, then sorted and capped at the limit, so that the result is the
+    same as the one the single query would have returned. Since each
+    branch is capped at the limit as well, this holds even if some of
+    the branches match more records than the limit.
+
+    The interface mirrors the ShotgunDataRetriever: execute_find() returns
+    a unique id and the work_completed and work_failure signals are
+    emitted with that id.
+
+    :signal work_completed(str, str, dict): Emitted when the data for a
+        request is available, with the request uid, the request type and
+        a dictionary with the merged records under the 'sg' key.
+    :signal work_failure(str, str): Emitted when one of the branch finds
+        of a request failed, with the request uid and the error message.
+    """
+
+    work_completed = QtCore.Signal(str, str, dict)
+    work_failure = QtCore.Signal(str, str)
+
+    def __init__(self, query_coalescer, parent):
+        """
+        Constructor
+
+        :param query_coalescer: :class:`QueryCoalescer` to run finds with
+        :param parent: QT parent object
+        """
+        QtCore.QObject.__init__(self, parent)
+
+        # requests, keyed by request uid. Each value is a dictionary
+        # with the order, limit, the uids of the branch finds still
+        # running and the records returned by the completed ones.
+        self._requests = {}
+        # request uids, keyed by branch find uid
+        self._branches = {}
+
+        self._app = sgtk.platform.current_bundle()
+        self._query_coalescer = query_coalescer
+        self._query_coalescer.work_completed.connect(self.__on_worker_signal)
+        self._query_coalescer.work_failure.connect(self.__on_worker_failure)
+
+    def execute_find(self, entity_type, filters, fields, order=None, limit=None):
+        """
+        Runs a find in the background, split into one find per
+        branch of the or group in the filters.
+
+        :param entity_type: Shotgun entity type
+        :param filters: Std shotgun filters, which can be split
+                        by :meth:`split_or_filters()`
+        :param fields: List of shotgun fields
+        :param order: List of shotgun orderings, or None
+        :param limit: Maximum number of records, or None
+        :returns: Unique id for the request
+        """
+        branch_filters = split_or_filters(filters)
+        if branch_filters is None:
+            raise ValueError("Cannot split filters %s" % (filters,))
+
+        # the order fields are needed to merge the results
+        fields = utils.canonical_fields(list(fields) + [x["field_name"] for x in order or []])
+
+        uid = uuid.uuid4().hex
+        self._requests[uid] = {
+            "order": order,
+            "limit": limit,
+            "pending": set(),
+            "sg_data_lists": []
+        }
+        for filters in branch_filters:
+            branch_uid = self._query_coalescer.execute_find(entity_type, filters, fields, order, limit)
+            self._branches[branch_uid] = uid
+            self._requests[uid]["pending"].add(branch_uid)
+
+        self._app.log_debug("Split %s query into %d queries." % (entity_type, len(branch_filters)))
+        return uid
+
+    def cancel(self, uid):
+        """
+        Cancels a request.
+
+        :param uid: Unique id returned by execute_find()
+        """
+        request = self._requests.pop(uid, None)
+        for branch_uid in (request or {}).get("pending", []):
+            self._branches.pop(branch_uid, None)
+            self._query_coalescer.cancel(branch_uid)
+
+    def __on_worker_failure(self, uid, msg):
+        """
+        Asynchronous callback - the worker thread errored.
+
+        :param uid: Unique id for request that failed
+        :param msg: Error message
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        msg = shotgun_model.sanitize_qt(msg)
+        request_uid = self._branches.pop(uid, None)
+        if request_uid is None:
+            return
+        # the other branches are of no use anymore
+        self.cancel(request_uid)
+        self.work_failure.emit(request_uid, msg)
+
+    def __on_worker_signal(self, uid, request_type, data):
+        """
+        Signaled whenever the worker completes something.
+
+        :param uid: Unique id for request
+        :param request_type: String identifying the request class
+        :param data: the data that was returned
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        data = shotgun_model.sanitize_qt(data)
+        request_uid = self._branches.pop(uid, None)
+        if request_uid is None:
+            return
+
+        request = self._requests[request_uid]
+        request["pending"].discard(uid)
+        request["sg_data_lists"].append([utils.sanitize_sg_data(x) for x in data["sg"]])
+        if request["pending"]:
+            return
+
+        del self._requests[request_uid]
+        sg_data_list = merge_records(request["sg_data_lists"], request["order"], request["limit"])
+        self.work_completed.emit(request_uid, request_type, {"sg": sg_data_list})
@@ -0,0 +1,205 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Statistics for the Shotgun queries issued by the panel models.
+
+Each query is recorded with the location type and tab it was issued
+for, the shape of its filters, the fields requested, the number of
+rows and the approximate size of the returned data. The round trip time
+is measured from the moment the query is requested until its data
+arrives back in the model, so it includes any time spent waiting for a
+background thread.
+
+The report ranks the (location type, tab) combinations by total time
+and attributes the time of queries with deep link fields to the
+shotgun_fields hook definitions which requested them.
+"""
+
+import time
+import threading
+import collections
+
+# number of queries to keep
+MAX_QUERIES = 1000
+
+# number of individual queries listed in the report
+SLOWEST_QUERIES = 10
+
+_lock = threading.Lock()
+_queries = collections.deque(maxlen=MAX_QUERIES)
+
+
+def get_filter_shape(filters):
+    """
+    Returns the shape of a list of filters, with all values removed,
+    so that queries can be grouped regardless of the entity they
+    were issued for.
+
+    :param filters: Std shotgun filters
+    :returns: String, e.g. "[entity is ?, sg_status_list is_not ?]"
+    """
+    shapes = []
+    for sg_filter in filters:
+        if isinstance(sg_filter, dict):
+            shapes.append("%s%s" % (sg_filter["filter_operator"].upper(),
+                                    get_filter_shape(sg_filter["filters"])))
+        else:
+            shapes.append("%s %s ?" % (sg_filter[0], sg_filter[1]))
+    return "[%s]" % ", ".join(shapes)
+
+
+def start_query(location_type, tab, entity_type, filters, fields, deep_link_tokens=None):
+    """
+    Starts recording a query. The query is completed with finish_query().
+
+    :param location_type: Entity type of the location the query is issued for
+    :param tab: Name of the tab, or other part of the UI, the query is issued for
+    :param entity_type: Entity type queried
+    :param filters: Std shotgun filters used for the query
+    :param fields: List of fields requested
+    :param deep_link_tokens: Dictionary mapping deep link fields to the
+                             hook definitions they originate from.
+    :returns: Query record to pass to finish_query()
+    """
+    deep_links = sorted(x for x in fields if "." in x)
+    return {
+        "location_type": location_type,
+        "tab": tab,
+        "entity_type": entity_type,
+        "filter_shape": get_filter_shape(filters),
+        "fields": sorted(fields),
+        "deep_links": deep_links,
+        "deep_link_tokens": dict((x, sorted((deep_link_tokens or {}).get(x, []))) for x in deep_links),
+        "start_time": time.time(),
+        "duration": None,
+        "rows": None,
+        "bytes": None,
+    }
+
+
+def finish_query(query, sg_data_list):
+    """
+    Completes and stores a query record.
+
+    :param query: Record returned by start_query(). None is ignored.
+    :param sg_data_list: List of shotgun dictionaries returned by the query
+    """
+    if query is None or query["duration"] is not None:
+        return
+
+    query["duration"] = time.time() - query["start_time"]
+    query["rows"] = len(sg_data_list)
+    # approximation of the size of the payload
+    query["bytes"] = len(repr(sg_data_list))
+
+    with _lock:
+        _queries.append(query)
+
+
+def get_queries():
+    """
+    Returns the recorded queries.
+
+    :returns: List of query records, oldest first
+    """
+    with _lock:
+        return list(_queries)
+
+
+def clear():
+    """
+    Discards all recorded queries.
+    """
+    with _lock:
+        _queries.clear()
+
+
+def get_report():
+    """
+    Returns a report ranking the most expensive queries.
+
+    :returns: Report as a string
+    """
+    queries = get_queries()
+    if not queries:
+        return "No queries have been recorded."
+
+    lines = []
+
+    # time per location type and tab
+    groups = {}
+    for query in queries:
+        key = (query["location_type"], query["tab"])
+        group = groups.setdefault(key, {"count": 0, "total": 0.0, "max": 0.0, "rows": 0, "bytes": 0})
+        group["count"] += 1
+        group["total"] += query["duration"]
+        group["max"] = max(group["max"], query["duration"])
+        group["rows"] += query["rows"]
+        group["bytes"] += query["bytes"]
+
+    lines.append("Time per location type and tab:")
+    lines.append("%-20s %-24s %6s %10s %10s %10s %10s" % (
+        "location", "tab", "count", "total ms", "mean ms", "max ms", "mean kb"))
+    for ((location_type, tab), group) in sorted(groups.iteritems(), key=lambda x: x[1]["total"], reverse=True):
+        lines.append("%-20s %-24s %6d %10.0f %10.0f %10.0f %10.1f" % (
+            location_type,
+            tab,
+            group["count"],
+            group["total"] * 1000,
+            group["total"] / group["count"] * 1000,
+            group["max"] * 1000,
+            group["bytes"] / 1024.0 / group["count"],
+        ))
+
+    # slowest individual queries
+    lines.append("")
+    lines.append("Slowest queries:")
+    for query in sorted(queries, key=lambda x: x["duration"], reverse=True)[:SLOWEST_QUERIES]:
+        lines.append("%.0f ms  %s on %s (%s): %s %s, %d fields, %d deep links, %d rows, %.1f kb" % (
+            query["duration"] * 1000,
+            query["tab"],
+            query["location_type"],
+            time.strftime("%H:%M:%S", time.localtime(query["start_time"])),
+            query["entity_type"],
+            query["filter_shape"],
+            len(query["fields"]),
+            len(query["deep_links"]),
+            query["rows"],
+            query["bytes"] / 1024.0,
+        ))
+
+    # deep link attribution. The time of a query is attributed to each
+    # of its deep links, so the totals show which deep links are part of
+    # the expensive queries rather than their exact cost.
+    deep_links = {}
+    for query in queries:
+        for field in query["deep_links"]:
+            key = (query["entity_type"], field)
+            entry = deep_links.setdefault(key, {"count": 0, "total": 0.0, "tokens": set()})
+            entry["count"] += 1
+            entry["total"] += query["duration"]
+            entry["tokens"].update(query["deep_link_tokens"].get(field, []))
+
+    if deep_links:
+        lines.append("")
+        lines.append("Deep link fields, by time of the queries including them:")
+        for ((entity_type, field), entry) in sorted(deep_links.iteritems(),
+                                                    key=lambda x: x[1]["total"],
+                                                    reverse=True):
+            lines.append("%s.%s: %d queries, %.0f ms, requested by %s" % (
+                entity_type,
+                field,
+                entry["count"],
+                entry["total"] * 1000,
+                ", ".join(sorted(entry["tokens"])) or "the panel"
+            ))
+
+    return "\n".join(lines)
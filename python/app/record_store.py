@@ -0,0 +1,208 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import collections
+
+from sgtk.platform.qt import QtCore
+
+
+class RecordStore(QtCore.QObject):
+    """
+    Session wide store of the Shotgun records loaded by the panel models,
+    keyed by (type, id).
+
+    Each field value is stored with the time it was read from Shotgun,
+    or written by the panel. Models write the data from their queries
+    into the store and read back any values which the store holds in a
+    fresher state. For example, a listing that was requested before an
+    action updated a record picks up the updated value rather than
+    displaying the stale one returned by its query.
+
+    Whenever the store receives a fresher value for a field, a
+    records_changed signal is emitted, so that every view displaying
+    the record can be brought up to date.
+
+    The store also keeps track of the fields being read in the
+    background, so that overlapping reads of the same records
+    can be skipped.
+
+    :signal records_changed(list): Emitted when fresher values have been
+        written for a set of records. The list contains shotgun data
+        dictionaries with type, id and the changed fields.
+    """
+
+    # maximum number of records kept. The least recently
+    # used records are dropped when there are more.
+    MAX_RECORDS = 5000
+
+    records_changed = QtCore.Signal(list)
+
+    def __init__(self, parent):
+        """
+        :param parent: QT parent object
+        """
+        QtCore.QObject.__init__(self, parent)
+
+        # (type, id) -> {field: (value, timestamp)}, least recently used first
+        self._records = collections.OrderedDict()
+
+        # (type, id) -> set of fields being read
+        self._fetches = {}
+
+    def __len__(self):
+        """
+        Number of records in the store
+        """
+        return len(self._records)
+
+    @property
+    def records(self):
+        """
+        The stored records, as a dictionary keyed by (type, id) where each
+        value is a dictionary of field -> (value, timestamp)
+        """
+        return self._records
+
+    def _get_fields(self, entity_type, entity_id, create=False):
+        """
+        Returns the stored fields for a record and marks it as recently used.
+
+        :param entity_type: Shotgun entity type
+        :param entity_id: Shotgun entity id
+        :param create: Create the record if it doesn't exist
+        :returns: Dictionary of field -> (value, timestamp), or None
+        """
+        key = (entity_type, entity_id)
+        fields = self._records.pop(key, None)
+        if fields is None:
+            if not create:
+                return None
+            fields = {}
+            while len(self._records) >= self.MAX_RECORDS:
+                self._records.popitem(last=False)
+        self._records[key] = fields
+        return fields
+
+    def get_record(self, entity_type, entity_id, fields=None):
+        """
+        Returns the stored values for a record.
+
+        :param entity_type: Shotgun entity type
+        :param entity_id: Shotgun entity id
+        :param fields: List of fields to return, or None for all stored fields
+        :returns: Shotgun data dictionary with type, id and the stored fields
+                  out of the requested ones, or None if the record isn't stored.
+        """
+        stored_fields = self._get_fields(entity_type, entity_id)
+        if stored_fields is None:
+            return None
+
+        sg_data = {"type": entity_type, "id": entity_id}
+        for (field_name, (value, _)) in stored_fields.iteritems():
+            if fields is None or field_name in fields:
+                sg_data[field_name] = value
+        return sg_data
+
+    def write(self, sg_records, timestamp, notify=True):
+        """
+        Writes field values into the store. Values are only stored
+        if they are at least as fresh as the values already stored.
+
+        :param sg_records: List of shotgun dictionaries with type, id and
+                           any number of field values.
+        :param timestamp: Time at which the values were read from, or
+                          written to, Shotgun.
+        :param notify: Emit a records_changed signal for changed values.
+        :returns: List of shotgun dictionaries with type, id and the
+                  fields whose values were changed.
+        """
+        changed_records = []
+        for sg_record in sg_records:
+            stored_fields = self._get_fields(sg_record["type"], sg_record["id"], create=True)
+            changed_record = {}
+            for (field_name, value) in sg_record.iteritems():
+                if field_name in ["type", "id"]:
+                    continue
+                if field_name in stored_fields:
+                    (stored_value, stored_timestamp) = stored_fields[field_name]
+                    if stored_timestamp > timestamp:
+                        continue
+                    if stored_value != value:
+                        changed_record[field_name] = value
+                stored_fields[field_name] = (value, timestamp)
+
+            if changed_record:
+                changed_record["type"] = sg_record["type"]
+                changed_record["id"] = sg_record["id"]
+                changed_records.append(changed_record)
+
+        if notify and changed_records:
+            self.records_changed.emit(changed_records)
+
+        return changed_records
+
+    def merge(self, sg_data_list, timestamp, notify=True):
+        """
+        Merges the records returned by a query with the store.
+
+        Fields for which the store holds a fresher value are updated in
+        place. All other fields are written into the store, and a
+        records_changed signal is emitted if this changed any values.
+
+        :param sg_data_list: List of shotgun dictionaries, as returned by a
+                             find() call, modified in place.
+        :param timestamp: Time at which the query was issued.
+        :param notify: Emit a records_changed signal for changed values.
+        :returns: The given list of shotgun dictionaries
+        """
+        for sg_data in sg_data_list:
+            stored_fields = self._get_fields(sg_data["type"], sg_data["id"])
+            for (field_name, (value, stored_timestamp)) in (stored_fields or {}).iteritems():
+                if field_name in sg_data and stored_timestamp > timestamp:
+                    sg_data[field_name] = value
+
+        self.write(sg_data_list, timestamp, notify)
+        return sg_data_list
+
+    def claim_fetch(self, entity_type, entity_ids, fields):
+        """
+        Registers a background read of a set of records. Records for which
+        all the given fields are already being read are left out.
+
+        :param entity_type: Shotgun entity type
+        :param entity_ids: List of Shotgun ids to read
+        :param fields: List of fields to read
+        :returns: List of Shotgun ids which should be read. These must be
+                  released with release_fetch() once the read has completed.
+        """
+        fields = set(fields)
+        claimed_ids = []
+        for entity_id in entity_ids:
+            fetching_fields = self._fetches.setdefault((entity_type, entity_id), set())
+            if not fields.issubset(fetching_fields):
+                fetching_fields.update(fields)
+                claimed_ids.append(entity_id)
+        return claimed_ids
+
+    def release_fetch(self, entity_type, entity_ids, fields):
+        """
+        Unregisters a background read registered by claim_fetch().
+
+        :param entity_type: Shotgun entity type
+        :param entity_ids: List of Shotgun ids that were read
+        :param fields: List of fields that were read
+        """
+        for entity_id in entity_ids:
+            key = (entity_type, entity_id)
+            fetching_fields = self._fetches.get(key)
+            if fetching_fields is not None:
+                fetching_fields.difference_update(fields)
+                if not fetching_fields:
+                    del self._fetches[key]
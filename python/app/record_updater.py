@@ -0,0 +1,253 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import time
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+from . import utils
+
+shotgun_data = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_data")
+shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
+
+class RecordUpdater(QtCore.QObject):
+    """
+    Class that asynchronously reads and writes individual Shotgun records,
+    for example when an action has modified them. This makes it possible
+    to bring the records displayed in the UI up to date without having
+    to reload entire listings.
+
+    Updates are applied optimistically: the expected values are broadcast
+    straight away, before the update has been carried out in Shotgun, and
+    rolled back if the update fails.
+
+    All values read and written are recorded in the record store, and
+    records which are already being re-read are not read again.
+
+    :signal records_updated(list): Emitted when new data is available for a
+        set of records, either read from Shotgun or optimistically computed 
+        ahead of an update. The list contains sanitized shotgun data dictionaries.
+    :signal records_committed(list): Emitted when an update has been written
+        to Shotgun. The list contains the records returned by the update.
+    :signal update_failed(list, str): Emitted when an update could not be
+        written. The list contains shotgun data dictionaries with the
+        original values that should be restored in the UI and the string
+        holds the error message.
+    """
+
+    records_updated = QtCore.Signal(list)
+    records_committed = QtCore.Signal(list)
+    update_failed = QtCore.Signal(list, str)
+
+    def __init__(self, task_manager, query_coalescer, record_store, parent):
+        """
+        Constructor
+
+        :param task_manager: Task manager to use for background work
+        :param query_coalescer: :class:`QueryCoalescer` to re-read records with
+        :param record_store: :class:`RecordStore` shared by the panel models
+        :param parent: QT parent object
+        """
+        QtCore.QObject.__init__(self, parent)
+
+        self._record_store = record_store
+
+        # records being re-read, keyed by request uid. Each value
+        # is a tuple with (entity_type, entity_ids, fields, timestamp)
+        self._refreshes = {}
+        
+        # original values for records being updated, keyed by request uid
+        self._rollback_records = {}
+
+        self._app = sgtk.platform.current_bundle()
+        self.__sg_data_retriever = shotgun_data.ShotgunDataRetriever(self,
+                                                                     bg_task_manager=task_manager)
+        self.__sg_data_retriever.start()
+        self.__sg_data_retriever.work_completed.connect(self.__on_worker_signal)
+        self.__sg_data_retriever.work_failure.connect(self.__on_worker_failure)
+
+        self._query_coalescer = query_coalescer
+        self._query_coalescer.work_completed.connect(self.__on_worker_signal)
+        self._query_coalescer.work_failure.connect(self.__on_worker_failure)
+
+    def __on_worker_failure(self, uid, msg):
+        """
+        Asynchronous callback - the worker thread errored.
+
+        :param uid: Unique id for request that failed
+        :param msg: Error message
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        msg = shotgun_model.sanitize_qt(msg)
+        if uid in self._refreshes:
+            self._app.log_warning("Could not refresh records: %s" % msg)
+            (entity_type, entity_ids, fields, _) = self._refreshes.pop(uid)
+            self._record_store.release_fetch(entity_type, entity_ids, fields)
+            
+        elif uid in self._rollback_records:
+            self._app.log_warning("Could not update records: %s" % msg)
+            rollback_records = self._rollback_records.pop(uid)
+            self._record_store.write(rollback_records, time.time(), notify=False)
+            self.update_failed.emit(rollback_records, msg)
+
+    def __on_worker_signal(self, uid, request_type, data):
+        """
+        Signaled whenever the worker completes something.
+        This method will dispatch the work to different methods
+        depending on what async task has completed.
+
+        :param uid: Unique id for request
+        :param request_type: String identifying the request class
+        :param data: the data that was returned
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        data = shotgun_model.sanitize_qt(data)
+        if uid in self._refreshes:
+            (entity_type, entity_ids, fields, timestamp) = self._refreshes.pop(uid)
+            self._record_store.release_fetch(entity_type, entity_ids, fields)
+            sg_records = [utils.sanitize_sg_data(x) for x in data["sg"]]
+            self._app.log_debug("Refreshed %d records." % len(sg_records))
+            # values written to the store while the records were
+            # being read are fresher than the values read
+            self._record_store.merge(sg_records, timestamp, notify=False)
+            self.records_updated.emit(sg_records)
+            
+        elif uid in self._rollback_records:
+            del self._rollback_records[uid]
+            sg_records = [utils.sanitize_sg_data(x) for x in data["return_value"]]
+            self._app.log_debug("Updated %d records." % len(sg_records))
+            self._record_store.write(sg_records, time.time(), notify=False)
+            self.records_committed.emit(sg_records)
+
+    def refresh_records(self, entity_type, entity_ids, fields):
+        """
+        Re-read a set of records from Shotgun.
+        Once the data has arrived, a records_updated signal is emitted.
+
+        :param entity_type: Shotgun entity type to read
+        :param entity_ids: List of Shotgun ids to read
+        :param fields: List of fields to retrieve
+        """
+        # skip records which are already being re-read
+        entity_ids = self._record_store.claim_fetch(entity_type, entity_ids, fields)
+        if len(entity_ids) == 0:
+            return
+
+        timestamp = time.time()
+        uid = self._query_coalescer.execute_find(entity_type,
+                                                 [["id", "in", entity_ids]],
+                                                 fields)
+        self._refreshes[uid] = (entity_type, entity_ids, fields, timestamp)
+
+    def update_records(self, update_requests, sg_data):
+        """
+        Write a list of updates to Shotgun in the background.
+        
+        Each update request is a dictionary with type, id and update keys,
+        where update is a dictionary of field values to write. Multi entity
+        fields can be appended to or removed from by passing an optional 
+        multi_entity_update_modes dictionary, using the same syntax as the
+        Shotgun API update() method, which supports it from v3.0.23.
+        
+        Updates to the record represented by sg_data are applied optimistically, 
+        meaning that a records_updated signal is emitted straight away with 
+        the expected new values. If the update fails, the original values are 
+        passed back via the update_failed signal.
+        
+        :param update_requests: List of update request dictionaries
+        :param sg_data: Shotgun data for the item that is being operated on
+        """
+        new_records = []
+        rollback_records = []
+        for update_request in update_requests:
+            if update_request["type"] == sg_data.get("type") and update_request["id"] == sg_data.get("id"):
+                (new_record, rollback_record) = self._get_optimistic_update(update_request, sg_data)
+                new_records.append(new_record)
+                rollback_records.append(rollback_record)
+        
+        uid = self.__sg_data_retriever.execute_method(self._update_records, update_requests)
+        self._rollback_records[uid] = rollback_records
+        
+        if len(new_records) > 0:
+            self._record_store.write(new_records, time.time(), notify=False)
+            self.records_updated.emit(new_records)
+    
+    def _get_optimistic_update(self, update_request, sg_data):
+        """
+        Computes the values that a record is expected to have once
+        an update request has been carried out.
+        
+        :param update_request: Update request dictionary
+        :param sg_data: Current shotgun data for the record
+        :returns: Tuple with (new_record, rollback_record) shotgun dictionaries,
+                  holding the expected new values and the current values for
+                  all fields affected by the update.
+        """
+        update_modes = update_request.get("multi_entity_update_modes") or {}
+        
+        new_record = {"type": update_request["type"], "id": update_request["id"]}
+        rollback_record = {"type": update_request["type"], "id": update_request["id"]}
+        
+        for (field_name, value) in update_request["update"].iteritems():
+            if field_name not in sg_data:
+                # we don't know the current value
+                continue
+            
+            rollback_record[field_name] = sg_data[field_name]
+            update_mode = update_modes.get(field_name, "set")
+            if update_mode == "set":
+                new_record[field_name] = value
+            else:
+                new_record[field_name] = self._merge_entity_lists(sg_data[field_name] or [],
+                                                                  value,
+                                                                  update_mode)
+        
+        return (new_record, rollback_record)
+    
+    def _merge_entity_lists(self, current_entities, entities, update_mode):
+        """
+        Adds or removes entities from a multi entity field value.
+        
+        :param current_entities: List of entity dictionaries currently in the field
+        :param entities: List of entity dictionaries to add or remove
+        :param update_mode: Either 'add' or 'remove'
+        :returns: New list of entity dictionaries
+        """
+        keys = set([(x["type"], x["id"]) for x in entities])
+        
+        if update_mode == "remove":
+            return [x for x in current_entities if (x["type"], x["id"]) not in keys]
+        
+        current_keys = set([(x["type"], x["id"]) for x in current_entities])
+        return current_entities + [x for x in entities if (x["type"], x["id"]) not in current_keys]
+    
+    def _update_records(self, sg, update_requests):
+        """
+        Async callback called by the data retriever.
+        Carries out the given update requests.
+        
+        :param sg: Shotgun API instance
+        :param update_requests: List of update request dictionaries
+        :returns: List of records returned by the Shotgun updates
+        """
+        sg_records = []
+        for update_request in update_requests:
+            # appends and removals are resolved by the server, so that
+            # concurrent edits of the same field don't overwrite each other
+            kwargs = {}
+            if update_request.get("multi_entity_update_modes"):
+                kwargs["multi_entity_update_modes"] = update_request["multi_entity_update_modes"]
+            sg_records.append(sg.update(update_request["type"],
+                                        update_request["id"],
+                                        update_request["update"],
+                                        **kwargs))
+        
+        return sg_records
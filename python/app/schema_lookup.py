@@ -0,0 +1,151 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Lookup tables for the schema derived values used when formatting
+Shotgun data, such as display names and status colors.
+
+The shotgun_globals accessors are relatively expensive and are called
+for every field that is formatted. This module keeps the results in
+plain dictionaries, so that repeated lookups are O(1). The tables are
+populated as values are requested and are discarded whenever the schema
+is (re)loaded. Before the schema has been loaded, lookups are passed
+straight through to shotgun_globals and nothing is stored, since the
+values returned at that point are only fallbacks.
+"""
+
+import sgtk
+
+shotgun_globals = sgtk.platform.import_framework(
+    "tk-framework-shotgunutils",
+    "shotgun_globals",
+)
+
+# lookup tables, keyed by table name
+_tables = {}
+
+# whether the schema has been loaded and values can be stored
+_schema_loaded = False
+
+def reset():
+    """
+    Clears all lookup tables and waits for the schema to be loaded
+    before values are stored again. This should be called whenever
+    a new background task manager is registered with shotgun_globals.
+    """
+    global _schema_loaded
+    _tables.clear()
+    _schema_loaded = False
+    shotgun_globals.run_on_schema_loaded(_on_schema_loaded)
+
+def _on_schema_loaded():
+    """
+    Callback executed by shotgun_globals once the schema has been loaded.
+    """
+    global _schema_loaded
+    _tables.clear()
+    _schema_loaded = True
+
+def _lookup(table_name, key, method, *args):
+    """
+    Returns a value from a lookup table, computing it if necessary.
+
+    :param table_name: Name of the table to look in
+    :param key: Key to look up
+    :param method: Method to compute the value with if it isn't found
+    :param args: Arguments to pass to the method
+    :returns: The value for the given key
+    """
+    if not _schema_loaded:
+        return method(*args)
+
+    table = _tables.setdefault(table_name, {})
+    if key not in table:
+        table[key] = method(*args)
+    return table[key]
+
+def get_type_display_name(entity_type):
+    """
+    Returns the display name for an entity type.
+
+    :param entity_type: Shotgun entity type, e.g. CustomEntity013
+    :returns: Display name, e.g. Level
+    """
+    return _lookup("type_display_name",
+                   entity_type,
+                   shotgun_globals.get_type_display_name,
+                   entity_type)
+
+def get_field_display_name(entity_type, field_name):
+    """
+    Returns the display name for a field.
+
+    :param entity_type: Shotgun entity type
+    :param field_name: Shotgun field name
+    :returns: Display name for the field
+    """
+    return _lookup("field_display_name",
+                   (entity_type, field_name),
+                   shotgun_globals.get_field_display_name,
+                   entity_type,
+                   field_name)
+
+def get_empty_phrase(entity_type, field_name):
+    """
+    Returns the string to display for a field without a value.
+
+    :param entity_type: Shotgun entity type
+    :param field_name: Shotgun field name
+    :returns: Empty phrase string
+    """
+    return _lookup("empty_phrase",
+                   (entity_type, field_name),
+                   shotgun_globals.get_empty_phrase,
+                   entity_type,
+                   field_name)
+
+def get_status_html(status_code):
+    """
+    Returns an html fragment representing a status, consisting of
+    the status display name, prefixed by a box in the status color
+    if a color has been defined for the status.
+
+    :param status_code: Shotgun status code, e.g. ip
+    :returns: Html string
+    """
+    table = _tables.get("status_html", {})
+    if status_code in table:
+        return table[status_code]
+
+    str_val = _create_status_html(status_code)
+
+    # the status list is loaded separately from the schema. Until it
+    # has been loaded, the display name is the status code itself and
+    # there is no color, so only store values that aren't such fallbacks.
+    if _schema_loaded and str_val != status_code:
+        _tables.setdefault("status_html", {})[status_code] = str_val
+    return str_val
+
+def _create_status_html(status_code):
+    """
+    Creates the html fragment returned by get_status_html().
+
+    :param status_code: Shotgun status code
+    :returns: Html string
+    """
+    str_val = shotgun_globals.get_status_display_name(status_code)
+
+    color_str = shotgun_globals.get_status_color(status_code)
+    if color_str:
+        # append colored box to indicate status color
+        str_val = ("<span style='color: rgb(%s)'>"
+                   "&#9608;</span>&nbsp;%s" % (color_str, str_val))
+
+    return str_val
@@ -0,0 +1,131 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+from . import schema_lookup
+
+task_manager = sgtk.platform.import_framework("tk-framework-shotgunutils", "task_manager")
+shotgun_globals = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_globals")
+
+class SchemaPreloader(QtCore.QObject):
+    """
+    Loads the Shotgun schema and status list in the background,
+    ahead of the panel being opened, so that the first formatting pass
+    doesn't have to wait for them.
+
+    Once the schema has arrived, the schema lookup tables are populated
+    for the entity types that the panel is most likely to display and
+    the background thread used for the load is shut down.
+    """
+
+    # entity types displayed in the panel's listings,
+    # in addition to the ones that have actions configured
+    LISTING_ENTITY_TYPES = ["Project", "HumanUser", "Note", "Version", "PublishedFile", "Task"]
+
+    def __init__(self, parent=None):
+        """
+        Constructor
+
+        :param parent: QT parent object
+        """
+        QtCore.QObject.__init__(self, parent)
+        self._app = sgtk.platform.current_bundle()
+        self._task_manager = None
+        self._entity_types = []
+        self._schema_loaded = False
+
+    def _get_entity_types(self):
+        """
+        Returns the entity types to populate the lookup tables for.
+
+        :returns: List of Shotgun entity types
+        """
+        entity_types = list(self.LISTING_ENTITY_TYPES)
+        entity_types.extend(self._app.get_setting("action_mappings").keys())
+        if self._app.context.entity:
+            entity_types.append(self._app.context.entity["type"])
+
+        return sorted(set(entity_types))
+
+    def _on_schema_loaded(self):
+        """
+        Callback executed by shotgun_globals once the schema has been loaded.
+        Populates the schema lookup tables and shuts down the background thread.
+        """
+        if self._task_manager is None:
+            # stopped before the schema arrived
+            return
+
+        self._app.log_debug("Schema loaded, populating lookup tables for %s" % self._entity_types)
+
+        for entity_type in self._entity_types:
+            schema_lookup.get_type_display_name(entity_type)
+
+            all_fields = self._app.execute_hook_method("shotgun_fields_hook",
+                                                       "get_all_fields",
+                                                       entity_type=entity_type)
+            for field_name in all_fields:
+                if "." in field_name:
+                    # deep links are not part of this type's schema
+                    continue
+                schema_lookup.get_field_display_name(entity_type, field_name)
+                schema_lookup.get_empty_phrase(entity_type, field_name)
+
+        # we are being called from within a task manager signal,
+        # so shut it down once control returns to the event loop
+        self._schema_loaded = True
+        QtCore.QTimer.singleShot(0, self._on_load_completed)
+
+    def _on_load_completed(self):
+        """
+        Shuts down the background thread once the schema has been loaded.
+        """
+        # make sure that a new load hasn't been started in the meantime
+        if self._schema_loaded:
+            self.stop()
+
+    def start(self):
+        """
+        Starts loading the schema in the background. Any previously
+        started load is stopped and the lookup tables are cleared.
+        """
+        self.stop()
+
+        self._entity_types = self._get_entity_types()
+        self._schema_loaded = False
+        self._app.log_debug("Preloading schema for %s" % self._entity_types)
+
+        # a single worker thread is enough for the schema
+        # and keeps the load from competing with the host application
+        self._task_manager = task_manager.BackgroundTaskManager(self,
+                                                                start_processing=True,
+                                                                max_threads=1)
+        shotgun_globals.register_bg_task_manager(self._task_manager)
+
+        schema_lookup.reset()
+        shotgun_globals.run_on_schema_loaded(self._on_schema_loaded)
+
+        # requesting a display name triggers the async load of
+        # the schema and the status list if they aren't cached
+        for entity_type in self._entity_types:
+            shotgun_globals.get_type_display_name(entity_type)
+
+    def stop(self):
+        """
+        Stops any background load in progress.
+        """
+        if self._task_manager is None:
+            return
+
+        shotgun_globals.unregister_bg_task_manager(self._task_manager)
+        self._task_manager.shut_down()
+        self._task_manager = None
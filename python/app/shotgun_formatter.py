@@ -15,11 +15,9 @@ import re
 import datetime
 import pprint
 from . import utils
+from . import schema_lookup
+from . import tracing
 
-shotgun_globals = sgtk.platform.import_framework(
-    "tk-framework-shotgunutils",
-    "shotgun_globals",
-)
 qtwidgets_utils = sgtk.platform.import_framework(
     "tk-framework-qtwidgets",
     "utils",
@@ -35,6 +33,9 @@ class ShotgunTypeFormatter(object):
     the shotgun_fields hook which defines how information should be
     presented, which fields should be displayed etc.
     """
+
+    # displayed in place of values which haven't been loaded yet
+    PENDING_VALUE = "..."
     
     def __init__(self, entity_type):
         """
@@ -61,14 +62,18 @@ class ShotgunTypeFormatter(object):
                                                                                     "get_main_view_definition", 
                                                                                     entity_type=entity_type)
         
-        # extract a list of fields given all the different {tokens} defined
+        # extract the fields given all the different {tokens} defined. The list
+        # items and the main details view each get their own set of fields,
+        # so that queries only retrieve what is being displayed.
+        # keep track of which hook tokens add deep links, since these are
+        # expensive to resolve on the server.
+        self._deep_link_tokens = {}
+        list_fields = self._resolve_hook_fields("get_list_item_definition", ["top_left", "top_right", "body"])
+        details_fields = self._resolve_hook_fields("get_main_view_definition", ["title", "body"])
+
+        # fields needed regardless of how the data is displayed
         fields = []
-        fields += self._resolve_sg_fields( self._get_hook_value("get_list_item_definition", "top_left") )
-        fields += self._resolve_sg_fields( self._get_hook_value("get_list_item_definition", "top_right") )
-        fields += self._resolve_sg_fields( self._get_hook_value("get_list_item_definition", "body") )
-        fields += self._resolve_sg_fields( self._get_hook_value("get_main_view_definition", "title") )
-        fields += self._resolve_sg_fields( self._get_hook_value("get_main_view_definition", "body") )
-        
+
         # also include the thumbnail field so that it gets retrieved as part of the general 
         # query payload
         fields.extend(self.thumbnail_fields)
@@ -76,14 +81,29 @@ class ShotgunTypeFormatter(object):
         # include the special quicktime field for versions
         if entity_type == "Version":
             fields.append("sg_uploaded_movie")
+            fields.append("sg_path_to_movie")
             fields.append("sg_path_to_frames")
         if entity_type == "Note":
             fields.append("read_by_current_user")
             fields.append("client_note")
+
+        # the action hooks are passed the data of the list rows as well
+        # as the details view, and rely on the standard publish fields
+        # being present, e.g. to name references after the entity.
         if entity_type == "PublishedFile":
-            fields.append("path")
-        
-        self._token_fields = set(fields)
+            fields.extend(["path", "entity", "code", "name", "task",
+                           "version_number", "published_file_type"])
+        if entity_type == "TankPublishedFile":
+            fields.extend(["path", "entity", "code", "name", "task",
+                           "version_number", "tank_type"])
+
+        # actions are available both in listings and in the details
+        # view, so include the fields that the action mappings filter on
+        for mapping in self._app.get_setting("action_mappings").get(entity_type) or []:
+            fields.extend((mapping["filters"] or {}).keys())
+
+        self._list_fields = set(list_fields + fields)
+        self._details_fields = set(details_fields + fields)
         
     def __repr__(self):
         return "<Shotgun '%s' type formatter>" % self._entity_type
@@ -106,6 +126,23 @@ class ShotgunTypeFormatter(object):
         
         return fields
         
+    def _resolve_hook_fields(self, method_name, hook_keys):
+        """
+        Returns the sg fields for all tokens in the given
+        shotgun_fields hook definitions, recording any deep links.
+
+        :param method_name: shotgun_fields hook method, e.g. 'get_list_item_definition'
+        :param hook_keys: Keys of the definition to resolve, e.g. ['top_left', 'body']
+        :returns: List of shotgun fields
+        """
+        fields = []
+        for hook_key in hook_keys:
+            for sg_field in self._resolve_sg_fields(self._get_hook_value(method_name, hook_key)):
+                fields.append(sg_field)
+                if "." in sg_field:
+                    self._deep_link_tokens.setdefault(sg_field, set()).add("%s.%s" % (method_name, hook_key))
+        return fields
+
     def _resolve_tokens(self, token_str):
         """
         Resolve a list of tokens from a string.
@@ -224,7 +261,7 @@ class ShotgunTypeFormatter(object):
         str_val = ""
         
         if value is None:            
-            return shotgun_globals.get_empty_phrase(sg_type, sg_field)
+            return schema_lookup.get_empty_phrase(sg_type, sg_field)
         
         elif isinstance(value, dict) and set(["type", "id", "name"]) == set(value.keys()):
             # entity link
@@ -234,7 +271,7 @@ class ShotgunTypeFormatter(object):
                 
                 # get the nice name from our schema
                 # this is so that it says "Level" instead of "CustomEntity013"
-                entity_type_display_name = shotgun_globals.get_type_display_name(value["type"])                
+                entity_type_display_name = schema_lookup.get_type_display_name(value["type"])                
                 link_name = "%s %s" % (entity_type_display_name, value["name"])
             else:
                 # links are just "ABC123"
@@ -260,13 +297,8 @@ class ShotgunTypeFormatter(object):
             (str_val, _) = utils.create_human_readable_timestamp(created_datetime) 
             
         elif sg_field == "sg_status_list":
-            str_val = shotgun_globals.get_status_display_name(value)
-            
-            color_str = shotgun_globals.get_status_color(value)
-            if color_str:
-                # append colored box to indicate status color
-                str_val = ("<span style='color: rgb(%s)'>"
-                           "&#9608;</span>&nbsp;%s" % (color_str, str_val))
+            # status name, with a colored box to indicate status color
+            str_val = schema_lookup.get_status_html(value)
             
         else:
             str_val = str(value)
@@ -285,16 +317,23 @@ class ShotgunTypeFormatter(object):
         else:
             return True
         
-    def _convert_token_string(self, token_str, sg_data):
+    def _convert_token_string(self, token_str, sg_data, partial=False):
         """
         Convert a string with {tokens} given a shotgun data dict
         
         :param token_str: Token string as defined in the shotgun fields hook
         :param sg_data: Data dictionary to get values from
+        :param partial: If True, tokens for fields which are not included in
+               the data dictionary are replaced with a placeholder.
         :returns: string with tokens replaced with actual values
         """
         # extract all tokens and process them one after the other
         for (full_token, sg_fields, directive, pre_roll, post_roll) in self._resolve_tokens(token_str):
+
+            if partial and not [x for x in sg_fields if x in sg_data]:
+                # the value hasn't been loaded yet
+                token_str = token_str.replace("{%s}" % full_token, self.PENDING_VALUE)
+                continue
             
             # get the first sg field value we find
             # this is usef when we have a fallback syntax in the token string,
@@ -381,12 +420,35 @@ class ShotgunTypeFormatter(object):
         """
         return self._hook_data["get_all_fields"]
 
+    @property
+    def deep_link_tokens(self):
+        """
+        Deep link fields requested by the shotgun_fields hook, as a dictionary
+        keyed by field name, e.g. 'sg_sequence.Sequence.code', with the set of
+        hook definitions that use the field, e.g. 'get_list_item_definition.body'
+        """
+        return self._deep_link_tokens
+
+    @property
+    def list_fields(self):
+        """
+        fields needed to render list items
+        """
+        return sorted(self._list_fields)
+
+    @property
+    def details_fields(self):
+        """
+        fields needed to render the main details and its tooltip
+        """
+        return sorted(self._details_fields)
+
     @property
     def fields(self): 
         """
         fields needed to render list or main details
         """
-        return list(self._token_fields)
+        return sorted(self._list_fields | self._details_fields)
 
 
     ####################################################################################################
@@ -401,32 +463,33 @@ class ShotgunTypeFormatter(object):
         :param sg_data: Data associated with the thumbnail
         :returns: Pixmap object
         """
-        if self.entity_type in ["HumanUser", "ApiUser"]:
-            return utils.create_round_512x400_note_thumbnail(image)
-        
-        elif self.entity_type == "ClientUser":
-            return utils.create_round_512x400_note_thumbnail(image, client=True)
+        with tracing.span("thumbnail_composite", "ui", entity_type=self.entity_type):
+            if self.entity_type in ["HumanUser", "ApiUser"]:
+                return utils.create_round_512x400_note_thumbnail(image)
+
+            elif self.entity_type == "ClientUser":
+                return utils.create_round_512x400_note_thumbnail(image, client=True)
+
+            elif self.entity_type == "Note":
+
+                client_note = sg_data.get("client_note") or False 
+
+                if sg_data["read_by_current_user"] == "unread":
+                    unread=True
+                else:
+                    unread=False
+
+                return utils.create_round_512x400_note_thumbnail(image,  
+                                                                 client_note,
+                                                                 unread)
+
+            elif self.entity_type == "Task" and sg_data["type"] == "HumanUser":
+                # a user icon for a task
+                # todo: refcator this logic to make it clearer
+                return utils.create_round_512x400_note_thumbnail(image)
 
-        elif self.entity_type == "Note":
-            
-            client_note = sg_data.get("client_note") or False 
-            
-            if sg_data["read_by_current_user"] == "unread":
-                unread=True
             else:
-                unread=False
-                
-            return utils.create_round_512x400_note_thumbnail(image,  
-                                                             client_note,
-                                                             unread)
-        
-        elif self.entity_type == "Task" and sg_data["type"] == "HumanUser":
-            # a user icon for a task
-            # todo: refcator this logic to make it clearer
-            return utils.create_round_512x400_note_thumbnail(image)
-        
-        else:
-            return utils.create_rectangular_512x400_thumbnail(image)
+                return utils.create_rectangular_512x400_thumbnail(image)
 
     @classmethod
     def get_playback_url(cls, sg_data):
@@ -469,7 +532,7 @@ class ShotgunTypeFormatter(object):
         """
         return self._sg_field_to_str(entity_type, field_name, value, directive)
 
-    def format_entity_details(self, sg_data):
+    def format_entity_details(self, sg_data, partial=False):
         """
         Render full details for a Shotgun entity.
         Formatting settings are read from the shotgun_fields hook.
@@ -477,16 +540,21 @@ class ShotgunTypeFormatter(object):
         :param sg_data: Shotgun data dictionary. The shotgun fields 
                returned by the fields parameter need to be included in
                this data dictionary.
+        :param partial: True if the data dictionary only holds some of the
+               fields, for example the data of a list item displayed while
+               the details are loading. Fields which are missing are then
+               displayed as pending rather than as empty.
         :returns: tuple with formatted and resolved (header, body) strings.
         """
-        title = self._get_hook_value("get_main_view_definition", "title")
-        body = self._get_hook_value("get_main_view_definition", "body")
-        
-        title_converted = self._convert_token_string(title, sg_data)
-        body_converted = self._convert_token_string(body, sg_data)
-        
-        return (title_converted, body_converted)
-        
+        with tracing.span("format", "ui", entity_type=self.entity_type):
+            title = self._get_hook_value("get_main_view_definition", "title")
+            body = self._get_hook_value("get_main_view_definition", "body")
+
+            title_converted = self._convert_token_string(title, sg_data, partial)
+            body_converted = self._convert_token_string(body, sg_data, partial)
+
+            return (title_converted, body_converted)
+
     def format_list_item_details(self, sg_data):
         """
         Render details for list items to be displayed.
@@ -500,16 +568,17 @@ class ShotgunTypeFormatter(object):
                   body) strings.
         """
 
-        top_left = self._get_hook_value("get_list_item_definition", "top_left")
-        top_right = self._get_hook_value("get_list_item_definition", "top_right")
-        body = self._get_hook_value("get_list_item_definition", "body")
-        
-        top_left_converted = self._convert_token_string(top_left, sg_data)
-        top_right_converted = self._convert_token_string(top_right, sg_data)
-        body_converted = self._convert_token_string(body, sg_data)
-        
-        return (top_left_converted, top_right_converted, body_converted)
-    
+        with tracing.span("format", "ui", entity_type=self.entity_type):
+            top_left = self._get_hook_value("get_list_item_definition", "top_left")
+            top_right = self._get_hook_value("get_list_item_definition", "top_right")
+            body = self._get_hook_value("get_list_item_definition", "body")
+
+            top_left_converted = self._convert_token_string(top_left, sg_data)
+            top_right_converted = self._convert_token_string(top_right, sg_data)
+            body_converted = self._convert_token_string(body, sg_data)
+
+            return (top_left_converted, top_right_converted, body_converted)
+
 
     def get_link_filters(self, sg_location):
         """
@@ -836,7 +905,7 @@ class ShotgunEntityFormatter(ShotgunTypeFormatter):
 
         else:
             return "Notes associated with this %s, in update order." % \
-                   shotgun_globals.get_type_display_name(self.entity_type)
+                   schema_lookup.get_type_display_name(self.entity_type)
 
     @property
     def publishes_description(self):
@@ -859,7 +928,7 @@ class ShotgunEntityFormatter(ShotgunTypeFormatter):
 
         else:
             return "Publishes for this %s, in creation order." % \
-                   shotgun_globals.get_type_display_name(self.entity_type)
+                   schema_lookup.get_type_display_name(self.entity_type)
 
     @property
     def versions_description(self):
@@ -877,7 +946,7 @@ class ShotgunEntityFormatter(ShotgunTypeFormatter):
 
         else:
             return "Review versions for this %s, in creation order." % \
-                   shotgun_globals.get_type_display_name(self.entity_type)
+                   schema_lookup.get_type_display_name(self.entity_type)
 
     @property
     def tasks_description(self):
@@ -900,7 +969,7 @@ class ShotgunEntityFormatter(ShotgunTypeFormatter):
 
         else:
             return "All tasks for this %s." % \
-                   shotgun_globals.get_type_display_name(self.entity_type)
+                   schema_lookup.get_type_display_name(self.entity_type)
 
     @property
     def default_tab(self):
@@ -18,10 +18,24 @@ class ShotgunLocation(object):
     for any entity, via the sg_formatter property.
     """
     
-    def __init__(self, entity_type, entity_id):
+    def __init__(self, entity_type, entity_id, sg_data=None, pixmap=None):
+        """
+        :param entity_type: Shotgun entity type
+        :param entity_id: Shotgun entity id
+        :param sg_data: Optional shotgun data already known for the entity,
+                        for example from the list item that was clicked.
+                        Used to display the details before they have loaded.
+        :param pixmap: Optional thumbnail already known for the entity.
+        """
         self._entity_type = entity_type
         self._entity_id = entity_id
         self._formatter = ShotgunEntityFormatter(self._entity_type, entity_id)
+
+        self._known_sg_data = None
+        self._known_pixmap = None
+        if sg_data and sg_data.get("type") == entity_type and sg_data.get("id") == entity_id:
+            self._known_sg_data = dict(sg_data)
+            self._known_pixmap = pixmap
     
         # The ui tab index currently focused on for this location
         self._tab_index = self._formatter.default_tab
@@ -69,6 +83,30 @@ class ShotgunLocation(object):
 
         return sg_location
 
+    @property
+    def known_sg_data(self):
+        """
+        Shotgun data known for the entity when the location was
+        created, or None if no data is known.
+        """
+        return self._known_sg_data
+
+    @property
+    def known_pixmap(self):
+        """
+        Thumbnail known for the entity when the location was
+        created, or None if no thumbnail is known.
+        """
+        return self._known_pixmap
+
+    def clear_known_data(self):
+        """
+        Releases the known data once the details for the entity
+        have been loaded, so that history entries don't hold on to it.
+        """
+        self._known_sg_data = None
+        self._known_pixmap = None
+
     def set_tab_index(self, index):
         """
         Update the associated tab index
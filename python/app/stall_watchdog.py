@@ -0,0 +1,205 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import sys
+import time
+import threading
+import traceback
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+
+class StallWatchdog(QtCore.QObject):
+    """
+    Detects stalls of the Qt event loop caused by the panel.
+
+    A timer on the main thread updates a heartbeat. A watchdog thread
+    checks the heartbeat and, whenever the event loop has been blocked
+    for longer than the threshold, samples the stack of the main thread.
+    If panel code (app modules or the hooks bundled with the app) is on
+    the stack, the sample is attributed to the innermost panel frame, the
+    call site. Hooks located elsewhere are attributed to the panel code
+    calling them. Samples are tallied per call site so that the blocking
+    paths in the panel can be ranked and fixed.
+
+    Only the code and line number of the sampled frames are read, since
+    the locals of a running frame cannot safely be accessed from another
+    thread. Each call site is logged when a stall is first detected in it,
+    so that a hang which is never recovered from still leaves a trace.
+
+    The watchdog is opt-in via the enable_stall_watchdog setting.
+    """
+
+    # how often the heartbeat is updated and checked, in milliseconds
+    HEARTBEAT_INTERVAL = 50
+
+    # maximum number of frames kept for an example stack
+    MAX_STACK_DEPTH = 30
+
+    def __init__(self, threshold, parent=None):
+        """
+        Must be constructed on the main thread.
+
+        :param threshold: Minimum stall duration to report, in milliseconds
+        :param parent: QT parent object
+        """
+        QtCore.QObject.__init__(self, parent)
+        self._app = sgtk.platform.current_bundle()
+        self._threshold = threshold / 1000.0
+        self._main_thread_id = threading.current_thread().ident
+        self._app_root = os.path.normcase(os.path.abspath(self._app.disk_location)) + os.sep
+
+        self._lock = threading.Lock()
+        self._last_heartbeat = time.time()
+        self._stall_call_sites = set()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # call site -> dictionary with stall statistics
+        self._call_sites = {}
+
+        self._heartbeat_timer = QtCore.QTimer(self)
+        self._heartbeat_timer.timeout.connect(self._on_heartbeat)
+
+    def start(self):
+        """
+        Starts monitoring the event loop.
+        """
+        if self._thread:
+            return
+        self._last_heartbeat = time.time()
+        self._stop_event.clear()
+        self._heartbeat_timer.start(self.HEARTBEAT_INTERVAL)
+        self._thread = threading.Thread(target=self._run, name="ShotgunPanelStallWatchdog")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops monitoring the event loop.
+        """
+        self._heartbeat_timer.stop()
+        if self._thread:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def _on_heartbeat(self):
+        """
+        Called on the main thread whenever the event loop is responsive.
+        """
+        now = time.time()
+        with self._lock:
+            stall_duration = now - self._last_heartbeat
+            self._last_heartbeat = now
+
+            # a stall has ended - record its duration for
+            # all the call sites that were sampled during it
+            for call_site in self._stall_call_sites:
+                stats = self._call_sites[call_site]
+                stats["stalls"] += 1
+                stats["total_time"] += stall_duration
+                stats["max_time"] = max(stats["max_time"], stall_duration)
+            call_sites = self._stall_call_sites
+            self._stall_call_sites = set()
+
+        for call_site in call_sites:
+            self._app.log_debug("UI thread stalled for %.0f ms in %s" % (stall_duration * 1000, call_site))
+
+    def _run(self):
+        """
+        Watchdog thread main loop.
+        """
+        while not self._stop_event.wait(self.HEARTBEAT_INTERVAL / 1000.0):
+            with self._lock:
+                last_heartbeat = self._last_heartbeat
+            if time.time() - last_heartbeat > self._threshold:
+                self._sample()
+
+    def _is_panel_file(self, filename):
+        """
+        Checks if a source file belongs to the panel, either to the
+        app itself or to one of the hooks bundled with it.
+        """
+        return os.path.normcase(os.path.abspath(filename)).startswith(self._app_root)
+
+    def _sample(self):
+        """
+        Samples the main thread stack during a stall.
+        """
+        frame = sys._current_frames().get(self._main_thread_id)
+        if frame is None:
+            return
+
+        # list of (filename, line number, function name, text)
+        # tuples, outermost frame first
+        stack = traceback.extract_stack(frame)
+        del frame
+
+        # find the innermost panel frame
+        for idx in reversed(range(len(stack))):
+            if self._is_panel_file(stack[idx][0]):
+                break
+        else:
+            # the stall isn't caused by the panel
+            return
+
+        (filename, lineno, name, _) = stack[idx]
+        call_site = "%s:%d in %s()" % (os.path.basename(filename), lineno, name)
+        stack = stack[max(0, idx + 1 - self.MAX_STACK_DEPTH):idx + 1]
+
+        with self._lock:
+            if call_site not in self._call_sites:
+                self._call_sites[call_site] = {"stalls": 0,
+                                               "samples": 0,
+                                               "total_time": 0.0,
+                                               "max_time": 0.0,
+                                               "stack": "".join(traceback.format_list(stack))}
+            self._call_sites[call_site]["samples"] += 1
+            new_in_stall = call_site not in self._stall_call_sites
+            self._stall_call_sites.add(call_site)
+            stack_text = self._call_sites[call_site]["stack"]
+
+        if new_in_stall:
+            # log straight away, in case the event loop never recovers
+            self._app.log_warning("UI thread stalled for more than %.0f ms in %s\n%s" % (
+                self._threshold * 1000, call_site, stack_text.rstrip())
+            )
+
+    def get_report(self):
+        """
+        Returns a report of the call sites that stalled the event loop,
+        ordered by total stall time.
+
+        :returns: Report as a string
+        """
+        with self._lock:
+            call_sites = sorted(self._call_sites.iteritems(),
+                                key=lambda x: x[1]["total_time"],
+                                reverse=True)
+
+        if not call_sites:
+            return "No UI thread stalls longer than %.0f ms detected." % (self._threshold * 1000)
+
+        lines = ["UI thread stalls longer than %.0f ms, by call site:" % (self._threshold * 1000)]
+        for (call_site, stats) in call_sites:
+            lines.append("")
+            lines.append("%s: %d stalls, %d samples, total %.0f ms, max %.0f ms" % (
+                call_site,
+                stats["stalls"],
+                stats["samples"],
+                stats["total_time"] * 1000,
+                stats["max_time"] * 1000
+            ))
+            lines.append(stats["stack"].rstrip())
+
+        return "\n".join(lines)
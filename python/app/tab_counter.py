@@ -0,0 +1,212 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+from sgtk.platform.qt import QtCore
+
+from . import utils
+from . import query_splitter
+from .shotgun_formatter import ShotgunTypeFormatter
+
+shotgun_data = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_data")
+shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
+
+
+class TabCounter(QtCore.QObject):
+    """
+    Counts the records displayed by the listing tabs for a location,
+    so that the counts can be shown in the tab captions without
+    loading the tabs.
+
+    Each tab is counted with a summarize call using the same link
+    filters as the tab listing. The calls for the different tabs are
+    queued as separate background tasks, so they run in parallel.
+    For notes, the unread notes are counted with a second summarize.
+    Tabs covered by an inbox index are counted from the index instead.
+    When a query splitter is set, tabs whose filters combine several
+    conditions with OR are counted from the ids returned by the split
+    queries, rather than by summarizing the OR query.
+
+    :signal counts_available(object, dict): Emitted when the counts for a
+        tab are available, with the key passed to request_counts() and a
+        dictionary with keys count and unread. unread is None for tabs
+        other than notes or if the unread notes could not be counted.
+    """
+
+    # field holding the read state of notes
+    READ_STATE_FIELD = "read_by_current_user"
+
+    counts_available = QtCore.Signal(object, dict)
+
+    def __init__(self, task_manager, parent):
+        """
+        Constructor
+
+        :param task_manager: Task manager to use for background work
+        :param parent: QT parent object
+        """
+        QtCore.QObject.__init__(self, parent)
+
+        # formatters used to compute link filters, keyed by entity type
+        self._formatters = {}
+
+        # tab keys, keyed by request uid
+        self._requests = {}
+        # (tab key, entity type), keyed by split request uid
+        self._split_requests = {}
+
+        self._inbox_index = None
+        self._query_splitter = None
+
+        self._app = sgtk.platform.current_bundle()
+        self.__sg_data_retriever = shotgun_data.ShotgunDataRetriever(self,
+                                                                     bg_task_manager=task_manager)
+        self.__sg_data_retriever.start()
+        self.__sg_data_retriever.work_completed.connect(self.__on_worker_signal)
+        self.__sg_data_retriever.work_failure.connect(self.__on_worker_failure)
+
+    def set_inbox_index(self, inbox_index):
+        """
+        Specify an inbox index to count the current user's records with.
+
+        :param inbox_index: :class:`InboxIndex` object, or None
+        """
+        self._inbox_index = inbox_index
+
+    def set_query_splitter(self, splitter):
+        """
+        Specify a query splitter to count the tabs whose
+        filters contain an or group with.
+
+        :param splitter: :class:`QuerySplitter` object, or None
+        """
+        self._query_splitter = splitter
+        if self._query_splitter:
+            self._query_splitter.work_completed.connect(self._on_split_query_completed)
+            self._query_splitter.work_failure.connect(self._on_split_query_failed)
+
+    def request_counts(self, sg_location, tabs):
+        """
+        Counts the records for a set of tabs in the background. Any counts
+        still being computed for a previous location are discarded.
+
+        :param sg_location: Location the tabs are displayed for
+        :param tabs: List of (key, entity_type) tuples, where key identifies
+                     the tab and entity_type is the type of records listed.
+        """
+        self.__sg_data_retriever.clear()
+        self._requests = {}
+        for uid in self._split_requests:
+            self._query_splitter.cancel(uid)
+        self._split_requests = {}
+
+        for (key, entity_type) in tabs:
+            if entity_type not in self._formatters:
+                self._formatters[entity_type] = ShotgunTypeFormatter(entity_type)
+            filters = utils.canonical_filters(self._formatters[entity_type].get_link_filters(sg_location))
+
+            if self._inbox_index and self._inbox_index.covers(sg_location, entity_type):
+                counts = self._inbox_index.get_counts(entity_type, filters)
+                if counts is not None:
+                    self.counts_available.emit(key, counts)
+                    continue
+
+            if self._query_splitter and query_splitter.split_or_filters(filters):
+                fields = [self.READ_STATE_FIELD] if entity_type == "Note" else ["id"]
+                uid = self._query_splitter.execute_find(entity_type, filters, fields)
+                self._split_requests[uid] = (key, entity_type)
+                continue
+
+            uid = self.__sg_data_retriever.execute_method(self._count_records, entity_type, filters)
+            self._requests[uid] = key
+
+    def _count_records(self, sg, entity_type, filters):
+        """
+        Async callback called by the data retriever.
+        Counts the records matching the given filters.
+
+        :param sg: Shotgun API instance
+        :param entity_type: Shotgun entity type to count
+        :param filters: Std shotgun filters
+        :returns: Dictionary with keys count and unread
+        """
+        summary = sg.summarize(entity_type, filters, [{"field": "id", "type": "count"}])
+        count = summary["summaries"]["id"]
+
+        unread = None
+        if entity_type == "Note" and count:
+            try:
+                summary = sg.summarize(entity_type,
+                                       filters + [[self.READ_STATE_FIELD, "is", "unread"]],
+                                       [{"field": "id", "type": "count"}])
+                unread = summary["summaries"]["id"]
+            except Exception, e:
+                # the read state cannot be filtered on by all sites
+                self._app.log_debug("Could not count unread notes: %s" % e)
+
+        return {"count": count, "unread": unread}
+
+    def _on_split_query_completed(self, uid, request_type, data):
+        """
+        Called when the query splitter has looked up the records for a tab.
+
+        :param uid: Unique id for request
+        :param request_type: String identifying the request class
+        :param data: Dictionary with the records under the 'sg' key
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        if uid not in self._split_requests:
+            return
+        (key, entity_type) = self._split_requests.pop(uid)
+
+        data = shotgun_model.sanitize_qt(data)
+        unread = None
+        if entity_type == "Note":
+            unread = len([x for x in data["sg"] if x.get(self.READ_STATE_FIELD) == "unread"])
+        self.counts_available.emit(key, {"count": len(data["sg"]), "unread": unread})
+
+    def _on_split_query_failed(self, uid, msg):
+        """
+        Called when the query splitter could not look up the records for a tab.
+
+        :param uid: Unique id for request that failed
+        :param msg: Error message
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        if uid in self._split_requests:
+            (key, _) = self._split_requests.pop(uid)
+            self._app.log_debug("Could not count records for tab %s: %s" % (key, shotgun_model.sanitize_qt(msg)))
+
+    def __on_worker_failure(self, uid, msg):
+        """
+        Asynchronous callback - the worker thread errored.
+
+        :param uid: Unique id for request that failed
+        :param msg: Error message
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        msg = shotgun_model.sanitize_qt(msg)
+        if uid in self._requests:
+            key = self._requests.pop(uid)
+            self._app.log_debug("Could not count records for tab %s: %s" % (key, msg))
+
+    def __on_worker_signal(self, uid, request_type, data):
+        """
+        Signaled whenever the worker completes something.
+
+        :param uid: Unique id for request
+        :param request_type: String identifying the request class
+        :param data: the data that was returned
+        """
+        uid = shotgun_model.sanitize_qt(uid) # qstring on pyqt, str on pyside
+        data = shotgun_model.sanitize_qt(data)
+        if uid in self._requests:
+            key = self._requests.pop(uid)
+            self.counts_available.emit(key, data["return_value"])
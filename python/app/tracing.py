@@ -0,0 +1,250 @@
+# Copyright (c) 2015 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Lightweight timing spans around the hot paths of the panel.
+
+Each navigation starts a new root span. Spans started while another span
+is active on the same thread become its children, other spans are parented
+to the current navigation unless an explicit parent is passed. This allows
+asynchronous work, such as a server round trip which starts in one method
+and completes in a signal handler, to be attributed to the navigation
+which requested it.
+
+The most recent navigations are kept in memory so that they can be
+inspected in the diagnostics dialog or exported as Chrome trace json.
+"""
+
+import os
+import time
+import threading
+import contextlib
+import collections
+
+# number of navigations to keep
+MAX_NAVIGATIONS = 20
+
+# maximum number of spans recorded per navigation. Paint
+# spans in particular can be plentiful for long listings.
+MAX_SPANS_PER_NAVIGATION = 5000
+
+_lock = threading.Lock()
+_thread_data = threading.local()
+_navigations = collections.deque(maxlen=MAX_NAVIGATIONS)
+_current_navigation = None
+
+
+class Span(object):
+    """
+    A named, timed section of work.
+    """
+
+    __slots__ = ["name", "category", "args", "parent", "navigation",
+                 "children", "start_time", "end_time", "thread_id", "thread_name"]
+
+    def __init__(self, name, category, args, parent):
+        """
+        :param name: Name of the span
+        :param category: Category of the span, e.g. 'ui' or 'shotgun'
+        :param args: Dictionary of additional values to display for the span
+        :param parent: Parent span or None for a navigation root
+        """
+        self.name = name
+        self.category = category
+        self.args = args
+        self.parent = parent
+        self.navigation = parent.navigation if parent else self
+        self.children = []
+        self.start_time = time.time()
+        self.end_time = None
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+
+    def __repr__(self):
+        return "<Span %s %s>" % (self.name, self.args)
+
+    def finish(self, **args):
+        """
+        Ends the span. Calling this more than once has no effect.
+
+        :param args: Additional values to display for the span
+        """
+        if self.end_time is None:
+            self.end_time = time.time()
+            self.args.update(args)
+
+    @property
+    def duration(self):
+        """
+        Duration of the span in seconds, or None if still running
+        """
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def walk(self, depth=0):
+        """
+        Iterates over this span and all its descendants, depth first.
+
+        :returns: Generator yielding (span, depth) tuples
+        """
+        yield (self, depth)
+        for child in list(self.children):
+            for item in child.walk(depth + 1):
+                yield item
+
+
+class _NullSpan(object):
+    """
+    Stand-in returned when the span limit for a navigation has been reached.
+    """
+
+    def finish(self, **args):
+        pass
+
+_null_span = _NullSpan()
+
+
+def begin_navigation(entity_type, entity_id):
+    """
+    Starts a new root span for a navigation.
+
+    :param entity_type: Entity type navigated to
+    :param entity_id: Entity id navigated to
+    :returns: Root span
+    """
+    global _current_navigation
+
+    root = Span("navigate", "navigation", {"entity_type": entity_type, "entity_id": entity_id}, None)
+    # keep track of the number of spans in the navigation on the root itself
+    root.args["spans"] = 1
+    with _lock:
+        if _current_navigation:
+            # a navigation ends when the next one starts
+            _current_navigation.finish()
+        _current_navigation = root
+        _navigations.append(root)
+    return root
+
+
+def start_span(name, category="panel", parent=None, **args):
+    """
+    Starts a span which is finished explicitly by calling its
+    finish() method, potentially on a different thread.
+
+    :param name: Name of the span
+    :param category: Category of the span
+    :param parent: Parent span. If not specified, the span active on the
+                   current thread is used, or the current navigation.
+    :param args: Additional values to display for the span
+    :returns: Span object
+    """
+    if parent is None:
+        stack = getattr(_thread_data, "stack", None)
+        parent = stack[-1] if stack else _current_navigation
+
+    if parent is None or not isinstance(parent, Span):
+        # nothing to attribute the span to
+        return _null_span
+
+    with _lock:
+        root = parent.navigation
+        if root.args["spans"] >= MAX_SPANS_PER_NAVIGATION:
+            return _null_span
+        root.args["spans"] += 1
+        span = Span(name, category, args, parent)
+        parent.children.append(span)
+    return span
+
+
+@contextlib.contextmanager
+def span(name, category="panel", parent=None, **args):
+    """
+    Context manager which times the enclosed block as a span.
+    Spans started within the block become children of this span.
+
+    :param name: Name of the span
+    :param category: Category of the span
+    :param parent: Optional explicit parent span
+    :param args: Additional values to display for the span
+    """
+    current = start_span(name, category, parent, **args)
+    if not hasattr(_thread_data, "stack"):
+        _thread_data.stack = []
+    _thread_data.stack.append(current)
+    try:
+        yield current
+    finally:
+        _thread_data.stack.pop()
+        current.finish()
+
+
+def get_navigations():
+    """
+    Returns the recorded navigations.
+
+    :returns: List of root spans, oldest first
+    """
+    with _lock:
+        return list(_navigations)
+
+
+def clear():
+    """
+    Discards all recorded navigations.
+    """
+    global _current_navigation
+    with _lock:
+        _navigations.clear()
+        _current_navigation = None
+
+
+def to_chrome_trace(navigations):
+    """
+    Converts spans to the Chrome trace event format, which
+    can be loaded into chrome://tracing or Perfetto.
+
+    :param navigations: List of root spans
+    :returns: Dictionary which can be serialized as json
+    """
+    pid = os.getpid()
+    events = []
+    thread_names = {}
+
+    for root in navigations:
+        for (item, _) in root.walk():
+            thread_names[item.thread_id] = item.thread_name
+            end_time = item.end_time or time.time()
+            args = dict((k, str(v)) for (k, v) in item.args.iteritems())
+            args["span_id"] = id(item)
+            if item.parent:
+                args["parent_id"] = id(item.parent)
+            events.append({
+                "name": item.name,
+                "cat": item.category,
+                "ph": "X",
+                "ts": int(item.start_time * 1000000),
+                "dur": int((end_time - item.start_time) * 1000000),
+                "pid": pid,
+                "tid": item.thread_id,
+                "args": args,
+            })
+
+    for (thread_id, thread_name) in thread_names.iteritems():
+        events.append({
+            "name": "thread_name",
+            "ph": "M",
+            "pid": pid,
+            "tid": thread_id,
+            "args": {"name": thread_name},
+        })
+
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
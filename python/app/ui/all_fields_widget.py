@@ -16,18 +16,14 @@ class Ui_AllFieldsWidget(object):
         self.verticalLayout.setSpacing(0)
         self.verticalLayout.setContentsMargins(0, 0, 0, 0)
         self.verticalLayout.setObjectName("verticalLayout")
-        self.all_fields_scroll_area = QtGui.QScrollArea(AllFieldsWidget)
-        self.all_fields_scroll_area.setWidgetResizable(True)
-        self.all_fields_scroll_area.setObjectName("all_fields_scroll_area")
-        self.all_fields_host = QtGui.QWidget()
-        self.all_fields_host.setGeometry(QtCore.QRect(0, 0, 335, 643))
-        self.all_fields_host.setObjectName("all_fields_host")
-        self.all_fields_layout = QtGui.QGridLayout(self.all_fields_host)
-        self.all_fields_layout.setContentsMargins(0, 0, 0, 0)
-        self.all_fields_layout.setSpacing(0)
-        self.all_fields_layout.setObjectName("all_fields_layout")
-        self.all_fields_scroll_area.setWidget(self.all_fields_host)
-        self.verticalLayout.addWidget(self.all_fields_scroll_area)
+        self.all_fields_view = QtGui.QListView(AllFieldsWidget)
+        self.all_fields_view.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.all_fields_view.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.all_fields_view.setSelectionMode(QtGui.QAbstractItemView.NoSelection)
+        self.all_fields_view.setVerticalScrollMode(QtGui.QAbstractItemView.ScrollPerPixel)
+        self.all_fields_view.setResizeMode(QtGui.QListView.Adjust)
+        self.all_fields_view.setObjectName("all_fields_view")
+        self.verticalLayout.addWidget(self.all_fields_view)
 
         self.retranslateUi(AllFieldsWidget)
         QtCore.QMetaObject.connectSlotsByName(AllFieldsWidget)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'diagnostics_dialog.ui'
+#
+#      by: pyside-uic 0.2.15 running on PySide 1.2.2
+#
+# WARNING! All changes made in this file will be lost!
+
+from tank.platform.qt import QtCore, QtGui
+
+class Ui_DiagnosticsDialog(object):
+    def setupUi(self, DiagnosticsDialog):
+        DiagnosticsDialog.setObjectName("DiagnosticsDialog")
+        DiagnosticsDialog.resize(900, 600)
+        self.verticalLayout = QtGui.QVBoxLayout(DiagnosticsDialog)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.diagnostics_tabs = QtGui.QTabWidget(DiagnosticsDialog)
+        self.diagnostics_tabs.setObjectName("diagnostics_tabs")
+        self.navigations_tab = QtGui.QWidget()
+        self.navigations_tab.setObjectName("navigations_tab")
+        self.verticalLayout_2 = QtGui.QVBoxLayout(self.navigations_tab)
+        self.verticalLayout_2.setObjectName("verticalLayout_2")
+        self.horizontalLayout = QtGui.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.navigation_label = QtGui.QLabel(self.navigations_tab)
+        self.navigation_label.setObjectName("navigation_label")
+        self.horizontalLayout.addWidget(self.navigation_label)
+        self.navigation_combo = QtGui.QComboBox(self.navigations_tab)
+        sizePolicy = QtGui.QSizePolicy(QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.navigation_combo.sizePolicy().hasHeightForWidth())
+        self.navigation_combo.setSizePolicy(sizePolicy)
+        self.navigation_combo.setObjectName("navigation_combo")
+        self.horizontalLayout.addWidget(self.navigation_combo)
+        self.export_trace = QtGui.QPushButton(self.navigations_tab)
+        self.export_trace.setObjectName("export_trace")
+        self.horizontalLayout.addWidget(self.export_trace)
+        self.verticalLayout_2.addLayout(self.horizontalLayout)
+        self.waterfall_area = QtGui.QScrollArea(self.navigations_tab)
+        self.waterfall_area.setWidgetResizable(True)
+        self.waterfall_area.setObjectName("waterfall_area")
+        self.verticalLayout_2.addWidget(self.waterfall_area)
+        self.summary = QtGui.QLabel(self.navigations_tab)
+        self.summary.setText("")
+        self.summary.setWordWrap(True)
+        self.summary.setObjectName("summary")
+        self.verticalLayout_2.addWidget(self.summary)
+        self.diagnostics_tabs.addTab(self.navigations_tab, "")
+        self.queries_tab = QtGui.QWidget()
+        self.queries_tab.setObjectName("queries_tab")
+        self.verticalLayout_3 = QtGui.QVBoxLayout(self.queries_tab)
+        self.verticalLayout_3.setObjectName("verticalLayout_3")
+        self.query_report = QtGui.QPlainTextEdit(self.queries_tab)
+        self.query_report.setLineWrapMode(QtGui.QPlainTextEdit.NoWrap)
+        self.query_report.setReadOnly(True)
+        self.query_report.setObjectName("query_report")
+        self.verticalLayout_3.addWidget(self.query_report)
+        self.diagnostics_tabs.addTab(self.queries_tab, "")
+        self.memory_tab = QtGui.QWidget()
+        self.memory_tab.setObjectName("memory_tab")
+        self.verticalLayout_4 = QtGui.QVBoxLayout(self.memory_tab)
+        self.verticalLayout_4.setObjectName("verticalLayout_4")
+        self.memory_report = QtGui.QPlainTextEdit(self.memory_tab)
+        self.memory_report.setLineWrapMode(QtGui.QPlainTextEdit.NoWrap)
+        self.memory_report.setReadOnly(True)
+        self.memory_report.setObjectName("memory_report")
+        self.verticalLayout_4.addWidget(self.memory_report)
+        self.diagnostics_tabs.addTab(self.memory_tab, "")
+        self.verticalLayout.addWidget(self.diagnostics_tabs)
+        self.horizontalLayout_2 = QtGui.QHBoxLayout()
+        self.horizontalLayout_2.setObjectName("horizontalLayout_2")
+        spacerItem = QtGui.QSpacerItem(40, 20, QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Minimum)
+        self.horizontalLayout_2.addItem(spacerItem)
+        self.refresh = QtGui.QPushButton(DiagnosticsDialog)
+        self.refresh.setObjectName("refresh")
+        self.horizontalLayout_2.addWidget(self.refresh)
+        self.close = QtGui.QPushButton(DiagnosticsDialog)
+        self.close.setObjectName("close")
+        self.horizontalLayout_2.addWidget(self.close)
+        self.verticalLayout.addLayout(self.horizontalLayout_2)
+
+        self.retranslateUi(DiagnosticsDialog)
+        self.diagnostics_tabs.setCurrentIndex(0)
+        QtCore.QObject.connect(self.close, QtCore.SIGNAL("clicked()"), DiagnosticsDialog.close)
+        QtCore.QMetaObject.connectSlotsByName(DiagnosticsDialog)
+
+    def retranslateUi(self, DiagnosticsDialog):
+        DiagnosticsDialog.setWindowTitle(QtGui.QApplication.translate("DiagnosticsDialog", "Shotgun Panel Diagnostics", None, QtGui.QApplication.UnicodeUTF8))
+        self.navigation_label.setText(QtGui.QApplication.translate("DiagnosticsDialog", "Navigation:", None, QtGui.QApplication.UnicodeUTF8))
+        self.export_trace.setText(QtGui.QApplication.translate("DiagnosticsDialog", "Export Chrome Trace...", None, QtGui.QApplication.UnicodeUTF8))
+        self.diagnostics_tabs.setTabText(self.diagnostics_tabs.indexOf(self.navigations_tab), QtGui.QApplication.translate("DiagnosticsDialog", "Navigations", None, QtGui.QApplication.UnicodeUTF8))
+        self.diagnostics_tabs.setTabText(self.diagnostics_tabs.indexOf(self.queries_tab), QtGui.QApplication.translate("DiagnosticsDialog", "Queries", None, QtGui.QApplication.UnicodeUTF8))
+        self.diagnostics_tabs.setTabText(self.diagnostics_tabs.indexOf(self.memory_tab), QtGui.QApplication.translate("DiagnosticsDialog", "Memory", None, QtGui.QApplication.UnicodeUTF8))
+        self.refresh.setText(QtGui.QApplication.translate("DiagnosticsDialog", "Refresh", None, QtGui.QApplication.UnicodeUTF8))
+        self.close.setText(QtGui.QApplication.translate("DiagnosticsDialog", "Close", None, QtGui.QApplication.UnicodeUTF8))
+
@@ -11,6 +11,12 @@
 import sgtk
 from sgtk.platform.qt import QtCore, QtGui
 import datetime
+import time
+import json
+
+# import the shotgun_model module from the shotgun utils framework
+shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
+ShotgunModel = shotgun_model.ShotgunModel
 
 def create_round_thumbnail(image):
     """
@@ -165,6 +171,19 @@ def create_rectangular_512x400_thumbnail(image):
     return base_image
 
 
+def get_icon_pixmap(icon):
+    """
+    Returns the largest pixmap held by an icon.
+
+    :param icon: QIcon, or None
+    :returns: QPixmap, or None if the icon is empty
+    """
+    if icon is None or icon.isNull() or not icon.availableSizes():
+        return None
+    size = max(icon.availableSizes(), key=lambda x: x.width() * x.height())
+    return icon.pixmap(size)
+
+
 def create_human_readable_timestamp(datetime_obj):
     """
     Formats a time stamp the way dates are formatted in the 
@@ -208,3 +227,148 @@ def create_human_readable_timestamp(datetime_obj):
     return (time_str, full_time_str)
 
 
+def sanitize_sg_data(sg_data):
+    """
+    Converts a shotgun data dictionary, as returned by the Shotgun API,
+    into the form used by the shotgun models, where date time objects
+    are represented as unix timestamps.
+    
+    :param sg_data: Shotgun data dictionary
+    :returns: New, sanitized Shotgun data dictionary
+    """
+    sanitized_data = {}
+    for (field_name, value) in sg_data.iteritems():
+        if isinstance(value, datetime.datetime):
+            # convert to unix timestamp, local time zone
+            value = time.mktime(value.timetuple())
+        sanitized_data[field_name] = value
+    return sanitized_data
+
+
+def update_item_sg_data(item, sg_record):
+    """
+    Updates the shotgun data held by a shotgun model item in place.
+    
+    Only fields which already exist on the item are updated, meaning
+    that the item will never contain more fields than the query that 
+    originally created it.
+    
+    :param item: Shotgun model item to update
+    :param sg_record: Shotgun data dictionary with new field values
+    :returns: True if the item data was changed, False otherwise
+    """
+    sg_data = item.get_sg_data()
+    if sg_data is None:
+        return False
+    
+    changed = False
+    for (field_name, value) in sg_record.iteritems():
+        if field_name in ["type", "id"] or field_name not in sg_data:
+            continue
+        if sg_data[field_name] != value:
+            sg_data[field_name] = value
+            changed = True
+    
+    if changed:
+        item.setData(shotgun_model.sanitize_for_qt_model(sg_data), ShotgunModel.SG_DATA_ROLE)
+    
+    return changed
+
+
+def canonical_fields(fields):
+    """
+    Returns a list of fields in canonical form, sorted and without
+    duplicates, so that the same logical query always results in
+    the same cache identity, regardless of how the list was built.
+
+    :param fields: List of shotgun fields
+    :returns: New, sorted list of unique fields
+    """
+    return sorted(set(fields))
+
+
+def _canonical_sort_key(value):
+    """
+    Returns a key that sorts canonical filter values and clauses
+    the same way in every process.
+    """
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _canonical_filter_value(value):
+    """
+    Returns a filter value in canonical form. Entity dictionaries are
+    reduced to their type and id, since the other keys (typically name)
+    are ignored by the server but would change the cache identity.
+    """
+    if isinstance(value, dict) and "type" in value and "id" in value:
+        return {"type": value["type"], "id": value["id"]}
+    if isinstance(value, (list, tuple)):
+        return [_canonical_filter_value(x) for x in value]
+    return value
+
+
+def canonical_filters(filters):
+    """
+    Returns a list of shotgun filters in canonical form, so that the
+    same logical query always results in the same cache identity.
+
+    - Entity dictionaries are reduced to type and id.
+    - The values of in and not_in filters are passed as a single, sorted list.
+    - Filter groups have lower case operators.
+    - Clauses are sorted, since they are all combined by the same operator.
+
+    :param filters: Std shotgun filters
+    :returns: New list of filters
+    """
+    canonical = []
+    for sg_filter in filters:
+        if isinstance(sg_filter, dict):
+            sg_filter = {
+                "filter_operator": sg_filter["filter_operator"].lower(),
+                "filters": canonical_filters(sg_filter["filters"])
+            }
+        else:
+            (field, operator) = (sg_filter[0], sg_filter[1])
+            values = [_canonical_filter_value(x) for x in sg_filter[2:]]
+            if operator in ("in", "not_in"):
+                if len(values) == 1 and isinstance(values[0], list):
+                    values = values[0]
+                values = [sorted(values, key=_canonical_sort_key)]
+            sg_filter = [field, operator] + values
+        canonical.append(sg_filter)
+    return sorted(canonical, key=_canonical_sort_key)
+
+
+def canonical_order(order):
+    """
+    Returns a shotgun ordering in canonical form, with an explicit
+    direction for each field. The sequence itself is significant
+    and is left unchanged.
+
+    :param order: List of shotgun orderings, e.g. [{"field_name": "code"}], or None
+    :returns: New list of orderings
+    """
+    return [{"field_name": x["field_name"], "direction": x.get("direction", "asc")}
+            for x in (order or [])]
+
+
+def get_query_signature(entity_type, filters, fields, order=None, limit=None):
+    """
+    Returns a string identifying a query, which is the same for all
+    queries that are logically identical.
+
+    :param entity_type: Shotgun entity type
+    :param filters: Std shotgun filters
+    :param fields: List of shotgun fields
+    :param order: List of shotgun orderings, or None
+    :param limit: Maximum number of records, or None
+    :returns: Signature string
+    """
+    return _canonical_sort_key([
+        entity_type,
+        canonical_filters(filters),
+        canonical_fields(fields),
+        canonical_order(order),
+        limit
+    ])
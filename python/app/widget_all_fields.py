@@ -1,147 +1,351 @@
 # Copyright (c) 2015 Shotgun Software Inc.
-# 
+#
 # CONFIDENTIAL AND PROPRIETARY
-# 
-# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit 
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
 # Source Code License included in this distribution package. See LICENSE.
-# By accessing, using, copying or modifying this work you indicate your 
-# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 import sgtk
 from sgtk.platform.qt import QtCore, QtGui
- 
+
 # import the shotgun_model and view modules from the shotgun utils framework
 shotgun_model = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_model")
 shotgun_view = sgtk.platform.import_framework("tk-framework-qtwidgets", "views")
-shotgun_globals = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_globals")
 
 from .ui.all_fields_widget import Ui_AllFieldsWidget
-from .shotgun_formatter import ShotgunEntityFormatter
-
-class FieldNameLabel(QtGui.QLabel):
-    """
-    Wrapper class so that we can style based on class
-    """
-    pass
-
-class FieldValueLabel(QtGui.QLabel):
-    """
-    Wrapper class so that we can style based on class
-    """
-    pass
+from .shotgun_formatter import ShotgunTypeFormatter
+from . import schema_lookup
 
 class AllFieldsWidget(QtGui.QWidget):
     """
     Widget that shows shotgun data in a name-value pair, top down fasion:
-    
+
     Status: In Progress
     Description: Foo Bar
     Created By: Sam Smith
-    
-    The widget is constructing the contents of this widget using QLabels
-    which will contain clickable hyperlink fields to linked entities.
+
+    The fields are held in a :class:`FieldListModel` and displayed in a list
+    view, meaning that only the rows currently visible are ever rendered.
+    Values contain clickable hyperlink fields to linked entities.
     """
     link_activated = QtCore.Signal(str)
-    
+
     def __init__(self, parent):
         """
         Constructor
-        
+
         :param parent: QT parent object
         """
         QtGui.QWidget.__init__(self, parent)
         self._app = sgtk.platform.current_bundle()
 
         # now load in the UI that was created in the UI designer
-        self.ui = Ui_AllFieldsWidget() 
+        self.ui = Ui_AllFieldsWidget()
         self.ui.setupUi(self)
-        
-        self._widgets = []
-        
+
+        # formatters are only used for value formatting,
+        # so we only need one per entity type
+        self._formatters = {}
+
+        self._model = FieldListModel(self)
+        self._delegate = FieldListDelegate(self.ui.all_fields_view)
+        self._delegate.link_activated.connect(self.link_activated.emit)
+
+        self.ui.all_fields_view.setModel(self._model)
+        self.ui.all_fields_view.setItemDelegate(self._delegate)
+        # mouse tracking is needed to show a hand cursor over links
+        self.ui.all_fields_view.setMouseTracking(True)
+
     def clear(self):
         """
         Clear all items in the widget
         """
         self._app.log_debug("Clearing UI...")
-        # before we begin widget operations, turn off visibility
-        # of the whole widget in order to avoid recomputes        
-        self.setVisible(False)
-        
-        try:
-            for x in self._widgets:
-                # remove widget from layout:
-                self.ui.all_fields_layout.removeWidget(x)
-                # set it's parent to None so that it is removed from the widget hierarchy
-                x.setParent(None)
-                # mark it to be deleted when event processing returns to the main loop
-                x.deleteLater()
-        
-            self._widgets = []
-    
-        finally:
-            # make the window visible again and trigger a redraw
-            self.setVisible(True)
-            
+        self._model.set_rows([])
+
     def set_data(self, sg_data):
         """
-        Clear any existing data in the widget and populate it with new data
-        
+        Populate the widget with new data. Only rows whose
+        values have changed since the last call are updated.
+
         :param sg_data: Shotgun data dictionary
         """
-                        
-        # first clear existing stuff
-        self.clear()
-
         if len(sg_data) == 0:
             # an empty dictionary indicates no data available.
+            self.clear()
             return
-        
-        formatter = ShotgunEntityFormatter(sg_data["type"], sg_data["id"])
-        
-        self.setVisible(False)
+
+        entity_type = sg_data["type"]
+        if entity_type not in self._formatters:
+            self._formatters[entity_type] = ShotgunTypeFormatter(entity_type)
+        formatter = self._formatters[entity_type]
+
+        # resolve the display names and values for all fields,
+        # and sort them in alphabetic order based on display name
+        rows = []
+        for (field_name, raw_field_value) in sg_data.iteritems():
+            display_name = schema_lookup.get_field_display_name(entity_type, field_name)
+            value = formatter.format_raw_value(entity_type, field_name, raw_field_value)
+            rows.append((display_name, field_name, value))
+
+        self._model.set_rows(sorted(rows))
+
+
+class FieldListModel(QtCore.QAbstractListModel):
+    """
+    Model holding a sorted list of (display name, field name, value)
+    rows for the :class:`AllFieldsWidget`.
+
+    Updates are diff based, so that rows whose values haven't changed
+    are left untouched and views only need to re-render what is new.
+    """
+
+    FIELD_NAME_ROLE = QtCore.Qt.UserRole + 1
+    VALUE_ROLE = QtCore.Qt.UserRole + 2
+
+    def __init__(self, parent):
+        """
+        Constructor
+
+        :param parent: QT parent object
+        """
+        QtCore.QAbstractListModel.__init__(self, parent)
+        self._rows = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        """
+        Number of rows in the model
+        """
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        """
+        Returns data for a given index and role
+        """
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+
+        (display_name, field_name, value) = self._rows[index.row()]
+
+        if role == QtCore.Qt.DisplayRole:
+            return display_name
+        elif role == self.FIELD_NAME_ROLE:
+            return field_name
+        elif role == self.VALUE_ROLE:
+            return value
+
+        return None
+
+    def set_rows(self, rows):
+        """
+        Updates the model to hold the given rows.
+
+        The new rows are merged with the existing ones, inserting,
+        removing and updating only the rows which differ.
+
+        :param rows: List of (display_name, field_name, value)
+                     tuples, sorted by display name.
+        """
+        row = 0
+        new_row = 0
+
+        while row < len(self._rows) and new_row < len(rows):
+
+            (display_name, field_name, value) = self._rows[row]
+            (new_display_name, new_field_name, new_value) = rows[new_row]
+
+            if (display_name, field_name) == (new_display_name, new_field_name):
+                # same field - update the value if needed
+                if value != new_value:
+                    self._rows[row] = rows[new_row]
+                    index = self.index(row)
+                    self.dataChanged.emit(index, index)
+                row += 1
+                new_row += 1
+
+            elif (display_name, field_name) < (new_display_name, new_field_name):
+                # field no longer present
+                self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+
+            else:
+                # new field
+                self.beginInsertRows(QtCore.QModelIndex(), row, row)
+                self._rows.insert(row, rows[new_row])
+                self.endInsertRows()
+                row += 1
+                new_row += 1
+
+        if row < len(self._rows):
+            # remove any remaining old rows
+            self.beginRemoveRows(QtCore.QModelIndex(), row, len(self._rows) - 1)
+            del self._rows[row:]
+            self.endRemoveRows()
+
+        if new_row < len(rows):
+            # and append any remaining new rows
+            self.beginInsertRows(QtCore.QModelIndex(), len(self._rows), len(rows) - new_row + len(self._rows) - 1)
+            self._rows.extend(rows[new_row:])
+            self.endInsertRows()
+
+
+class FieldListDelegate(QtGui.QStyledItemDelegate):
+    """
+    Delegate which renders a field name and a rich text value
+    next to each other for each row in a :class:`FieldListModel`.
+
+    The text layouts for each row are computed once and cached,
+    so painting and size calculations never need to parse
+    rich text again unless the value or the width changes.
+
+    :signal link_activated(str): Emitted when a hyperlink in a
+        value is clicked. The url is passed with the signal.
+    """
+
+    link_activated = QtCore.Signal(str)
+
+    # padding around each text block, in pixels
+    PADDING = 8
+    # maximum proportion of the width to use for the name column
+    MAX_NAME_COLUMN_RATIO = 0.4
+    # number of row layouts to cache before starting afresh
+    MAX_CACHED_LAYOUTS = 1000
+
+    def __init__(self, view):
+        """
+        Constructor
+
+        :param view: The view where this delegate is being used
+        """
+        QtGui.QStyledItemDelegate.__init__(self, view)
+        self._view = view
+        self._layouts = {}
+
+        self._name_color = QtGui.QColor(200, 200, 200, 102)
+        self._line_color = QtGui.QColor(200, 200, 200, 46)
+
+    def _get_layout(self, model_index, width):
+        """
+        Returns the cached text layout for a row, creating it if needed.
+
+        :param model_index: Model index to get the layout for
+        :param width: Total width available for the row
+        :returns: Tuple with (name_document, value_document,
+                  name_column_width, height)
+        """
+        display_name = model_index.data(QtCore.Qt.DisplayRole)
+        value = model_index.data(FieldListModel.VALUE_ROLE)
+
+        key = (display_name, value, width)
+        if key not in self._layouts:
+
+            if len(self._layouts) > self.MAX_CACHED_LAYOUTS:
+                self._layouts = {}
+
+            name_column_width = int(width * self.MAX_NAME_COLUMN_RATIO)
+
+            name_doc = QtGui.QTextDocument()
+            name_doc.setDefaultFont(self._view.font())
+            name_doc.setDocumentMargin(0)
+            name_doc.setPlainText(display_name)
+            name_doc.setTextWidth(max(name_column_width - 2 * self.PADDING, 1))
+
+            value_doc = QtGui.QTextDocument()
+            value_doc.setDefaultFont(self._view.font())
+            value_doc.setDocumentMargin(0)
+            value_doc.setHtml(value)
+            value_doc.setTextWidth(max(width - name_column_width - 2 * self.PADDING, 1))
+
+            height = max(name_doc.size().height(), value_doc.size().height()) + 2 * self.PADDING
+
+            self._layouts[key] = (name_doc, value_doc, name_column_width, int(height))
+
+        return self._layouts[key]
+
+    def _get_link_at(self, model_index, rect, pos):
+        """
+        Returns the hyperlink at the given position, if any.
+
+        :param model_index: Model index for the row
+        :param rect: Rectangle that the row is rendered in
+        :param pos: Position to look at, in view coordinates
+        :returns: Url string or None if there is no link at the position
+        """
+        (_, value_doc, name_column_width, _) = self._get_layout(model_index, rect.width())
+        value_pos = pos - rect.topLeft() - QtCore.QPoint(name_column_width + self.PADDING, self.PADDING)
+        url = value_doc.documentLayout().anchorAt(QtCore.QPointF(value_pos))
+        return url or None
+
+    def paint(self, painter, style_options, model_index):
+        """
+        Paint method to handle all cells that are not being currently edited.
+
+        :param painter: The painter instance to use when painting
+        :param style_options: The style options to use when painting
+        :param model_index: The index in the data model that needs to be painted
+        """
+        rect = style_options.rect
+        (name_doc, value_doc, name_column_width, _) = self._get_layout(model_index, rect.width())
+
+        painter.save()
         try:
-            # first resolve the display names for all fields 
-            # so we can sort them in alphabetic order based on this
-            display_names = {}
-            for field_name in sg_data.keys():
-                display_name = shotgun_globals.get_field_display_name(formatter.entity_type, field_name)
-                display_names[display_name] = field_name
-            
-            # now create new items - order alphabetically
-            curr_row = 0
-            
-            for display_name in sorted(display_names.keys()):
-                
-                field_name = display_names[display_name]
-                raw_field_value = sg_data[field_name]
-                
-                # format the field value
-                value = formatter.format_raw_value(formatter.entity_type, field_name, raw_field_value)
-                
-                field_label = FieldNameLabel(self)
-                field_label.setText(display_name)
-                field_label.setWordWrap(True)
-                field_label.setAlignment(QtCore.Qt.AlignLeft|QtCore.Qt.AlignTop)
-                
-                value_label = FieldValueLabel(self)
-                value_label.setText(value)
-                value_label.setWordWrap(True)
-                value_label.setAlignment(QtCore.Qt.AlignLeft|QtCore.Qt.AlignTop)
-                value_label.linkActivated.connect(lambda url: self.link_activated.emit(url))
-                
-                self.ui.all_fields_layout.addWidget(field_label, curr_row, 0)
-                self.ui.all_fields_layout.addWidget(value_label, curr_row, 1)
-                
-                self._widgets.append(value_label)
-                self._widgets.append(field_label)
-                
-                curr_row += 1
-            
-            # let the value column be the expanding one
-            self.ui.all_fields_layout.setColumnStretch(1, 1)
-            # and push all rows together
-            self.ui.all_fields_layout.setRowStretch(curr_row, 1)
+            painter.setPen(QtGui.QPen(self._line_color, 1, QtCore.Qt.DotLine))
+            painter.drawLine(rect.bottomLeft(), rect.bottomRight())
+
+            context = QtGui.QAbstractTextDocumentLayout.PaintContext()
+
+            painter.translate(rect.left() + self.PADDING, rect.top() + self.PADDING)
+            context.palette.setColor(QtGui.QPalette.Text, self._name_color)
+            name_doc.documentLayout().draw(painter, context)
+
+            painter.translate(name_column_width, 0)
+            context.palette.setColor(QtGui.QPalette.Text,
+                                     style_options.palette.color(QtGui.QPalette.Text))
+            value_doc.documentLayout().draw(painter, context)
         finally:
-            # make the window visible again and trigger a redraw
-            self.setVisible(True)
+            painter.restore()
+
+    def sizeHint(self, style_options, model_index):
+        """
+        Specify the size of the item.
+
+        :param style_options: QT style options
+        :param model_index: Model item to operate on
+        """
+        width = self._view.viewport().width()
+        (_, _, _, height) = self._get_layout(model_index, width)
+        return QtCore.QSize(width, height)
+
+    def editorEvent(self, event, model, style_options, model_index):
+        """
+        Handles mouse events in order to support clickable hyperlinks.
+
+        :param event: The event that occurred
+        :param model: The model the index belongs to
+        :param style_options: The style options for the item
+        :param model_index: The index of the item that received the event
+        :returns: True if the event was handled, False otherwise
+        """
+        if event.type() not in [QtCore.QEvent.MouseMove, QtCore.QEvent.MouseButtonRelease]:
+            return False
+
+        url = self._get_link_at(model_index, style_options.rect, event.pos())
+
+        if event.type() == QtCore.QEvent.MouseMove:
+            if url:
+                self._view.viewport().setCursor(QtCore.Qt.PointingHandCursor)
+            else:
+                self._view.viewport().unsetCursor()
+            return False
+
+        if url and event.button() == QtCore.Qt.LeftButton:
+            self.link_activated.emit(url)
+            return True
+
+        return False
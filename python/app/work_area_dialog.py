@@ -11,8 +11,8 @@
 import sgtk
 from sgtk.platform.qt import QtCore, QtGui
 from .ui.work_area_dialog import Ui_WorkAreaDialog
+from . import schema_lookup
 
-shotgun_globals = sgtk.platform.import_framework("tk-framework-shotgunutils", "shotgun_globals")
 
 
 class WorkAreaDialog(QtGui.QDialog):
@@ -48,9 +48,9 @@ class WorkAreaDialog(QtGui.QDialog):
         )
 
         if main_item.get("code"):
-            entity_name = "%s %s" % (shotgun_globals.get_type_display_name(entity_type), main_item.get("code"))
+            entity_name = "%s %s" % (schema_lookup.get_type_display_name(entity_type), main_item.get("code"))
         else:
-            entity_name = "Unnamed %s" % shotgun_globals.get_type_display_name(entity_type)
+            entity_name = "Unnamed %s" % schema_lookup.get_type_display_name(entity_type)
 
         # # insert main item
         # self._main_item = QtGui.QListWidgetItem(entity_name, self.ui.task_list)
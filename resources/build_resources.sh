@@ -42,6 +42,7 @@ build_ui dialog
 build_ui list_item_widget
 build_ui all_fields_widget
 build_ui work_area_dialog
+build_ui diagnostics_dialog
 
 # build resources
 echo "building resources..."